@@ -8,6 +8,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 def create_app():
+    from app.utils.logger import configure_logging
+    configure_logging()
+
     app = Flask(__name__)
     
     # Config
@@ -19,7 +22,9 @@ def create_app():
     # Extensions
     Compress(app)
     
-    # Database Connection
+    # Database Connection (command listeners must be registered before the client exists)
+    from app.utils import metrics
+    metrics.register_command_listener()
     connect(host=os.getenv('MONGODB_URI'))
     
     # Extensions - CORS configuration (permissive for development)
@@ -38,10 +43,13 @@ def create_app():
              ],
              "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
              "allow_headers": ["Content-Type", "Authorization", "X-Auth-Token"],
-             "expose_headers": ["Content-Type", "Authorization", "X-Auth-Token"],
+             "expose_headers": ["Content-Type", "Authorization", "X-Auth-Token", "X-Next-Cursor", "X-Partial-Results"],
              "supports_credentials": True
          }})
     
+    # Request latency / query-count instrumentation and /metrics
+    metrics.init_app(app)
+    
     # Register Blueprints
     from .api.auth import auth_bp
     from .api.customers import customers_bp
@@ -118,4 +126,19 @@ def create_app():
     from app.api.reports import reports_bp
     app.register_blueprint(reports_bp, url_prefix='/api/agency/reports')
 
+    from app.api.exports import exports_bp
+    app.register_blueprint(exports_bp, url_prefix='/api/exports')
+
+    from app.api.events import events_bp
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+
+    from app.api.search import search_bp
+    app.register_blueprint(search_bp, url_prefix='/api/search')
+
+    # Background workers: pick up outbox events and export jobs left over from before a restart
+    from app.services.outbox_service import OutboxService
+    from app.services.export_job_service import ExportJobService
+    OutboxService.start()
+    ExportJobService.start()
+
     return app
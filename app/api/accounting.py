@@ -6,35 +6,39 @@ from datetime import datetime, timedelta
 from mongoengine.queryset.visitor import Q
 from mongoengine.queryset.visitor import Q
 from decimal import Decimal
-import csv
-import io
-import openpyxl
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-from flask import send_file, Response
 
 accounting_bp = Blueprint('accounting', __name__)
 
 from app.utils.serializers import mongo_to_dict
+from app.utils.batch_loader import load_refs, lookup, ref_id
+from app.utils.pagination import paginate, paginated_response
+from app.services.rollup_service import RollupService
+from app.services.payment_allocation_service import PaymentAllocationService
+from app.services.receivables_service import ReceivablesService
+from app.services.export_service import ExportService, LEDGER_HEADERS
+from app.services.export_job_service import ExportJobService
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 @accounting_bp.route('/stats', methods=['GET'])
 @token_required
 def get_stats():
     # 1. Today's Sales (Total Booking Value)
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_bookings = Booking.objects(agencyId=g.agency_id, createdAt__gte=today_start)
-    booking_sales = sum([b.totalAmount for b in today_bookings])
+    booking_res = list(Booking.objects(agencyId=g.agency_id, createdAt__gte=today_start).aggregate(
+        {'$group': {'_id': None, 'total': {'$sum': '$totalAmount'}}}
+    ))
+    booking_sales = booking_res[0]['total'] if booking_res else 0
     
-    today_credits = LedgerEntry.objects(agencyId=g.agency_id, type='Credit', date__gte=today_start)
-    manual_sales = sum([e.amount for e in today_credits])
+    manual_sales = RollupService.totals(g.agency_id, today_start)['credit']
     
     today_sales = booking_sales + manual_sales
     
-    # 2. Total Income/Expenses
-    entries = LedgerEntry.objects(agencyId=g.agency_id)
-    total_income = sum([e.amount for e in entries if e.type == 'Credit'])
-    total_expenses = sum([e.amount for e in entries if e.type == 'Debit'])
+    # 2. Total Income/Expenses (ledger only, from the daily rollups)
+    totals = RollupService.totals(g.agency_id)
+    total_income = totals['credit']
+    total_expenses = totals['debit']
     
     return jsonify({
         'todaySales': float(today_sales),
@@ -46,36 +50,65 @@ def get_stats():
 @accounting_bp.route('/unpaid', methods=['GET'])
 @token_required
 def get_unpaid():
-    bookings = Booking.objects(agencyId=g.agency_id, balanceDue__gt=0)
-    return jsonify(mongo_to_dict(bookings)), 200
+    query = Booking.objects(agencyId=g.agency_id, balanceDue__gt=0)
+    try:
+        bookings, next_cursor = paginate(query, 'createdAt')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return paginated_response(mongo_to_dict(bookings), next_cursor)
+
+@accounting_bp.route('/receivables', methods=['GET'])
+@token_required
+def get_receivables():
+    """Aging buckets (0-30, 31-60, 61-90, 90+ days) and the top ?top= customers by balance"""
+    try:
+        top = max(1, min(int(request.args.get('top', 10)), 100))
+    except ValueError:
+        return jsonify({'error': 'top must be a number'}), 400
+    return jsonify(ReceivablesService.summary(g.agency_id, top)), 200
+
+@accounting_bp.route('/receivables/bookings', methods=['GET'])
+@token_required
+def get_receivable_bookings():
+    """Unpaid bookings oldest first, optionally for one ?bucket= and/or ?customerId="""
+    try:
+        rows, next_cursor = ReceivablesService.bookings(
+            g.agency_id,
+            bucket=request.args.get('bucket'),
+            customer_id=request.args.get('customerId'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return paginated_response(rows, next_cursor)
 
 @accounting_bp.route('/ledger', methods=['GET'])
 @token_required
 def get_ledger():
-    entries = LedgerEntry.objects(agencyId=g.agency_id).order_by('-date')
+    try:
+        entries, next_cursor = paginate(LedgerEntry.objects(agencyId=g.agency_id), 'date')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    result = mongo_to_dict(entries)
     
-    # Manually build list to include dereferenced names
-    result = []
-    for entry in entries:
-        item = mongo_to_dict(entry)
-        
+    # Resolve customer names and booking numbers for the whole page at once
+    from models.customer import Customer
+    customers = load_refs(result, 'customerId', Customer, 'fullName')
+    bookings = load_refs(result, 'bookingId', Booking, 'bookingNumber')
+    
+    for item in result:
         # Populate Customer Name
-        try:
-            if entry.customerId:
-                 item['customerName'] = entry.customerId.fullName
-        except Exception:
-             item['customerName'] = "Unknown (Deleted)"
+        if ref_id(item.get('customerId')):
+            customer = lookup(customers, item['customerId'])
+            item['customerName'] = customer.fullName if customer else "Unknown (Deleted)"
             
         # Populate Booking Number if exists
-        try:
-            if entry.bookingId:
-                item['bookingNumber'] = entry.bookingId.bookingNumber
-        except Exception:
-             item['bookingNumber'] = "Unknown (Deleted)"
-            
-        result.append(item)
+        if ref_id(item.get('bookingId')):
+            booking = lookup(bookings, item['bookingId'])
+            item['bookingNumber'] = booking.bookingNumber if booking else "Unknown (Deleted)"
         
-    return jsonify(result), 200
+    return paginated_response(result, next_cursor)
 
 @accounting_bp.route('/ledger', methods=['POST'])
 @token_required
@@ -84,7 +117,6 @@ def create_entry():
     from werkzeug.utils import secure_filename
     from app.utils.file_handler import allowed_file, save_file
     import uuid
-    import traceback
     
     # Check if multipart/form-data or json
     if request.is_json:
@@ -116,70 +148,37 @@ def create_entry():
             customer = Customer.objects(id=data['customerId'], agencyId=g.agency_id).first()
             if customer:
                 entry.customerId = customer
-                
-                # Logic: Distribute payment across unpaid bookings if Credit
-                if entry.type == 'Credit' and not data.get('bookingId'):
-                    # Find unpaid bookings for this customer, oldest first
-                    unpaid_bookings = Booking.objects(
-                        agencyId=g.agency_id, 
-                        customerId=customer, 
-                        balanceDue__gt=0
-                    ).order_by('createdAt')
-                    
-                    remaining_payment = entry.amount
-                    
-                    for booking in unpaid_bookings:
-                        if remaining_payment <= 0:
-                            break
-                            
-                        # Calculate how much we can pay on this booking
-                        amount_to_pay = min(remaining_payment, booking.balanceDue)
-                        
-                        booking.paidAmount = (booking.paidAmount or Decimal('0.00')) + amount_to_pay
-                        # Explicitly update balanceDue to ensure real-time consistency
-                        booking.balanceDue = booking.totalAmount - booking.paidAmount
-                        booking.save()
-                        
-                        remaining_payment -= amount_to_pay
-                        
-                    # Note: Any remaining payment stays as Credit on the Ledger Entry 
-                    # but doesn't attach to a booking if all are paid.
 
         if data.get('bookingId'):
              booking = Booking.objects(id=data['bookingId'], agencyId=g.agency_id).first()
              if booking:
                  entry.bookingId = booking
-                 if entry.type == 'Credit':
-                     booking.paidAmount = (booking.paidAmount or Decimal('0.00')) + Decimal(str(data['amount']))
-                     # Explicitly update balanceDue
-                     booking.balanceDue = booking.totalAmount - booking.paidAmount
-                     booking.save() 
         
-        entry.save()
+        # A Credit pays its booking, or the customer's unpaid bookings oldest
+        # first; the entry and every booking update are written together
+        PaymentAllocationService.create(entry)
+        RollupService.apply(RollupService.ledger_contribution(entry))
         return jsonify(mongo_to_dict(entry)), 201
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Error creating ledger entry")
         return jsonify({'error': str(e)}), 400
 
 @accounting_bp.route('/ledger/<id>', methods=['PUT'])
 @token_required
 def update_entry(id):
-    print(f"DEBUG: update_entry called for {id}")
     data = request.get_json()
-    print(f"DEBUG: Payload: {data}")
+    logger.debug("update_entry", extra={'entry_id': id, 'fields': sorted(data or {})})
     entry = LedgerEntry.objects(id=id, agencyId=g.agency_id).first()
     if not entry:
         return jsonify({'error': 'Entry not found'}), 404
         
     try:
-        # Revert previous booking effect if any
-        if entry.bookingId and entry.type == 'Credit':
-            entry.bookingId.paidAmount = (entry.bookingId.paidAmount or 0) - entry.amount
-            entry.bookingId.save()
+        rollup_before = RollupService.ledger_contribution(entry)
+        applied = PaymentAllocationService.recorded(entry)
             
         # Update fields
         entry.type = data['type']
-        entry.amount = Decimal(data['amount'])
+        entry.amount = Decimal(str(data['amount']))
         entry.description = data['description']
         
         if data.get('customerId'):
@@ -189,15 +188,10 @@ def update_entry(id):
         else:
              entry.customerId = None
 
-        # Apply new booking effect if any (Assuming booking link doesn't change for MVP, or we need to handle it)
-        # For simplicity, if bookingId was present, we re-apply to the SAME booking.
-        # If user wants to change Booking ID, that's complex logic. Let's assume booking link stays same for now unless explicitly handled.
-        
-        if entry.bookingId and entry.type == 'Credit':
-             entry.bookingId.paidAmount = (entry.bookingId.paidAmount or 0) + entry.amount
-             entry.bookingId.save()
-             
-        entry.save()
+        # The booking link stays the same; reverse what the entry applied
+        # before and apply its new allocation in the same write
+        PaymentAllocationService.update(entry, applied)
+        RollupService.replace(rollup_before, RollupService.ledger_contribution(entry))
         return jsonify(mongo_to_dict(entry)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -205,18 +199,16 @@ def update_entry(id):
 @accounting_bp.route('/ledger/<id>', methods=['DELETE'])
 @token_required
 def delete_entry(id):
-    print(f"DEBUG: delete_entry called for {id}")
+    logger.debug("delete_entry", extra={'entry_id': id})
     entry = LedgerEntry.objects(id=id, agencyId=g.agency_id).first()
     if not entry:
         return jsonify({'error': 'Entry not found'}), 404
         
     try:
-        # Revert booking effect
-        if entry.bookingId and entry.type == 'Credit':
-            entry.bookingId.paidAmount = (entry.bookingId.paidAmount or 0) - entry.amount
-            entry.bookingId.save()
-            
-        entry.delete()
+        rollup_before = RollupService.ledger_contribution(entry)
+        # Deletes the entry and reverses its booking payments together
+        PaymentAllocationService.delete(entry)
+        RollupService.apply(rollup_before, -1)
         return jsonify({'message': 'Deleted'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -225,68 +217,18 @@ def delete_entry(id):
 @token_required
 def export_ledger():
     fmt = request.args.get('format', 'csv')
-    entries = LedgerEntry.objects(agencyId=g.agency_id).order_by('-date')
-    
-    # Prepare data
-    data = []
-    for entry in entries:
-        row = {
-            'Date': entry.date.strftime('%Y-%m-%d'),
-            'Type': entry.type,
-            'Description': entry.description,
-            'Amount': float(entry.amount),
-            'Customer': entry.customerId.fullName if entry.customerId else '-',
-            'Booking': entry.bookingId.bookingNumber if entry.bookingId else '-'
-        }
-        data.append(row)
+    rows = ExportService.ledger_rows(g.agency_id)
     
     if fmt == 'csv':
-        si = io.StringIO()
-        cw = csv.DictWriter(si, fieldnames=['Date', 'Type', 'Description', 'Amount', 'Customer', 'Booking'])
-        cw.writeheader()
-        cw.writerows(data)
-        return Response(si.getvalue(), mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=ledger.csv'})
+        return ExportService.csv_response(LEDGER_HEADERS, rows, 'ledger.csv')
         
     elif fmt == 'excel':
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.append(['Date', 'Type', 'Description', 'Amount', 'Customer', 'Booking'])
-        for row in data:
-            ws.append([row['Date'], row['Type'], row['Description'], row['Amount'], row['Customer'], row['Booking']])
-        
-        out = io.BytesIO()
-        wb.save(out)
-        out.seek(0)
-        return send_file(out, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='ledger.xlsx')
+        return ExportService.excel_response(LEDGER_HEADERS, rows, 'ledger.xlsx', 'Ledger')
         
     elif fmt == 'pdf':
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        
-        # Data for Table
-        table_data = [['Date', 'Type', 'Description', 'Amount', 'Customer (Book#)']]
-        for row in data:
-            desc = row['Description'][:25] + '...' if len(row['Description']) > 25 else row['Description']
-            cust = row['Customer']
-            if row['Booking'] != '-':
-                cust += f" ({row['Booking']})"
-            table_data.append([row['Date'], row['Type'], desc, str(row['Amount']), cust])
-            
-        t = Table(table_data)
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(t)
-        doc.build(elements)
-        buffer.seek(0)
-        return send_file(buffer, mimetype='application/pdf', as_attachment=True, download_name='ledger.pdf')
+        # reportlab is too slow to run inside the request; render it as a job
+        job = ExportJobService.enqueue(g.agency_id, g.user_id, 'ledger', 'pdf')
+        return jsonify(ExportJobService.to_dict(job)), 202
         
     return jsonify({'error': 'Invalid format'}), 400
 # Add these lines at the end of accounting.py after line 299
@@ -299,8 +241,12 @@ def get_misc_expenses():
     """Get all miscellaneous expenses for the agency"""
     from models.miscellaneous_expense import MiscellaneousExpense
     
-    expenses = MiscellaneousExpense.objects(agencyId=g.agency_id).order_by('-expense_date')
-    return jsonify(mongo_to_dict(expenses)), 200
+    query = MiscellaneousExpense.objects(agencyId=g.agency_id)
+    try:
+        expenses, next_cursor = paginate(query, 'expense_date')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return paginated_response(mongo_to_dict(expenses), next_cursor)
 
 @accounting_bp.route('/misc-expenses', methods=['POST'])
 @token_required
@@ -320,6 +266,7 @@ def create_misc_expense():
             description=data.get('description', '')
         )
         expense.save()
+        RollupService.apply(RollupService.expense_contribution(expense))
         
         return jsonify(mongo_to_dict(expense)), 201
     except Exception as e:
@@ -338,6 +285,7 @@ def update_misc_expense(id):
             return jsonify({'error': 'Expense not found'}), 404
         
         data = request.get_json()
+        rollup_before = RollupService.expense_contribution(expense)
         
         if 'title' in data:
             expense.title = data['title']
@@ -349,6 +297,7 @@ def update_misc_expense(id):
             expense.description = data['description']
         
         expense.save()
+        RollupService.replace(rollup_before, RollupService.expense_contribution(expense))
         return jsonify(mongo_to_dict(expense)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -364,7 +313,9 @@ def delete_misc_expense(id):
         if not expense:
             return jsonify({'error': 'Expense not found'}), 404
         
+        rollup_before = RollupService.expense_contribution(expense)
         expense.delete()
+        RollupService.apply(rollup_before, -1)
         return jsonify({'message': 'Expense deleted successfully'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -1,14 +1,15 @@
 from flask import Blueprint, request, jsonify
-from app.middleware import token_required, role_required
+from app.middleware import token_required, role_required, invalidate_user_cache
 from models.agency import Agency
 from models.user import User
 from models.contact_message import ContactMessage
 from models.system_setting import SystemSetting
-from models.booking import Booking
 from app.utils.serializers import mongo_to_dict
+from app.utils.pagination import paginate, paginated_response
+from app.services.platform_metrics_service import PlatformMetricsService
 from app.services.auth_service import AuthService
 from mongoengine.queryset.visitor import Q
-from datetime import datetime, timedelta
+from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -16,26 +17,31 @@ admin_bp = Blueprint('admin', __name__)
 @token_required
 @role_required('SuperAdmin')
 def get_dashboard_stats():
-    # 1. Agency Stats
-    total_agencies = Agency.objects.count()
-    active_agencies = Agency.objects(status='Active').count()
-    pending_agencies = Agency.objects(status='Pending').count()
-    
-    # 2. Revenue/Booking Stats (Aggregate from all bookings)
-    # This might be heavy if many bookings, but fine for MVP
-    total_bookings = Booking.objects.count()
-    recent_bookings = Booking.objects(createdAt__gte=datetime.utcnow() - timedelta(days=30)).count()
+    """Platform totals from the periodically refreshed platform_metrics snapshot"""
+    metrics = PlatformMetricsService.get()
+    agencies = metrics.get('agencies') or {}
     
     return jsonify({
         'agencies': {
-            'total': total_agencies,
-            'active': active_agencies,
-            'pending': pending_agencies
+            'total': agencies.get('total', 0),
+            'active': agencies.get('Active', 0),
+            'pending': agencies.get('Pending', 0),
+            'suspended': agencies.get('Suspended', 0),
+            'rejected': agencies.get('Rejected', 0)
         },
         'bookings': {
-            'total': total_bookings,
-            'recent_30_days': recent_bookings
-        }
+            'total': metrics.get('totalBookings', 0),
+            'recent_30_days': metrics.get('recentBookings', 0)
+        },
+        'activity': {
+            'active_agencies_30_days': metrics.get('recentActiveAgencies', 0),
+            'gmv_30_days': metrics.get('recentGmv', 0)
+        },
+        'gmv': {
+            'total': metrics.get('gmv', 0),
+            'by_agency': metrics.get('gmvByAgency', [])
+        },
+        'refreshedAt': metrics['refreshedAt'].isoformat() if metrics.get('refreshedAt') else None
     }), 200
 
 @admin_bp.route('/agencies', methods=['GET'])
@@ -52,18 +58,20 @@ def list_agencies():
     if search:
         query &= Q(name__icontains=search)
         
-    agencies = Agency.objects(query).order_by('-createdAt')
+    try:
+        agencies, next_cursor = paginate(Agency.objects(query), 'createdAt')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Enrich with Admin Email
+    # Enrich with Admin Email (the page's admins in one aggregation)
+    emails = PlatformMetricsService.admin_emails([agency['_id'] for agency in agencies])
     agency_list = []
     for agency in agencies:
         data = mongo_to_dict(agency)
-        # Find the SuperAdmin/AgencyAdmin for this agency
-        admin_user = User.objects(agencyId=agency.id, role__in=['AgencyAdmin', 'SuperAdmin']).first()
-        data['adminEmail'] = admin_user.email if admin_user else 'N/A'
+        data['adminEmail'] = emails.get(agency['_id'], 'N/A')
         agency_list.append(data)
         
-    return jsonify(agency_list), 200
+    return paginated_response(agency_list, next_cursor)
 
 @admin_bp.route('/agencies/<id>/status', methods=['PUT'])
 @token_required
@@ -79,8 +87,12 @@ def update_agency_status(id):
     if not agency:
         return jsonify({'error': 'Agency not found'}), 404
         
+    previous_status = agency.status
     agency.status = new_status
     agency.save()
+    PlatformMetricsService.agency_status_change(previous_status, new_status)
+    # Cached users carry their agency's status
+    invalidate_user_cache()
     
     # If suspended/rejected, maybe we want to deactivate users?
     # For now keeping it simple.
@@ -1,31 +1,13 @@
 from flask import Blueprint, request, jsonify
 from models.post import Post
-from models.user import User
-import jwt
-from flask import current_app
+from app.middleware import token_required, role_required
 
 admin_moderation_bp = Blueprint('admin_moderation', __name__)
 
-def get_current_user(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header:
-        return None
-    token = auth_header.split(" ")[1]
-    try:
-        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-        return User.objects(id=payload['sub']).first()
-    except:
-        return None
-
-def is_super_admin(user):
-    return user and user.role == 'SuperAdmin'
-
 @admin_moderation_bp.route('/posts', methods=['GET'])
+@token_required
+@role_required('SuperAdmin')
 def get_posts():
-    user = get_current_user(request)
-    if not is_super_admin(user):
-        return jsonify({'error': 'Unauthorized'}), 403
-
     try:
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
@@ -42,7 +24,7 @@ def get_posts():
         for post in posts:
             results.append({
                 'id': str(post.id),
-                'agencyName': post.agency.name,
+                'agencyName': post.agencySnapshot.name if post.agencySnapshot else post.agency.name,
                 'content': post.content,
                 'mediaUrls': post.mediaUrls,
                 'postType': post.postType,
@@ -57,11 +39,9 @@ def get_posts():
         return jsonify({'error': str(e)}), 500
 
 @admin_moderation_bp.route('/posts/<id>', methods=['PATCH'])
+@token_required
+@role_required('SuperAdmin')
 def update_post_status(id):
-    user = get_current_user(request)
-    if not is_super_admin(user):
-        return jsonify({'error': 'Unauthorized'}), 403
-
     data = request.get_json()
     try:
         post = Post.objects.get(id=id)
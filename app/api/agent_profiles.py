@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, g
 from app.middleware import token_required
 from models.agent_profile import AgentProfile
 from app.utils.serializers import mongo_to_dict
+from app.services.search_service import SearchService
 from app.utils.error_handlers import error_response, validation_error, not_found_error
 
 agent_profiles_bp = Blueprint('agent_profiles', __name__)
@@ -30,6 +31,7 @@ def create_profile():
             agencyId=g.agency_id
         )
         profile.save()
+        SearchService.index(profile)
         
         return jsonify(mongo_to_dict(profile)), 201
 
@@ -63,6 +65,7 @@ def update_profile(id):
         if 'cnic' in data: profile.cnic = data['cnic']
         
         profile.save()
+        SearchService.index(profile)
         return jsonify(mongo_to_dict(profile)), 200
         
     except Exception as e:
@@ -77,6 +80,7 @@ def delete_profile(id):
     
     try:
         profile.delete()
+        SearchService.remove(profile)
         return jsonify({"message": "Profile deleted"}), 200
     except Exception as e:
         return error_response(str(e), "SERVER_ERROR", 500)
@@ -3,6 +3,9 @@ from models.agent import Agent
 from models.agency import Agency
 from app.middleware import token_required
 from app.utils.serializers import mongo_to_dict
+from app.utils.pagination import paginate, paginated_response
+from app.services.rollup_service import RollupService
+from app.services.search_service import SearchService
 from app.utils.error_handlers import error_response, validation_error, not_found_error
 from mongoengine.errors import ValidationError, DoesNotExist
 from mongoengine.errors import ValidationError, DoesNotExist
@@ -25,18 +28,14 @@ def get_agents():
         agents_query = Agent.objects(created_by_agency=agency_id)
         
         if query:
-            # Simple case-insensitive search on name, mobile, source name
-            from mongoengine.queryset.visitor import Q
-            agents_query = agents_query.filter(
-                Q(agent_name__icontains=query) | 
-                Q(mobile_number__icontains=query) | 
-                Q(source_name__icontains=query) |
-                Q(source_cnic_number__icontains=query) |
-                Q(slip_number__icontains=query)
-            )
+            # Name, mobile, source, CNIC or slip number through the search index
+            agents_query = agents_query.filter(id__in=SearchService.ids(agency_id, 'agent', query))
             
-        agents_query = agents_query.order_by('-created_at')
-        return jsonify(mongo_to_dict(agents_query)), 200
+        try:
+            agents, next_cursor = paginate(agents_query, 'created_at')
+        except ValueError as e:
+            return validation_error({'cursor': str(e)})
+        return paginated_response(mongo_to_dict(agents), next_cursor)
         
     except Exception as e:
         return error_response(str(e), "SERVER_ERROR", 500)
@@ -73,6 +72,8 @@ def create_agent():
         )
         
         agent.save()
+        RollupService.apply(RollupService.agent_contribution(agent))
+        SearchService.index(agent)
         
         return jsonify(mongo_to_dict(agent)), 201
         
@@ -101,6 +102,7 @@ def update_agent(id):
         data = request.form.to_dict()
         cnic_file = request.files.get('source_cnic_attachment')
         slip_file = request.files.get('slip_attachment')
+        rollup_before = RollupService.agent_contribution(agent)
         
         if 'agent_name' in data: agent.agent_name = data['agent_name']
         if 'source_name' in data: agent.source_name = data['source_name']
@@ -120,6 +122,8 @@ def update_agent(id):
             agent.slip_attachment = slip_path
             
         agent.save()
+        RollupService.replace(rollup_before, RollupService.agent_contribution(agent))
+        SearchService.index(agent)
         
         return jsonify(mongo_to_dict(agent)), 200
         
@@ -133,7 +137,10 @@ def update_agent(id):
 def delete_agent(id):
     try:
         agent = Agent.objects.get(id=id, created_by_agency=g.agency_id)
+        rollup_before = RollupService.agent_contribution(agent)
         agent.delete()
+        RollupService.apply(rollup_before, -1)
+        SearchService.remove(agent)
         return jsonify({'message': 'Agent deleted successfully'}), 200
     except DoesNotExist:
         return not_found_error("Agent not found")
@@ -2,9 +2,29 @@ from flask import Blueprint, request, jsonify, g
 from app.middleware import token_required
 from models.ticket_booking import TicketBooking
 from models.ticket_group import TicketGroup
+from app.services.event_bus import EventBus, agency_channel
+from app.utils.batch_loader import ref_id
+from app.services.marketplace_stats_service import MarketplaceStatsService
 
 booking_actions_bp = Blueprint('booking_actions', __name__)
 
+def restore_seats(booking):
+    """Put a booking's seats back on its group (and on the marketplace total if the group is active)"""
+    group = TicketGroup.objects(id=ref_id(booking._data.get('ticketGroupId'))).modify(
+        inc__available_seats=booking.seats_booked,
+        new=True
+    )
+    if group and group.status == 'active':
+        MarketplaceStatsService.adjust(active=booking.seats_booked)
+
+def publish_status(booking):
+    """Tell both agencies' live clients about a status change"""
+    EventBus.publish(
+        [agency_channel(ref_id(booking._data.get('agencyId'))), agency_channel(ref_id(booking._data.get('sellerAgencyId')))],
+        'ticket_booking.updated',
+        {'bookingId': str(booking.id), 'status': booking.status}
+    )
+
 @booking_actions_bp.route('/<booking_id>/confirm', methods=['POST'])
 @token_required
 def confirm_booking(booking_id):
@@ -24,6 +44,8 @@ def confirm_booking(booking_id):
         # Update status to confirmed
         booking.status = 'confirmed'
         booking.save()
+        MarketplaceStatsService.adjust(sold=booking.seats_booked)
+        publish_status(booking)
         
         return jsonify({
             'message': 'Booking confirmed successfully',
@@ -51,13 +73,12 @@ def reject_booking(booking_id):
             return jsonify({'error': f'Booking is already {booking.status}'}), 400
         
         # Restore seats to ticket group
-        TicketGroup.objects(id=booking.ticketGroupId.id).update(
-            inc__available_seats=booking.seats_booked
-        )
+        restore_seats(booking)
         
         # Update status to rejected
         booking.status = 'rejected'
         booking.save()
+        publish_status(booking)
         
         return jsonify({
             'message': 'Booking rejected and seats restored',
@@ -86,13 +107,15 @@ def cancel_booking(booking_id):
             return jsonify({'error': f'Cannot cancel - booking is {booking.status}'}), 400
         
         # Restore seats to ticket group
-        TicketGroup.objects(id=booking.ticketGroupId.id).update(
-            inc__available_seats=booking.seats_booked
-        )
+        restore_seats(booking)
         
         # Update status to cancelled
+        was_confirmed = booking.status == 'confirmed'
         booking.status = 'cancelled'
         booking.save()
+        if was_confirmed:
+            MarketplaceStatsService.adjust(sold=-booking.seats_booked)
+        publish_status(booking)
         
         return jsonify({
             'message': 'Booking cancelled and seats restored',
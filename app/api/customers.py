@@ -1,13 +1,16 @@
 from flask import Blueprint, request, jsonify, g
 from app.middleware import token_required
 from models.customer import Customer
+from models.booking import Booking
 from models.agency import Agency
 from mongoengine.errors import NotUniqueError
+from bson import ObjectId
 
 
 customers_bp = Blueprint('customers', __name__)
 
 from app.utils.serializers import mongo_to_dict
+from app.services.search_service import SearchService
 
 @customers_bp.route('', methods=['GET'])
 @token_required
@@ -17,18 +20,27 @@ def get_customers():
     query = Customer.objects(agencyId=g.agency_id)
     
     if search:
-        # Simple regex search on name or phone
-        query = query.filter(fullName__icontains=search)
+        # Name, phone, CNIC or passport through the search index
+        query = query.filter(id__in=SearchService.ids(g.agency_id, 'customer', search))
         
     customers = query.order_by('-createdAt').limit(50)
     data = mongo_to_dict(customers)
     
-    # Check for bookings for each customer (MVP Approach)
-    # Ideally, use aggregation lookup for performance
-    from models.booking import Booking
+    # From the maintained account summary rather than a booking lookup per
+    # row; customers written before summaries existed have none, so those
+    # are checked against bookings in one query
+    unknown = [ObjectId(c['_id']) for c in data if 'summary' not in c]
+    booked = set()
+    if unknown:
+        booked = set(Booking._get_collection().distinct('customerId', {
+            'customerId': {'$in': unknown}, 'status': {'$ne': 'Cancelled'}
+        }))
     for customer_data in data:
-        booking = Booking.objects(customerId=customer_data['_id'], agencyId=g.agency_id).first()
-        customer_data['bookingStatus'] = 'Confirmed' if booking else None
+        if 'summary' in customer_data:
+            has_bookings = (customer_data['summary'] or {}).get('bookingCount', 0) > 0
+        else:
+            has_bookings = ObjectId(customer_data['_id']) in booked
+        customer_data['bookingStatus'] = 'Confirmed' if has_bookings else None
         
     return jsonify(data), 200
 
@@ -94,6 +106,7 @@ def create_customer():
             passport_attachment=passport_path
         )
         customer.save()
+        SearchService.index(customer)
         return jsonify(mongo_to_dict(customer)), 201
         
     except NotUniqueError as e:
@@ -140,6 +153,7 @@ def update_customer(id):
             customer.passport_attachment = save_file(passport_attachment, 'customers/passports')
         
         customer.save()
+        SearchService.index(customer)
         return jsonify(mongo_to_dict(customer)), 200
     except NotUniqueError:
         return error_response("Phone number must be unique", "DUPLICATE_ENTRY", 409)
@@ -156,6 +170,7 @@ def delete_customer(id):
         
     try:
         customer.delete()
+        SearchService.remove(customer)
         return jsonify({'message': 'Customer deleted'}), 200
     except Exception as e:
         return error_response(str(e), "SERVER_ERROR", 500)
@@ -0,0 +1,76 @@
+from flask import Blueprint, Response, jsonify, g, stream_with_context
+from app.middleware import stream_token_required, get_current_user
+from app.services.event_bus import EventBus, agency_channel, user_channel, role_channel
+from app.services.notification_service import NotificationService
+from models.ticket_booking import TicketBooking
+import json
+import os
+import time
+
+events_bp = Blueprint('events', __name__)
+
+HEARTBEAT_SECONDS = 15
+# Each open stream holds a worker thread (gunicorn.conf.py runs gthread
+# workers; sync workers would give it a whole process); clients reconnect
+# (EventSource does so automatically) after this long
+STREAM_MAX_SECONDS = int(os.getenv('SSE_MAX_SECONDS', '300'))
+RETRY_MS = 3000
+
+
+def live_counts(user):
+    """The numbers the frontend used to poll for"""
+    return {
+        'notifications': NotificationService.unread_count(user),
+        'sales': TicketBooking.objects(sellerAgencyId=user.agencyId.pk, is_read_by_seller=False).count(),
+        'purchases': TicketBooking.objects(agencyId=user.agencyId.pk, is_read_by_buyer=False).count()
+    }
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@events_bp.route('/stream', methods=['GET'])
+@stream_token_required
+def stream():
+    """
+    Server-Sent Events: 'counts' on connect and whenever they change, plus
+    each change event ('ticket_booking.created', 'notification.created', ...).
+    Only heartbeats are sent while idle; those need no database queries.
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    subscription = EventBus.subscribe([
+        agency_channel(g.agency_id), user_channel(g.user_id), role_channel(g.role)
+    ])
+
+    def generate():
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            yield sse('counts', live_counts(user))
+            deadline = time.monotonic() + STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                event = subscription.get(timeout=HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+
+                # Coalesce a burst of events into one counts refresh
+                events = [event]
+                while True:
+                    event = subscription.get(timeout=0)
+                    if event is None:
+                        break
+                    events.append(event)
+                for event in events:
+                    yield sse(event['type'], event['data'])
+                yield sse('counts', live_counts(user))
+        finally:
+            EventBus.unsubscribe(subscription)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Disable proxy buffering (nginx)
+    })
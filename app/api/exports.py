@@ -0,0 +1,59 @@
+from flask import Blueprint, request, jsonify, g, send_file
+from app.middleware import token_required
+from models.export_job import ExportJob
+from app.services.export_job_service import ExportJobService, MIMETYPES
+from app.utils.error_handlers import error_response, validation_error, not_found_error
+import os
+
+exports_bp = Blueprint('exports', __name__)
+
+@exports_bp.route('', methods=['POST'])
+@token_required
+def create_export():
+    """
+    Queue a background export.
+    Body: {"type": "bookings" | "ledger", "format": "pdf" | "csv" | "excel"}
+    """
+    data = request.get_json() or {}
+    kind = data.get('type')
+    fmt = data.get('format', 'pdf')
+
+    errors = {}
+    if kind not in ('bookings', 'ledger'):
+        errors['type'] = "Must be 'bookings' or 'ledger'"
+    if fmt not in MIMETYPES:
+        errors['format'] = "Must be 'pdf', 'csv' or 'excel'"
+    if errors:
+        return validation_error(errors)
+
+    job = ExportJobService.enqueue(g.agency_id, g.user_id, kind, fmt)
+    return jsonify(ExportJobService.to_dict(job)), 202
+
+@exports_bp.route('', methods=['GET'])
+@token_required
+def list_exports():
+    """The agency's 20 most recent export jobs"""
+    jobs = ExportJob.objects(agencyId=g.agency_id).order_by('-createdAt').limit(20)
+    return jsonify([ExportJobService.to_dict(job) for job in jobs]), 200
+
+@exports_bp.route('/<id>', methods=['GET'])
+@token_required
+def get_export(id):
+    job = ExportJob.objects(id=id, agencyId=g.agency_id).first()
+    if not job:
+        return not_found_error("Export job not found")
+    return jsonify(ExportJobService.to_dict(job)), 200
+
+@exports_bp.route('/<id>/download', methods=['GET'])
+@token_required
+def download_export(id):
+    job = ExportJob.objects(id=id, agencyId=g.agency_id).first()
+    if not job:
+        return not_found_error("Export job not found")
+    if job.status != 'Completed':
+        return error_response(f"Export is {job.status.lower()}", "NOT_READY", 409)
+    if not job.filePath or not os.path.exists(job.filePath):
+        return error_response("Export file has expired", "GONE", 410)
+
+    return send_file(job.filePath, mimetype=MIMETYPES[job.format],
+                     as_attachment=True, download_name=job.fileName)
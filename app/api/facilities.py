@@ -2,9 +2,13 @@ from flask import Blueprint, request, jsonify, g
 from app.middleware import token_required
 from models.facility import Facility, Transport, TransportRoute, Ticket, Ziarat, Moaleem, Umrahs
 from app.utils.serializers import mongo_to_dict
+from app.utils.pagination import paginate, paginated_response
 from app.utils.error_handlers import error_response, validation_error, not_found_error
+from app.utils.logger import get_logger
 from datetime import datetime
 
+logger = get_logger(__name__)
+
 facilities_bp = Blueprint('facilities', __name__)
 
 def validate_facility_data(data):
@@ -55,14 +59,17 @@ def validate_facility_data(data):
 @facilities_bp.route('', methods=['GET'])
 @token_required
 def get_facilities():
-    facilities = Facility.objects(agencyId=g.agency_id).order_by('-createdAt')
-    return jsonify(mongo_to_dict(facilities)), 200
+    try:
+        facilities, next_cursor = paginate(Facility.objects(agencyId=g.agency_id), 'createdAt')
+    except ValueError as e:
+        return validation_error({'cursor': str(e)})
+    return paginated_response(mongo_to_dict(facilities), next_cursor)
 
 @facilities_bp.route('', methods=['POST'])
 @token_required
 def create_facility():
     data = request.get_json()
-    print(f"DEBUG: create_facility received data: {data}") # Debug log
+    logger.debug("create_facility", extra={'fields': sorted(data or {})})
     if not data:
         return error_response("No data provided", "INVALID_REQUEST")
         
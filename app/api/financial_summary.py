@@ -1,25 +1,17 @@
-from flask import Blueprint, request, jsonify, current_app
-from models.ledger import LedgerEntry
-from models.user import User
+from flask import Blueprint, request, jsonify, g
+from app.middleware import token_required
+from app.utils.batch_loader import ref_id
+from app.services.report_service import ReportService, WIDGETS, date_range
+from app.services.query_executor import partial_response
+from app.utils.logger import get_logger
 from datetime import datetime
-import jwt
 
-financial_summary_bp = Blueprint('financial_summary', __name__)
-
-def get_current_user(request):
-    """Extract user from JWT token in Authorization header"""
-    auth_header = request.headers.get('Authorization')
-    if not auth_header:
-        return None
-    token = auth_header.split(" ")[1]
-    try:
-        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-        return User.objects(id=payload['sub']).first()
-    except:
-        return None
+logger = get_logger(__name__)
 
+financial_summary_bp = Blueprint('financial_summary', __name__)
 
 @financial_summary_bp.route('/financial-summary', methods=['GET'])
+@token_required
 def get_financial_summary():
     """
     Get financial summary for the current agency.
@@ -36,11 +28,7 @@ def get_financial_summary():
         "status": "positive" | "negative"
     }
     """
-    user = get_current_user(request)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
-    agency_id = user.agencyId
+    agency_id = ref_id(g.agency_id)
     if not agency_id:
         return jsonify({'error': 'User not associated with an agency'}), 400
     
@@ -63,17 +51,14 @@ def get_financial_summary():
                 filters['date__lte'] = end_dt
         
         
-        # Calculate total credit
-        credit_entries = LedgerEntry.objects(**filters, type='Credit')
-        total_credit = sum(float(entry.amount) for entry in credit_entries)
-        
-        # Use shared financial service for debit calculation
+        # Ledger credit/debit, agent payments and misc expenses, read concurrently
         from app.services.financial_service import FinancialService
         debit_breakdown = FinancialService.calculate_total_debit(
             agency_id, 
             filters.get('date__gte'), 
             filters.get('date__lte')
         )
+        total_credit = debit_breakdown['ledger_credit']
         total_debit = debit_breakdown['total_debit']
         
         # Calculate net balance
@@ -102,3 +87,36 @@ def get_financial_summary():
         return jsonify({'error': f'Invalid date format: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@financial_summary_bp.route('/dashboard', methods=['GET'])
+@token_required
+def get_dashboard():
+    """
+    Every dashboard widget in one response.
+
+    Query Parameters:
+    - widgets (optional): comma-separated subset of summary, cashFlow,
+      revenueByService, outstandingPayments, topCustomers, expensesBreakdown, tasks
+    - filter, startDate, endDate (optional): reporting period, as for /api/agency/reports
+
+    Returns:
+    { "<widget>": <same payload as the matching /api/agency/reports endpoint>, ... }
+    Widgets whose queries failed or timed out hold empty values and are
+    listed in the X-Partial-Results header.
+    """
+    widgets = [w for w in request.args.get('widgets', '').split(',') if w] or list(WIDGETS)
+    unknown = [w for w in widgets if w not in WIDGETS]
+    if unknown:
+        return jsonify({'error': f"Unknown widget(s): {', '.join(unknown)}"}), 400
+
+    try:
+        start_date, end_date = date_range(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date format: {str(e)}'}), 400
+
+    try:
+        data, partial = ReportService.dashboard(g.agency_id, start_date, end_date, widgets)
+        return partial_response(data, partial)
+    except Exception as e:
+        logger.exception("Error building dashboard")
+        return jsonify({'error': str(e)}), 500
@@ -1,84 +1,58 @@
-from flask import Blueprint, request, jsonify, current_app
-from models.notification import Notification
-from models.user import User
-import jwt
+from flask import Blueprint, jsonify
+from app.middleware import token_required, get_current_user
+from app.services.notification_service import NotificationService
 
 notifications_bp = Blueprint('notifications', __name__)
 
-def get_current_user(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header:
-        return None
-    token = auth_header.split(" ")[1]
-    try:
-        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-        return User.objects(id=payload['sub']).first()
-    except:
-        return None
-
 @notifications_bp.route('/', methods=['GET'])
+@token_required
 def get_notifications():
-    user = get_current_user(request)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-
     try:
-        # Get unread first, then recent read
-        notifications = Notification.objects(recipient=user).order_by('isRead', '-createdAt').limit(50)
-        
-        results = []
-        for n in notifications:
-            results.append({
-                'id': str(n.id),
-                'type': n.type,
-                'title': n.title,
-                'message': n.message,
-                'data': n.data,
-                'isRead': n.isRead,
-                'createdAt': n.createdAt.isoformat()
-            })
-            
-        return jsonify(results), 200
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        # Personal notifications and broadcasts: unread first, then recent read
+        return jsonify(NotificationService.list_for_user(user, limit=50)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @notifications_bp.route('/unread-count', methods=['GET'])
+@token_required
 def get_unread_count():
-    user = get_current_user(request)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
     try:
-        count = Notification.objects(recipient=user, isRead=False).count()
-        return jsonify({'count': count}), 200
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        return jsonify({'count': NotificationService.unread_count(user)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @notifications_bp.route('/<id>/read', methods=['POST'])
+@token_required
 def mark_as_read(id):
-    user = get_current_user(request)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-
     try:
-        n = Notification.objects(id=id, recipient=user).first()
-        if n:
-            n.isRead = True
-            n.save()
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        if NotificationService.mark_read(user, id):
             return jsonify({'message': 'Marked as read'}), 200
         return jsonify({'error': 'Notification not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @notifications_bp.route('/read-all', methods=['POST'])
+@token_required
 def mark_all_read():
-    user = get_current_user(request)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
     try:
-        Notification.objects(recipient=user, isRead=False).update(set__isRead=True)
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        NotificationService.mark_all_read(user)
         return jsonify({'message': 'All marked as read'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,10 +1,13 @@
 from flask import Blueprint, request, jsonify, g
 from app.middleware import token_required
-from models.package import Package
+from models.package import Package, SERVICE_TYPES, classify_service
 from app.utils.serializers import mongo_to_dict
 from app.utils.error_handlers import error_response, validation_error, not_found_error
+from app.utils.pagination import paginate, paginated_response
+from app.utils.logger import get_logger
 from bson import ObjectId
-import traceback
+
+logger = get_logger(__name__)
 
 packages_bp = Blueprint('packages', __name__)
 
@@ -17,8 +20,11 @@ def get_packages():
     if search:
         query = query.filter(name__icontains=search)
         
-    packages = query.order_by('-createdAt')
-    return jsonify(mongo_to_dict(packages)), 200
+    try:
+        packages, next_cursor = paginate(query, 'createdAt')
+    except ValueError as e:
+        return validation_error({'cursor': str(e)})
+    return paginated_response(mongo_to_dict(packages), next_cursor)
 
 @packages_bp.route('', methods=['POST'])
 @token_required
@@ -31,6 +37,9 @@ def create_package():
     if not data.get('name'):
         return validation_error({'name': 'Package name is required'})
 
+    if data.get('serviceType') and data['serviceType'] not in SERVICE_TYPES:
+        return validation_error({'serviceType': f"Must be one of: {', '.join(SERVICE_TYPES)}"})
+
     try:
         facility_id = data.get('facilityId')
         facility_id = ObjectId(facility_id) if (facility_id and ObjectId.is_valid(facility_id)) else None
@@ -51,7 +60,8 @@ def create_package():
             sharingPrice=clean_decimal(data.get('sharingPrice')),
             fourBedPrice=clean_decimal(data.get('fourBedPrice')),
             threeBedPrice=clean_decimal(data.get('threeBedPrice')),
-            twoBedPrice=clean_decimal(data.get('twoBedPrice'))
+            twoBedPrice=clean_decimal(data.get('twoBedPrice')),
+            serviceType=data.get('serviceType') or None  # Derived from the name when omitted
         )
         package.save()
         return jsonify(mongo_to_dict(package)), 201
@@ -74,6 +84,8 @@ def update_package(id):
         return not_found_error("Package not found")
         
     data = request.get_json()
+    if data.get('serviceType') and data['serviceType'] not in SERVICE_TYPES:
+        return validation_error({'serviceType': f"Must be one of: {', '.join(SERVICE_TYPES)}"})
     
     try:
         def clean_decimal(val):
@@ -82,7 +94,11 @@ def update_package(id):
             s = str(val).strip()
             return s if s else None
 
-        if 'name' in data: package.name = data['name']
+        if 'name' in data:
+            # A type that was only derived from the old name follows the rename
+            if 'serviceType' not in data and package.serviceType in (None, classify_service(package.name)):
+                package.serviceType = None
+            package.name = data['name']
         if 'facilityId' in data: 
             fid = data['facilityId']
             package.facilityId = ObjectId(fid) if (fid and ObjectId.is_valid(fid)) else None
@@ -95,11 +111,12 @@ def update_package(id):
         if 'fourBedPrice' in data: package.fourBedPrice = clean_decimal(data['fourBedPrice'])
         if 'threeBedPrice' in data: package.threeBedPrice = clean_decimal(data['threeBedPrice'])
         if 'twoBedPrice' in data: package.twoBedPrice = clean_decimal(data['twoBedPrice'])
+        if 'serviceType' in data: package.serviceType = data['serviceType'] or None
         
         package.save()
         return jsonify(mongo_to_dict(package)), 200
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Error updating package")
         return error_response(str(e), "SERVER_ERROR", 500)
 
 @packages_bp.route('/<id>', methods=['DELETE'])
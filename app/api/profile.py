@@ -3,6 +3,7 @@ from app.middleware import token_required
 from models.user import User
 from models.agency import Agency
 from app.utils.serializers import mongo_to_dict
+from app.services.agency_snapshot_service import AgencySnapshotService
 import bcrypt
 
 profile_bp = Blueprint('profile', __name__)
@@ -57,10 +58,15 @@ def update_profile():
                 return jsonify({'error': 'Email already in use'}), 400
         
         # Update user
+        phone_changed = (user.phone or '') != (phone or '')
         user.name = name
         user.email = email
         user.phone = phone
         user.save()
+
+        # The admin's phone is the contact number on the agency's posts and tickets
+        if phone_changed and user.role == 'AgencyAdmin':
+            AgencySnapshotService.propagate(user.agencyId.pk)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -28,7 +28,7 @@ def create_quote():
         agencyId=g.agency_id,
         customerId=data['customerId'],
         visaCaseId=data.get('visaCaseId'),
-        quoteNumber=BookingService.generate_number("QT"),
+        quoteNumber=BookingService.generate_number(g.agency_id, "QT"),
         lineItems=items,
         totalAmount=total,
         status='Draft'
@@ -0,0 +1,33 @@
+from flask import Blueprint, request, jsonify, g
+from app.middleware import token_required
+from app.services.search_service import SearchService, SOURCES
+from app.utils.error_handlers import validation_error
+
+search_bp = Blueprint('search', __name__)
+
+MAX_RESULTS = 50
+
+
+@search_bp.route('', methods=['GET'])
+@token_required
+def search():
+    """
+    Search the agency's customers, bookings, agents and agent profiles.
+
+    Query params:
+        q: search text (names, phone, CNIC, passport, booking number, PNR, slip number)
+        types: optional comma-separated kinds, e.g. customer,booking
+        limit: number of results (default 20, max 50)
+    """
+    kinds = [kind for kind in request.args.get('types', '').split(',') if kind]
+    unknown = [kind for kind in kinds if kind not in SOURCES]
+    if unknown:
+        return validation_error({'types': f"Unknown type(s): {', '.join(unknown)}"})
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), MAX_RESULTS))
+    except ValueError:
+        return validation_error({'limit': 'Must be a number'})
+
+    results = SearchService.search(g.agency_id, request.args.get('q', ''), kinds or None, limit)
+    return jsonify({'results': results}), 200
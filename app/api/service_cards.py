@@ -6,6 +6,9 @@ from models.package import Package
 from models.facility import Facility
 from models.agency import Agency
 from app.utils.serializers import mongo_to_dict
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 service_cards_bp = Blueprint('service_cards', __name__)
 
@@ -57,7 +60,7 @@ def get_service_card(booking_id):
                     'pictureUrl': getattr(customer, 'pictureUrl', None) or getattr(customer, 'customer_photo', None)
                 }
         except Exception as e:
-            print(f"Error fetching customer: {e}")
+            logger.warning("Error fetching customer: %s", e)
         
         # Fetch Package to get facilityId, then fetch Facility for Moaleem
         try:
@@ -74,7 +77,7 @@ def get_service_card(booking_id):
                         if hasattr(moaleem, 'moaleem_contact') and moaleem.moaleem_contact:
                             card_data['moaleem']['contact'] = moaleem.moaleem_contact
         except Exception as e:
-            print(f"Error fetching facility/moaleem: {e}")
+            logger.warning("Error fetching facility/moaleem: %s", e)
         
         # Fetch Agency data
         try:
@@ -82,10 +85,10 @@ def get_service_card(booking_id):
                 agency = booking.agencyId
                 card_data['agency']['name'] = agency.name or 'N/A'
         except Exception as e:
-            print(f"Error fetching agency: {e}")
+            logger.warning("Error fetching agency: %s", e)
         
         return jsonify(card_data), 200
         
     except Exception as e:
-        print(f"Error in get_service_card: {e}")
+        logger.exception("Error in get_service_card")
         return jsonify({'error': str(e)}), 500
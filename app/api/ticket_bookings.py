@@ -3,9 +3,17 @@ from app.middleware import token_required
 from models.ticket_group import TicketGroup
 from models.ticket_booking import TicketBooking, Passenger
 from app.utils.serializers import mongo_to_dict
+from app.utils.batch_loader import load_refs, lookup
+from app.utils.pagination import paginate, paginated_response
+from app.utils.logger import get_logger
+from app.services.agency_snapshot_service import AgencySnapshotService
+from app.services.event_bus import EventBus, agency_channel
+from app.services.marketplace_stats_service import MarketplaceStatsService
 from datetime import datetime
 import uuid
 
+logger = get_logger(__name__)
+
 ticket_bookings_bp = Blueprint('ticket_bookings', __name__)
 
 @ticket_bookings_bp.route('/', methods=['POST'])
@@ -17,23 +25,19 @@ def create_booking():
     """
     try:
         data = request.get_json()
-        print(f"\n{'='*60}")
-        print(f"BOOKING REQUEST RECEIVED")
-        print(f"{'='*60}")
-        print(f"Raw request data: {data}")
         
         group_id = data.get('ticketGroupId') or data.get('group_id')
         seats_requested = int(data.get('totalSeats') or data.get('seats_requested', 0))
         passengers_data = data.get('passengers', [])
         total_price = float(data.get('totalPrice', 0))
 
-        print(f"Parsed values:")
-        print(f"  - group_id: {group_id}")
-        print(f"  - seats_requested: {seats_requested} (type: {type(seats_requested)})")
-        print(f"  - total_price: {total_price}")
-        print(f"  - passengers_count: {len(passengers_data)}")
-        print(f"  - g.agency_id: {g.agency_id}")
-        print(f"{'='*60}\n")
+        logger.debug("Booking request", extra={
+            'group_id': group_id,
+            'seats_requested': seats_requested,
+            'total_price': total_price,
+            'passengers_count': len(passengers_data),
+            'agency_id': g.agency_id
+        })
 
         if not group_id or seats_requested <= 0:
             return jsonify({'error': 'Invalid booking request'}), 400
@@ -66,15 +70,14 @@ def create_booking():
                 'available_seats': exists.available_seats
             }), 409 # Conflict
 
+        MarketplaceStatsService.adjust(active=-seats_requested)
+
         # Success - Seats secured
         # Now create booking record
         try:
             # Create Booking Reference
             ref = f"INV-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
             
-            print(f"DEBUG: Creating booking with agency_id={g.agency_id}, type={type(g.agency_id)}")
-            print(f"DEBUG: seller_agency={ticket_group.agencyId}, type={type(ticket_group.agencyId)}")
-            
             passengers = []
             for p_data in passengers_data:
                 # Handle date parsing safely
@@ -108,6 +111,8 @@ def create_booking():
             booking = TicketBooking(
                 agencyId=buyer_agency,
                 sellerAgencyId=seller_agency,
+                agencySnapshot=AgencySnapshotService.for_agency(buyer_agency.pk),
+                sellerSnapshot=ticket_group.agencySnapshot or AgencySnapshotService.for_agency(seller_agency.pk),
                 ticketGroupId=ticket_group,
                 booking_reference=ref,
                 seats_booked=seats_requested,
@@ -117,6 +122,13 @@ def create_booking():
             )
             booking.save()
 
+            EventBus.publish(
+                [agency_channel(seller_agency.pk), agency_channel(buyer_agency.pk)],
+                'ticket_booking.created',
+                {'bookingId': str(booking.id), 'bookingReference': ref,
+                 'sellerAgencyId': str(seller_agency.pk), 'buyerAgencyId': str(buyer_agency.pk)}
+            )
+
             return jsonify({
                 'message': 'Booking confirmed',
                 'booking_id': str(booking.id),
@@ -128,16 +140,13 @@ def create_booking():
         except Exception as e:
             # ROLLBACK INVENTORY IF BOOKING SAVE FAILS
             TicketGroup.objects(id=group_id).update(inc__available_seats=seats_requested)
-            import traceback
-            traceback.print_exc()
+            MarketplaceStatsService.adjust(active=seats_requested)
             if hasattr(e, 'errors'):
-                print(f"Validation Errors: {e.errors}")
+                logger.warning("Booking validation errors: %s", e.errors, extra={'group_id': group_id})
             raise e
 
     except Exception as e:
-        print(f"Booking Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Booking error")
         
         error_msg = str(e)
         if hasattr(e, 'errors') and e.errors:
@@ -158,19 +167,31 @@ def get_bookings():
         
         if query_type == 'sales':
             # Find bookings where I am the Seller
-            bookings = TicketBooking.objects(sellerAgencyId=g.agency_id).order_by('-created_at')
+            query = TicketBooking.objects(sellerAgencyId=g.agency_id)
         else:
             # Find bookings where I am the Buyer
-            bookings = TicketBooking.objects(agencyId=g.agency_id).order_by('-created_at')
+            query = TicketBooking.objects(agencyId=g.agency_id)
+
+        try:
+            bookings, next_cursor = paginate(query, 'created_at')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
             
         # Serialize
-        results = []
-        for booking in bookings:
-            b_dict = mongo_to_dict(booking)
-            
+        results = mongo_to_dict(bookings)
+        
+        # Resolve groups once for the whole list; counterparties come from the embedded snapshots
+        if query_type == 'sales':
+            counterparty_field, snapshot_field = 'agencyId', 'agencySnapshot'
+        else:
+            counterparty_field, snapshot_field = 'sellerAgencyId', 'sellerSnapshot'
+        groups = load_refs(results, 'ticketGroupId', TicketGroup)
+        AgencySnapshotService.fill_missing(results, counterparty_field, snapshot_field)
+        
+        for b_dict in results:
             # Enrich with Ticket Group details if available
-            if booking.ticketGroupId:
-                tg = booking.ticketGroupId
+            tg = lookup(groups, b_dict.get('ticketGroupId'))
+            if tg:
                 b_dict['ticket_details'] = {
                     'airline': tg.airline,
                     'sector': tg.sector,
@@ -182,24 +203,15 @@ def get_bookings():
                 }
             
             # Enrich with Counterparty Name and Contact
-            if query_type == 'sales':
-                # Show Buyer Name and Contact
-                b_dict['counterparty'] = booking.agencyId.name if booking.agencyId else 'Unknown'
-                if booking.agencyId:
-                    from models.user import User
-                    buyer_admin = User.objects(agencyId=booking.agencyId, role='AgencyAdmin').first()
-                    b_dict['counterparty_phone'] = buyer_admin.phone if buyer_admin and buyer_admin.phone else ''
-            else:
-                # Show Seller Name and Contact
-                b_dict['counterparty'] = booking.sellerAgencyId.name if booking.sellerAgencyId else 'Unknown'
-                if booking.sellerAgencyId:
-                    from models.user import User
-                    seller_admin = User.objects(agencyId=booking.sellerAgencyId, role='AgencyAdmin').first()
-                    b_dict['counterparty_phone'] = seller_admin.phone if seller_admin and seller_admin.phone else ''
-                
-            results.append(b_dict)
+            # (Buyer for sales, Seller for purchases)
+            counterparty = b_dict.get(snapshot_field)
+            b_dict['counterparty'] = counterparty.get('name') if counterparty else 'Unknown'
+            if counterparty:
+                b_dict['counterparty_phone'] = counterparty.get('phone') or ''
+            b_dict.pop('agencySnapshot', None)
+            b_dict.pop('sellerSnapshot', None)
             
-        return jsonify(results), 200
+        return paginated_response(results, next_cursor)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -212,17 +224,11 @@ def get_unread_counts():
         sales_count = TicketBooking.objects(sellerAgencyId=g.agency_id, is_read_by_seller=False).count()
         purchases_count = TicketBooking.objects(agencyId=g.agency_id, is_read_by_buyer=False).count()
         
-        # stats - GLOBAL scope for Marketplace
-        active_tickets = TicketGroup.objects(status='active').sum('available_seats')
-        sold_tickets = TicketBooking.objects(status='confirmed').sum('seats_booked')
-
+        # stats - GLOBAL scope for Marketplace (maintained counters, one document read)
         return jsonify({
             'sales': sales_count,
             'purchases': purchases_count,
-            'stats': {
-                'active_tickets': active_tickets or 0,
-                'sold_tickets': sold_tickets or 0
-            }
+            'stats': MarketplaceStatsService.get()
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -241,6 +247,8 @@ def mark_read():
             TicketBooking.objects(agencyId=g.agency_id, is_read_by_buyer=False).update(set__is_read_by_buyer=True)
         else:
             return jsonify({'error': 'Invalid type'}), 400
+
+        EventBus.publish([agency_channel(g.agency_id)], 'ticket_booking.read', {'type': read_type})
             
         return jsonify({'message': 'Marked as read'}), 200
     except Exception as e:
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify, g
-from app.middleware import token_required
+from app.middleware import token_required, decode_token
 from models.ticket_group import TicketGroup
 from app.utils.serializers import mongo_to_dict
-from datetime import datetime, timedelta
-from mongoengine.queryset.visitor import Q
+from app.services.ticket_search_service import TicketSearchService
+from app.services.agency_snapshot_service import AgencySnapshotService
+from app.services.marketplace_stats_service import MarketplaceStatsService
+from datetime import datetime
 
 ticket_inventory_bp = Blueprint('ticket_inventory', __name__)
 
@@ -19,9 +21,7 @@ def get_ticket_groups():
             
     if token:
         try:
-            import jwt
-            from flask import current_app
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+            data = decode_token(token)
             g.user_id = data['sub']
             g.agency_id = data.get('agencyId')
             g.role = data.get('role')
@@ -36,85 +36,39 @@ def get_ticket_groups():
     try:
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
-        skip = (page - 1) * limit
-        
-        # Filters
-        sector = request.args.get('sector')
-        travel_type = request.args.get('travel_type')
-        airline = request.args.get('airline')
-        date = request.args.get('date')
-        status = request.args.get('status')
-        owned_only = request.args.get('owned_only') == 'true'
         
         # Sorting
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
         
-        query = {}
-        if sector:
-            query['sector__icontains'] = sector
-        if airline:
-            query['airline__icontains'] = airline
-        if travel_type:
-            query['travel_type'] = travel_type
-        if date and date.strip():
-            try:
-                target_date = datetime.strptime(date.strip(), '%Y-%m-%d')
-                query['date__gte'] = target_date
-                query['date__lt'] = target_date + timedelta(days=1)
-            except ValueError:
-                pass 
-        
-        if status:
-            query['status'] = status
-        
-        # Access Control:
-        if owned_only or g.role == 'AgencyAdmin': 
-             pass
-
-        final_query = TicketGroup.objects(**query)
-        
-        if g.role != 'SuperAdmin':
-            today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            # If date filter is applied, we trust the user's filter but ensure it's not in past?
-            # Actually, standard logic:
-            filter_q = Q(status='active', date__gte=today, available_seats__gt=0) | Q(agencyId=g.agency_id)
-            final_query = final_query.filter(filter_q)
-
-        total = final_query.count()
-        
-        # Sorting definition
-        sort_field = sort_by
-        if sort_order == 'desc':
-            sort_field = f'-{sort_by}'
-        
-        # Validate sort field to prevent injection or errors
-        valid_sort_fields = ['created_at', 'price_per_seat', 'date', 'airline', 'sector']
-        if sort_by not in valid_sort_fields:
-            sort_field = '-created_at'
-
-        groups = final_query.order_by(sort_field).skip(skip).limit(limit)
-        
-        # Enrich with agency contact information
-        enriched_groups = []
-        for group in groups:
-            group_dict = mongo_to_dict(group)
-            if group.agencyId:
-                # Get agency admin user for contact info
-                from models.user import User
-                admin_user = User.objects(agencyId=group.agencyId, role='AgencyAdmin').first()
+        match = TicketSearchService.build_match(request.args, g.role, g.agency_id)
+        try:
+            result = TicketSearchService.search(
+                match, sort_by, sort_order == 'desc', page, limit,
+                cursor=request.args.get('cursor')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        groups = mongo_to_dict(result['rows'])
+
+        # Agency contact information comes from the embedded snapshot
+        AgencySnapshotService.fill_missing(groups, 'agencyId', 'agencySnapshot')
+        for group_dict in groups:
+            snapshot = group_dict.pop('agencySnapshot', None)
+            if snapshot:
                 group_dict['agency_contact'] = {
-                    'name': group.agencyId.name,
-                    'phone': admin_user.phone if admin_user and admin_user.phone else ''
+                    'name': snapshot.get('name'),
+                    'phone': snapshot.get('phone') or ''
                 }
-            enriched_groups.append(group_dict)
         
         return jsonify({
-            'ticket_groups': enriched_groups,
-            'total': total,
+            'ticket_groups': groups,
+            'total': result['total'],
+            'facets': result['facets'],
+            'next_cursor': result['next_cursor'],
             'page': page,
-            'limit': limit
+            'limit': result['limit']
         }), 200
         
     except Exception as e:
@@ -147,6 +101,7 @@ def create_ticket_group():
 
         group = TicketGroup(
             agencyId=g.agency_id,
+            agencySnapshot=AgencySnapshotService.for_agency(g.agency_id),
             airline=data.get('airline'),
             sector=data.get('sector'),
             travel_type=data.get('travel_type'),
@@ -169,6 +124,7 @@ def create_ticket_group():
             status='active'
         )
         group.save()
+        MarketplaceStatsService.group_change(None, 0, group.status, group.available_seats)
         
         return jsonify(mongo_to_dict(group)), 201
 
@@ -190,6 +146,7 @@ def update_ticket_group(id):
             return jsonify({'error': 'Unauthorized'}), 403
 
         data = request.get_json()
+        before_status, before_seats = group.status, group.available_seats
         
         if 'airline' in data: group.airline = data['airline']
         if 'sector' in data: group.sector = data['sector']
@@ -225,6 +182,7 @@ def update_ticket_group(id):
                 group.return_date = None
 
         group.save()
+        MarketplaceStatsService.group_change(before_status, before_seats, group.status, group.available_seats)
         return jsonify(mongo_to_dict(group)), 200
 
     except Exception as e:
@@ -247,8 +205,10 @@ def update_status(id):
         if status not in ['active', 'closed']:
             return jsonify({'error': 'Invalid status'}), 400
             
+        before_status = group.status
         group.status = status
         group.save()
+        MarketplaceStatsService.group_change(before_status, group.available_seats, group.status, group.available_seats)
         return jsonify(mongo_to_dict(group)), 200
 
     except Exception as e:
@@ -268,6 +228,7 @@ def delete_ticket_group(id):
             return jsonify({'error': 'Unauthorized'}), 403
 
         group.delete()
+        MarketplaceStatsService.group_change(group.status, group.available_seats, None, 0)
         
         return jsonify({'message': 'Ticket group deleted successfully'}), 200
 
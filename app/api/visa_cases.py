@@ -6,6 +6,10 @@ from app.services.visa_service import VisaService
 visa_cases_bp = Blueprint('visa_cases', __name__)
 
 from app.utils.serializers import mongo_to_dict
+from app.utils.batch_loader import load_refs, lookup
+from app.utils.pagination import paginate, paginated_response
+from app.utils.error_handlers import validation_error
+from models.customer import Customer
 
 @visa_cases_bp.route('', methods=['GET'])
 @token_required
@@ -16,28 +20,20 @@ def get_cases():
     if status:
         query = query.filter(status=status)
         
-    cases = query.order_by('-updatedAt')
+    try:
+        cases, next_cursor = paginate(query, 'updatedAt')
+    except ValueError as e:
+        return validation_error({'cursor': str(e)})
+    results = mongo_to_dict(cases)
     
-    # Manually populate customer names
-    results = []
-    for case in cases:
-        c_dict = mongo_to_dict(case)
-        try:
-            if case.customerId:
-                # Dereference the customer
-                customer = case.customerId
-                c_dict['customerName'] = customer.fullName if hasattr(customer, 'fullName') else 'Unknown'
-                c_dict['customerPhone'] = customer.phone if hasattr(customer, 'phone') else ''
-            else:
-                c_dict['customerName'] = 'Unknown'
-                c_dict['customerPhone'] = ''
-        except Exception as e:
-            print(f"Error dereferencing customer for case {case.id}: {e}")
-            c_dict['customerName'] = 'Unknown'
-            c_dict['customerPhone'] = ''
-        results.append(c_dict)
+    # Populate customer names with a single $in query
+    customers = load_refs(results, 'customerId', Customer, 'fullName', 'phone')
+    for c_dict in results:
+        customer = lookup(customers, c_dict.get('customerId'))
+        c_dict['customerName'] = (customer.fullName or 'Unknown') if customer else 'Unknown'
+        c_dict['customerPhone'] = (customer.phone or '') if customer else ''
         
-    return jsonify(results), 200
+    return paginated_response(results, next_cursor)
 
 @visa_cases_bp.route('', methods=['POST'])
 @token_required
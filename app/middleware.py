@@ -1,36 +1,82 @@
 from functools import wraps
 from flask import request, jsonify, current_app, g
+import os
 import jwt
+from app.utils.auth_cache import ClaimsCache, TTLCache
+from app.utils.logger import get_logger
 
-def token_required(f):
+logger = get_logger(__name__)
+
+# Verified claims by token digest, and user documents by id (short TTL so
+# role/status changes are picked up quickly)
+_claims_cache = ClaimsCache(maxsize=int(os.getenv('AUTH_CACHE_SIZE', '10000')))
+_user_cache = TTLCache(ttl=int(os.getenv('AUTH_USER_CACHE_TTL', '30')))
+
+def decode_token(token):
+    """
+    Verified claims of an HS256 token. Repeat tokens are served from the
+    claims cache until they expire; raises the usual jwt errors otherwise.
+    """
+    secret = current_app.config['SECRET_KEY']
+    key = ClaimsCache.key(secret, token)
+    claims = _claims_cache.get(key)
+    if claims is None:
+        claims = jwt.decode(token, secret, algorithms=["HS256"])
+        _claims_cache.put(key, claims)
+    return claims
+
+def get_current_user():
+    """
+    User document for the authenticated request (token_required must run
+    first). Cached for a few seconds and shared between requests, so treat
+    it as read-only.
+    """
+    user_id = getattr(g, 'user_id', None)
+    if not user_id:
+        return None
+    user = _user_cache.get(user_id)
+    if user is None:
+        from models.user import User
+        user = User.objects(id=user_id).first()
+        if user is None:
+            return None
+        # Resolve the agency now so its status is cached along with the user
+        user.agencyId
+        _user_cache.put(user_id, user)
+    return user
+
+def invalidate_user_cache(user_id=None):
+    """Forget a cached user (or all users, e.g. after an agency status change)"""
+    _user_cache.invalidate(str(user_id) if user_id else None)
+
+def _request_token(allow_query=False):
+    auth_header = request.headers.get('Authorization') or request.headers.get('X-Auth-Token')
+    if auth_header:
+        if auth_header.startswith('Bearer '):
+            return auth_header.split(" ")[1]
+        return auth_header # Allow direct token in X-Auth-Token
+    if allow_query:
+        return request.args.get('access_token')
+    return None
+
+def token_required(f, allow_query=False):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        print(f"DEBUG Headers for {request.path}: {request.headers}", flush=True)
-        
-        auth_header = request.headers.get('Authorization') or request.headers.get('X-Auth-Token')
-        
-        if auth_header:
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(" ")[1]
-            else:
-                token = auth_header # Allow direct token in X-Auth-Token
+        token = _request_token(allow_query)
         
         if not token:
             return jsonify({'message': 'Token is missing!', 'code': 'TOKEN_MISSING'}), 401
             
         try:
-            print(f"Middleware Debug: Decoding token for {request.path}")
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            # print(f"Decoded Data: {data}")
+            data = decode_token(token)
             g.user_id = data['sub']
             g.agency_id = data.get('agencyId')
             g.role = data.get('role')
         except jwt.ExpiredSignatureError:
-            print(f"Token Expired: {token[:10]}...")
+            logger.debug("Token expired", extra={'path': request.path})
             return jsonify({'message': 'Token has expired!', 'code': 'TOKEN_EXPIRED'}), 401
         except jwt.InvalidTokenError as e:
-            print(f"Token Invalid: {e} - Token: {token[:20]}... key: {current_app.config['SECRET_KEY']}")
+            logger.info("Token invalid: %s", e, extra={'path': request.path})
             return jsonify({'message': 'Token is invalid!', 'code': 'TOKEN_INVALID'}), 401
         except Exception as e:
             return jsonify({'message': 'Token processing error', 'code': 'TOKEN_ERROR'}), 401
@@ -39,6 +85,10 @@ def token_required(f):
     
     return decorated
 
+def stream_token_required(f):
+    """token_required that also accepts ?access_token= (EventSource cannot send headers)"""
+    return token_required(f, allow_query=True)
+
 def role_required(roles):
     def decorator(f):
         @wraps(f)
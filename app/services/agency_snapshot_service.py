@@ -0,0 +1,95 @@
+"""
+Agency snapshots
+Posts, ticket groups and ticket bookings embed an AgencySnapshot (name, logo,
+admin phone) when they are written, so the feed and marketplace lists never
+dereference Agency or look up the admin User per row.
+
+Whenever an agency's name/branding or its admin's phone changes, call
+AgencySnapshotService.propagate(agency_id) to rewrite the copies in bulk.
+"""
+from app.utils.batch_loader import ref_id, collect_ids, load_by_ids, load_first_by, lookup
+from models.agency import Agency, AgencySnapshot
+from models.user import User
+
+# collection -> [(reference field, snapshot field)]
+SNAPSHOT_TARGETS = {
+    'posts': [('agency', 'agencySnapshot')],
+    'ticket_groups': [('agencyId', 'agencySnapshot')],
+    'ticket_bookings': [('agencyId', 'agencySnapshot'), ('sellerAgencyId', 'sellerSnapshot')]
+}
+
+
+class AgencySnapshotService:
+    @staticmethod
+    def build(agency, admin=None):
+        """Snapshot of an Agency document and (optionally) its admin User"""
+        if agency is None:
+            return None
+        return AgencySnapshot(
+            name=agency.name,
+            logoUrl=agency.branding.logoUrl if agency.branding else None,
+            phone=admin.phone if admin and admin.phone else ''
+        )
+
+    @staticmethod
+    def for_agency(agency_id):
+        """Current snapshot of one agency (None if it does not exist)"""
+        return AgencySnapshotService.for_agencies([agency_id]).get(ref_id(agency_id))
+
+    @staticmethod
+    def for_agencies(agency_ids):
+        """Current snapshots of many agencies in two queries; returns {ObjectId: AgencySnapshot}"""
+        agencies = load_by_ids(Agency, agency_ids, 'name', 'branding')
+        admins = load_first_by(User, 'agencyId', agencies.keys(), 'phone', role='AgencyAdmin')
+        return {
+            oid: AgencySnapshotService.build(agency, lookup(admins, oid))
+            for oid, agency in agencies.items()
+        }
+
+    @staticmethod
+    def propagate(agency_id):
+        """
+        Rewrite every embedded snapshot of an agency.
+
+        Returns:
+            int: number of documents updated
+        """
+        oid = ref_id(agency_id)
+        snapshot = AgencySnapshotService.for_agency(oid)
+        if snapshot is None:
+            return 0
+
+        db = Agency._get_db()
+        data = snapshot.to_mongo().to_dict()
+        updated = 0
+        for collection, targets in SNAPSHOT_TARGETS.items():
+            for ref_field, snapshot_field in targets:
+                result = db[collection].update_many({ref_field: oid}, {'$set': {snapshot_field: data}})
+                updated += result.modified_count
+        return updated
+
+    @staticmethod
+    def to_dict(snapshot):
+        """Serialized snapshot; accepts an AgencySnapshot or its raw dict"""
+        if snapshot is None:
+            return None
+        if isinstance(snapshot, AgencySnapshot):
+            snapshot = snapshot.to_mongo().to_dict()
+        return {
+            'name': snapshot.get('name'),
+            'logoUrl': snapshot.get('logoUrl'),
+            'phone': snapshot.get('phone') or ''
+        }
+
+    @staticmethod
+    def fill_missing(items, ref_field, snapshot_field):
+        """
+        Give serialized rows written before snapshots existed a snapshot dict,
+        loading all of them in one batch. Rows that have one are untouched.
+        """
+        missing = [item for item in items if not item.get(snapshot_field)]
+        if missing:
+            snapshots = AgencySnapshotService.for_agencies(collect_ids(missing, ref_field))
+            for item in missing:
+                item[snapshot_field] = AgencySnapshotService.to_dict(lookup(snapshots, item.get(ref_field)))
+        return items
@@ -3,38 +3,34 @@ import datetime
 import bcrypt
 from flask import current_app
 from models.user import User
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class AuthService:
     @staticmethod
     def login(email, password):
-        print(f"DEBUG: Attempting login for {email}")
         user = User.objects(email=email).first()
         if not user:
-            print(f"DEBUG: User not found: {email}")
+            logger.info("Login failed: unknown email", extra={'email': email})
             return None, "User not found"
         
-        print(f"DEBUG: User found: {user.id}, Role: {user.role}")
-        print(f"DEBUG: Stored Hash: {user.passwordHash}")
-        print(f"DEBUG: Attempting with: {password}")
-        
         if not bcrypt.checkpw(password.encode('utf-8'), user.passwordHash.encode('utf-8')):
-            print(f"DEBUG: Password mismatch for {email}")
+            logger.info("Login failed: password mismatch", extra={'user_id': str(user.id)})
             return None, "Invalid password"
             
         if not user.isActive:
-            print(f"DEBUG: User inactive: {email}")
+            logger.info("Login failed: user inactive", extra={'user_id': str(user.id)})
             return None, "Account disabled"
 
         # Check Agency Status for non-SuperAdmins
         if user.role != 'SuperAdmin':
             # Ensure agency is loaded
             if not user.agencyId:
-                 print(f"DEBUG: User {email} has no agency assigned")
+                 logger.error("Login failed: no agency assigned", extra={'user_id': str(user.id)})
                  return None, "System error: No agency assigned"
             
             agency = user.agencyId
-            print(f"DEBUG: Agency Status: {agency.status}")
-            
             if agency.status != 'Active':
                 if agency.status == 'Pending':
                      return None, "Your agency registration is pending approval. Please wait for admin approval."
@@ -45,7 +41,7 @@ class AuthService:
                 else:
                      return None, f"Agency status is {agency.status}. Login denied."
 
-        print(f"DEBUG: Login successful for {email}")
+        logger.debug("Login successful", extra={'user_id': str(user.id), 'role': user.role})
         # Generate Tokens
         access_token = AuthService.create_access_token(user)
         refresh_token = AuthService.create_refresh_token(user)
@@ -108,6 +104,7 @@ class AuthService:
     @staticmethod
     def register_agency(data):
         from models.agency import Agency
+        from app.services.platform_metrics_service import PlatformMetricsService
         
         # Check existing user
         if User.objects(email=data.get('email')).first():
@@ -121,6 +118,7 @@ class AuthService:
                 contactInfo={'phone': data.get('mobileNumber')}
             )
             agency.save()
+            PlatformMetricsService.agency_status_change(None, agency.status)
             
             # 2. Create Agency Admin User
             salt = bcrypt.gensalt()
@@ -1,19 +1,17 @@
-from datetime import datetime
-import random
 from models.booking import Booking
 from models.quotation import Quotation
+from app.services.sequence_service import SequenceService
+from app.services.search_service import SearchService
+from app.services.customer_summary_service import CustomerSummaryService
 
 class BookingService:
     @staticmethod
-    def generate_number(prefix="BK"):
+    def generate_number(agency_id, prefix="BK"):
         """
-        Generates a readable ID like BK-20231024-1234
-        In production, rely on a sequence counter in DB to avoid collisions.
-        For MVP, timestamp + random is sufficient.
+        Generates a readable ID like BK-2024-0042 from the agency's
+        atomic counter, so concurrent requests never collide.
         """
-        date_str = datetime.utcnow().strftime("%Y%m%d")
-        rand_suffix = random.randint(1000, 9999)
-        return f"{prefix}-{date_str}-{rand_suffix}"
+        return SequenceService.next_number(agency_id, prefix)
 
     @staticmethod
     def create_booking_from_quote(quote_id, agency_id):
@@ -29,12 +27,14 @@ class BookingService:
             agencyId=quote.agencyId,
             quotationId=quote,
             customerId=quote.customerId,
-            bookingNumber=BookingService.generate_number("BK"),
+            bookingNumber=BookingService.generate_number(quote.agencyId, "BK"),
             totalAmount=quote.totalAmount,
             paidAmount=0,
             status='Confirmed'
         )
         booking.save()
+        CustomerSummaryService.booking_saved(None, booking)
+        SearchService.index(booking)
         
         # Update Quote Status
         quote.status = 'Converted'
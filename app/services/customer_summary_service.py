@@ -0,0 +1,210 @@
+"""
+Customer account summaries
+Customer.summary holds totalSpend, bookingCount and outstandingBalance over
+the customer's non-cancelled bookings, plus lastBookingAt/lastPaymentAt.
+Booking writes apply the change in a booking's contribution, and ledger
+allocations apply their balance deltas, as $inc/$max updates on the
+customer document. Top-customer lists then read an indexed sort and
+customer lists need no per-row booking lookups.
+
+reconcile() recomputes the summaries from bookings and the ledger
+(scripts/reconcile_customer_summaries.py, to be run once on deploy).
+Readers that depend on every customer having a summary call ensure(),
+which backfills an agency's customers that have no summary yet the first
+time this process sees one. Only those customers are written (the update
+is filtered on summary $exists: false), so $inc updates racing with the
+backfill on existing summaries are never overwritten.
+"""
+import threading
+from datetime import datetime
+from pymongo import UpdateOne
+from app.utils.batch_loader import ref_id
+from models.booking import Booking
+from models.customer import Customer
+from models.ledger import LedgerEntry
+
+FIELDS = ('totalSpend', 'bookingCount', 'outstandingBalance')
+
+
+class CustomerSummaryService:
+    _checked = set()  # agencies known to have every summary, this process
+    _lock = threading.Lock()
+
+    @staticmethod
+    def contribution(booking):
+        """What one booking adds to its customer's summary"""
+        if booking is None or booking.status == 'Cancelled':
+            return {'customerId': ref_id(booking._data.get('customerId')) if booking else None,
+                    'totalSpend': 0.0, 'bookingCount': 0, 'outstandingBalance': 0.0}
+        return {
+            'customerId': ref_id(booking._data.get('customerId')),
+            'totalSpend': float(booking.totalAmount or 0),
+            'bookingCount': 1,
+            'outstandingBalance': float(booking.balanceDue or 0)
+        }
+
+    @staticmethod
+    def operation(customer_id, amounts=None, last_booking_at=None, last_payment_at=None):
+        """UpdateOne applying summary deltas (None when there is nothing to change)"""
+        update = {}
+        inc = {f'summary.{field}': value for field, value in (amounts or {}).items() if value}
+        if inc:
+            update['$inc'] = inc
+        latest = {}
+        if last_booking_at:
+            latest['summary.lastBookingAt'] = last_booking_at
+        if last_payment_at:
+            latest['summary.lastPaymentAt'] = last_payment_at
+        if latest:
+            update['$max'] = latest
+        if not customer_id or not update:
+            return None
+        return UpdateOne({'_id': ref_id(customer_id)}, update)
+
+    @staticmethod
+    def write(operations, session=None):
+        operations = [op for op in operations if op is not None]
+        if operations:
+            Customer._get_collection().bulk_write(operations, ordered=False, session=session)
+
+    @staticmethod
+    def booking_saved(before, booking):
+        """
+        Apply a booking write.
+
+        Args:
+            before: contribution() taken before the edit, or None for a new booking
+            booking: the saved Booking
+        """
+        after = CustomerSummaryService.contribution(booking)
+        paid = float(booking.paidAmount or 0) > 0
+        if before is None:
+            operations = [CustomerSummaryService.operation(
+                after['customerId'], {f: after[f] for f in FIELDS},
+                last_booking_at=booking.createdAt,
+                last_payment_at=booking.createdAt if paid else None
+            )]
+        elif before['customerId'] != after['customerId']:
+            operations = [
+                CustomerSummaryService.operation(before['customerId'], {f: -before[f] for f in FIELDS}),
+                CustomerSummaryService.operation(after['customerId'], {f: after[f] for f in FIELDS},
+                                                 last_booking_at=booking.createdAt)
+            ]
+        else:
+            paid_more = after['outstandingBalance'] < before['outstandingBalance'] and paid
+            operations = [CustomerSummaryService.operation(
+                after['customerId'], {f: after[f] - before[f] for f in FIELDS},
+                last_payment_at=datetime.utcnow() if paid_more else None
+            )]
+        CustomerSummaryService.write(operations)
+
+    @staticmethod
+    def payment_operations(deltas, when):
+        """
+        Summary updates for ledger allocations.
+
+        Args:
+            deltas: {booking ObjectId: amount added to paidAmount (negative when reversed)}
+            when: date of the ledger entry
+
+        Returns:
+            list: UpdateOne operations on customers
+        """
+        deltas = {booking: amount for booking, amount in deltas.items() if amount}
+        if not deltas:
+            return []
+        rows = Booking._get_collection().find(
+            {'_id': {'$in': list(deltas)}, 'status': {'$ne': 'Cancelled'}}, {'customerId': 1}
+        )
+        by_customer = {}
+        for row in rows:
+            customer = row.get('customerId')
+            by_customer[customer] = by_customer.get(customer, 0.0) + float(deltas[row['_id']])
+        return [
+            CustomerSummaryService.operation(
+                customer, {'outstandingBalance': -amount},
+                last_payment_at=when if amount > 0 else None
+            )
+            for customer, amount in by_customer.items()
+        ]
+
+    @staticmethod
+    def reconcile(agency_id=None, batch_size=1000, missing_only=False):
+        """
+        Recompute summaries from bookings and the ledger.
+
+        Args:
+            agency_id: limit to one agency (default: all)
+            batch_size: customers per bulk_write
+            missing_only: only write customers that have no summary
+
+        Returns:
+            int: customers written
+        """
+        match = {'status': {'$ne': 'Cancelled'}}
+        customer_match = {}
+        if agency_id:
+            match['agencyId'] = customer_match['agencyId'] = ref_id(agency_id)
+        if missing_only:
+            customer_match['summary'] = {'$exists': False}
+
+        totals = {
+            row['_id']: row for row in Booking._get_collection().aggregate([
+                {'$match': match},
+                {'$group': {
+                    '_id': '$customerId',
+                    'totalSpend': {'$sum': '$totalAmount'},
+                    'bookingCount': {'$sum': 1},
+                    'outstandingBalance': {'$sum': '$balanceDue'},
+                    'lastBookingAt': {'$max': '$createdAt'}
+                }}
+            ])
+        }
+        ledger_match = {'type': 'Credit', 'customerId': {'$ne': None}}
+        if agency_id:
+            ledger_match['agencyId'] = ref_id(agency_id)
+        payments = {
+            row['_id']: row['last'] for row in LedgerEntry._get_collection().aggregate([
+                {'$match': ledger_match},
+                {'$group': {'_id': '$customerId', 'last': {'$max': '$date'}}}
+            ])
+        }
+
+        collection = Customer._get_collection()
+        ops = []
+        written = 0
+        for raw in collection.find(customer_match, {'_id': 1}):
+            row = totals.get(raw['_id'], {})
+            target = {'_id': raw['_id']}
+            if missing_only:
+                target['summary'] = {'$exists': False}
+            ops.append(UpdateOne(target, {'$set': {'summary': {
+                'totalSpend': round(float(row.get('totalSpend') or 0), 2),
+                'bookingCount': row.get('bookingCount', 0),
+                'outstandingBalance': round(float(row.get('outstandingBalance') or 0), 2),
+                'lastBookingAt': row.get('lastBookingAt'),
+                'lastPaymentAt': payments.get(raw['_id'])
+            }}}))
+            if len(ops) >= batch_size:
+                collection.bulk_write(ops, ordered=False)
+                written += len(ops)
+                ops = []
+        if ops:
+            collection.bulk_write(ops, ordered=False)
+            written += len(ops)
+        return written
+
+    @staticmethod
+    def ensure(agency_id):
+        """Backfill an agency's customers that predate the summaries (once per process)"""
+        agency = ref_id(agency_id)
+        with CustomerSummaryService._lock:
+            if agency in CustomerSummaryService._checked:
+                return
+        missing = Customer._get_collection().find_one(
+            {'agencyId': agency, 'summary': {'$exists': False}}, {'_id': 1}
+        )
+        if missing:
+            CustomerSummaryService.reconcile(agency, missing_only=True)
+        with CustomerSummaryService._lock:
+            CustomerSummaryService._checked.add(agency)
@@ -0,0 +1,160 @@
+"""
+Live event bus for SSE clients
+Write paths publish small change events to channels ('agency:<id>',
+'user:<id>', 'role:<role>'). Subscribers in the same process get them
+immediately through an in-memory queue. The event is also appended to the
+capped stream_events collection, which one background thread per process
+tails (tailable await cursor), so clients connected to other gunicorn
+workers see it too.
+
+Connected clients wait on their queue and cost no database queries while
+nothing happens; the tail is a single cursor per process, opened once at
+the end of the collection and kept open. Events published while a dead
+cursor is being reopened are missed, which the next event's counts
+refresh covers.
+"""
+import os
+import queue
+import socket
+import threading
+import time
+from pymongo import CursorType
+from models.stream_event import StreamEvent
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUEUE_SIZE = 100
+TAIL_RETRY_SECONDS = 5
+
+
+def agency_channel(agency_id):
+    return f'agency:{agency_id}'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def role_channel(role):
+    return f'role:{role}'
+
+
+class Subscription:
+    def __init__(self, channels):
+        self.channels = set(channels)
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+
+    def get(self, timeout):
+        """Next event dict, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A stalled client only loses events; counts are re-sent with the next one
+            pass
+
+
+class EventBus:
+    _subscriptions = {}  # channel -> set of Subscription
+    _lock = threading.Lock()
+    _tail_pid = None
+
+    @staticmethod
+    def _origin():
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def subscribe(channels):
+        EventBus._ensure_tail()
+        subscription = Subscription(channels)
+        with EventBus._lock:
+            for channel in subscription.channels:
+                EventBus._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    @staticmethod
+    def unsubscribe(subscription):
+        with EventBus._lock:
+            for channel in subscription.channels:
+                subscribers = EventBus._subscriptions.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del EventBus._subscriptions[channel]
+
+    @staticmethod
+    def _fan_out(event):
+        with EventBus._lock:
+            targets = set()
+            for channel in event['channels']:
+                targets |= EventBus._subscriptions.get(channel, set())
+        for subscription in targets:
+            subscription.put(event)
+
+    @staticmethod
+    def publish(channels, type, data=None):
+        """
+        Announce a change. Never raises: a failed publish must not fail the
+        write that triggered it.
+        """
+        event = {'channels': list(channels), 'type': type, 'data': data or {}}
+        try:
+            EventBus._fan_out(event)
+            StreamEvent(origin=EventBus._origin(), **event).save()
+        except Exception:
+            logger.exception("Failed to publish stream event", extra={'type': type})
+
+    @staticmethod
+    def _ensure_tail():
+        # One tailing thread per process (restarted in forked workers)
+        with EventBus._lock:
+            if EventBus._tail_pid == os.getpid():
+                return
+            EventBus._tail_pid = os.getpid()
+        threading.Thread(target=EventBus._tail_forever, name='event-bus-tail', daemon=True).start()
+
+    @staticmethod
+    def _open_tail(collection):
+        """
+        Tailable cursor positioned at the current end of the capped
+        collection, without an _id filter (tailable queries cannot use an
+        index, and ObjectIds from different hosts are not ordered).
+
+        Returns:
+            tuple: (cursor, whether its first document predates the tail)
+        """
+        existing = collection.estimated_document_count()
+        # Land on the newest existing document: a tailable query that
+        # returns nothing at all comes back as a dead cursor
+        cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT, skip=max(existing - 1, 0))
+        return cursor, existing > 0
+
+    @staticmethod
+    def _tail_forever():
+        origin = EventBus._origin()
+        while True:
+            try:
+                cursor, skip_first = EventBus._open_tail(StreamEvent._get_collection())
+                # One cursor for the life of the process; it is only reopened
+                # (at the end again) if the server kills it
+                while cursor.alive:
+                    for raw in cursor:
+                        if skip_first:
+                            skip_first = False
+                            continue
+                        if raw.get('origin') != origin:
+                            EventBus._fan_out({
+                                'channels': raw.get('channels', []),
+                                'type': raw.get('type'),
+                                'data': raw.get('data', {})
+                            })
+            except Exception:
+                logger.warning("Stream event tail interrupted, retrying", exc_info=True)
+            # Reached when the collection was still empty or the cursor died
+            time.sleep(TAIL_RETRY_SECONDS)
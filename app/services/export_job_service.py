@@ -0,0 +1,238 @@
+"""
+Background export jobs
+Heavy renders (reportlab PDFs, large spreadsheets) run in a small thread pool
+instead of inside the web request. The export_jobs collection is the broker:
+any worker in any process claims the oldest queued job atomically, so jobs
+survive restarts and are shared between gunicorn workers. Besides the wake-up
+from enqueue(), a poller thread per process (started by create_app()) picks
+up jobs left Queued or abandoned Running by a restart and runs the cleanup.
+Artifacts are written to EXPORT_DIR and removed once the job expires.
+
+Environment:
+- EXPORT_DIR: where artifacts are written. Any process may render a job and
+  any may serve its download, so with more than one host this must be shared
+  storage (e.g. a network volume) mounted at the same path everywhere
+- EXPORT_WORKERS: render threads per process (default 2)
+- EXPORT_TTL_HOURS: how long finished jobs and artifacts are kept (default 24)
+- EXPORT_POLL_SECONDS: how often the poller looks for leftover jobs (default 60)
+"""
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from app.services.export_service import ExportService, BOOKING_HEADERS, LEDGER_HEADERS
+from app.utils.logger import get_logger
+from models.export_job import ExportJob
+
+logger = get_logger(__name__)
+
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'travel_exports'))
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))
+EXPORT_TTL_HOURS = int(os.getenv('EXPORT_TTL_HOURS', '24'))
+EXPORT_POLL_SECONDS = float(os.getenv('EXPORT_POLL_SECONDS', '60'))
+
+# A Running job whose worker died is handed out again after this long
+STALE_AFTER = timedelta(minutes=30)
+MAX_ATTEMPTS = 3
+CLEANUP_INTERVAL = timedelta(minutes=10)
+
+EXTENSIONS = {'pdf': 'pdf', 'csv': 'csv', 'excel': 'xlsx'}
+MIMETYPES = {
+    'pdf': 'application/pdf',
+    'csv': 'text/csv',
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+
+class ExportJobService:
+    _executor = None
+    _lock = threading.Lock()
+    _last_cleanup = None
+    _poller_pid = None
+
+    @staticmethod
+    def _pool():
+        # Created lazily so each forked gunicorn worker gets its own threads
+        with ExportJobService._lock:
+            if ExportJobService._executor is None:
+                ExportJobService._executor = ThreadPoolExecutor(
+                    max_workers=EXPORT_WORKERS, thread_name_prefix='export-job'
+                )
+            return ExportJobService._executor
+
+    @staticmethod
+    def start():
+        """Start this process's poller (threads do not survive fork, so once per process)"""
+        with ExportJobService._lock:
+            if ExportJobService._poller_pid == os.getpid():
+                return
+            ExportJobService._poller_pid = os.getpid()
+        threading.Thread(target=ExportJobService._poll_forever, name='export-job-poller', daemon=True).start()
+
+    @staticmethod
+    def _poll_forever():
+        while True:
+            time.sleep(EXPORT_POLL_SECONDS)
+            try:
+                ExportJobService._pool().submit(ExportJobService.run_pending)
+                ExportJobService.cleanup_if_due()
+            except Exception:
+                logger.exception("Export job poll failed")
+
+    @staticmethod
+    def enqueue(agency_id, user_id, kind, fmt='pdf'):
+        """Record a queued job and wake a worker; returns the ExportJob"""
+        job = ExportJob(
+            agencyId=agency_id,
+            requestedBy=user_id,
+            kind=kind,
+            format=fmt,
+            fileName=f"{kind}_{datetime.now().strftime('%Y%m%d')}.{EXTENSIONS[fmt]}"
+        )
+        job.save()
+        ExportJobService._pool().submit(ExportJobService.run_pending)
+        ExportJobService.cleanup_if_due()
+        return job
+
+    @staticmethod
+    def claim():
+        """Atomically take the oldest queued (or abandoned) job; returns its id or None"""
+        now = datetime.utcnow()
+        raw = ExportJob._get_collection().find_one_and_update(
+            {
+                'attempts': {'$lt': MAX_ATTEMPTS},
+                '$or': [
+                    {'status': 'Queued'},
+                    {'status': 'Running', 'startedAt': {'$lt': now - STALE_AFTER}}
+                ]
+            },
+            {
+                '$set': {'status': 'Running', 'startedAt': now, 'workerId': f"{socket.gethostname()}:{os.getpid()}"},
+                '$inc': {'attempts': 1}
+            },
+            sort=[('createdAt', 1)],
+            projection={'_id': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return raw['_id'] if raw else None
+
+    @staticmethod
+    def run_pending():
+        """Worker loop: render jobs until the queue is empty"""
+        while True:
+            job_id = ExportJobService.claim()
+            if not job_id:
+                return
+            job = ExportJob.objects(id=job_id).first()
+            if job:
+                ExportJobService.run(job)
+
+    @staticmethod
+    def run(job):
+        """Render one claimed job to disk and record the outcome"""
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        path = os.path.join(EXPORT_DIR, f"{job.id}.{EXTENSIONS[job.format]}")
+        expires = datetime.utcnow() + timedelta(hours=EXPORT_TTL_HOURS)
+        try:
+            row_count = ExportJobService.render(job, path)
+            job.update(set__status='Completed', set__filePath=path, set__rowCount=row_count,
+                       set__finishedAt=datetime.utcnow(), set__expiresAt=expires, unset__error=True)
+        except Exception as e:
+            for leftover in (path, path + '.part'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            job.update(set__status='Failed', set__error=str(e),
+                       set__finishedAt=datetime.utcnow(), set__expiresAt=expires)
+
+    @staticmethod
+    def render(job, path):
+        """Write the artifact for a job; returns the number of rows written"""
+        agency_id = job._data.get('agencyId')
+        if job.kind == 'bookings':
+            headers, rows = BOOKING_HEADERS, ExportService.booking_rows(agency_id)
+        else:
+            headers, rows = LEDGER_HEADERS, ExportService.ledger_rows(agency_id)
+
+        counted = {'rows': 0}
+        def counting(rows):
+            for row in rows:
+                counted['rows'] += 1
+                yield row
+
+        tmp_path = path + '.part'
+        if job.format == 'csv':
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as output:
+                for chunk in ExportService.csv_chunks(headers, counting(rows)):
+                    output.write(chunk)
+        else:
+            with open(tmp_path, 'wb') as output:
+                if job.format == 'excel':
+                    ExportService.write_excel(headers, counting(rows), output, job.kind.title())
+                elif job.kind == 'bookings':
+                    ExportService.write_bookings_pdf(counting(rows), output)
+                else:
+                    ExportService.write_ledger_pdf(counting(rows), output)
+        os.replace(tmp_path, path)
+        return counted['rows']
+
+    @staticmethod
+    def to_dict(job):
+        """Client view of a job (never exposes the on-disk path)"""
+        data = {
+            'id': str(job.id),
+            'kind': job.kind,
+            'format': job.format,
+            'status': job.status,
+            'fileName': job.fileName,
+            'rowCount': job.rowCount,
+            'error': job.error,
+            'createdAt': job.createdAt.isoformat() if job.createdAt else None,
+            'finishedAt': job.finishedAt.isoformat() if job.finishedAt else None,
+            'expiresAt': job.expiresAt.isoformat() if job.expiresAt else None,
+            'statusUrl': f"/api/exports/{job.id}"
+        }
+        if job.status == 'Completed':
+            data['downloadUrl'] = f"/api/exports/{job.id}/download"
+        return data
+
+    @staticmethod
+    def cleanup_if_due():
+        now = datetime.utcnow()
+        with ExportJobService._lock:
+            if ExportJobService._last_cleanup and now - ExportJobService._last_cleanup < CLEANUP_INTERVAL:
+                return
+            ExportJobService._last_cleanup = now
+        ExportJobService._pool().submit(ExportJobService.cleanup)
+
+    @staticmethod
+    def cleanup():
+        """
+        Fail jobs that used up their attempts, delete expired jobs and their
+        artifacts, then any file in EXPORT_DIR older than the TTL (e.g. left
+        behind after the TTL index removed its job).
+        """
+        now = datetime.utcnow()
+        ExportJob.objects(status='Running', attempts__gte=MAX_ATTEMPTS, startedAt__lt=now - STALE_AFTER).update(
+            set__status='Failed', set__error='Export worker stopped responding',
+            set__finishedAt=now, set__expiresAt=now + timedelta(hours=EXPORT_TTL_HOURS)
+        )
+
+        for job in ExportJob.objects(expiresAt__lte=now).only('filePath'):
+            if job.filePath and os.path.exists(job.filePath):
+                os.remove(job.filePath)
+            job.delete()
+
+        if not os.path.isdir(EXPORT_DIR):
+            return
+        cutoff = time.time() - EXPORT_TTL_HOURS * 3600
+        for name in os.listdir(EXPORT_DIR):
+            path = os.path.join(EXPORT_DIR, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                continue
@@ -0,0 +1,261 @@
+"""
+Streaming exports
+Rows are read from the cursor in batches, references are resolved once per
+batch, and output is written incrementally: CSV is streamed to the client
+as it is produced and Excel uses openpyxl's write-only mode, so memory stays
+flat no matter how many rows an agency has.
+"""
+import csv
+import io
+import tempfile
+from itertools import islice
+from flask import Response, send_file, stream_with_context
+from app.utils.batch_loader import load_refs, lookup
+
+BATCH_SIZE = 1000
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+BOOKING_HEADERS = [
+    'Booking Number', 'Category', 'Status', 'Booking Date', 'Base Amount', 'Discount',
+    'Total Amount', 'Paid Amount', 'Balance Due', 'PNR', 'Supplier Ref',
+    'Customer Name', 'Phone', 'CNIC', 'Passport Number', 'Finger Print', 'Enrollment ID',
+    'Gender', 'Address',
+    'Package Name', 'Package Duration', 'Start Date', 'End Date', 'Description'
+]
+
+LEDGER_HEADERS = ['Date', 'Type', 'Description', 'Amount', 'Customer', 'Booking']
+
+
+def _amount(value):
+    # Raw values are doubles (DecimalField) or Decimal128
+    return float(str(value)) if value else 0
+
+
+def _day(value):
+    return value.strftime('%Y-%m-%d') if value else ''
+
+
+class ExportService:
+    @staticmethod
+    def batches(queryset, size=BATCH_SIZE):
+        """Yield lists of raw documents, reading the cursor `size` at a time"""
+        cursor = iter(queryset.as_pymongo().batch_size(size))
+        while True:
+            batch = list(islice(cursor, size))
+            if not batch:
+                return
+            yield batch
+
+    # ------------------------------------------------------------------
+    # Row builders
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def booking_row(raw, customers, packages):
+        """One export row (in BOOKING_HEADERS order) from a raw booking document"""
+        cust = lookup(customers, raw.get('customerId'))
+        pkg = lookup(packages, raw.get('packageId'))
+
+        row = [
+            raw.get('bookingNumber'),
+            raw.get('category'),
+            raw.get('status'),
+            _day(raw.get('createdAt')),
+            _amount(raw.get('baseAmount')),
+            _amount(raw.get('discount')),
+            _amount(raw.get('totalAmount')),
+            _amount(raw.get('paidAmount')),
+            _amount(raw.get('balanceDue')),
+            raw.get('pnr') or '',
+            raw.get('supplierRef') or ''
+        ]
+
+        if cust:
+            row += [cust.fullName, cust.phone, cust.cnic, cust.passportNumber,
+                    cust.finger_print, cust.enrollment_id, cust.gender, cust.address]
+        else:
+            row += ['Unknown', '', '', '', 'No', '', '', '']
+
+        if pkg:
+            row += [pkg.name, pkg.duration, _day(pkg.startDate), _day(pkg.endDate), pkg.description]
+        else:
+            row += ['Direct Booking', '', '', '', '']
+        return row
+
+    @staticmethod
+    def booking_rows(agency_id, size=BATCH_SIZE):
+        """All of an agency's bookings as export rows, newest first"""
+        from models.booking import Booking
+        from models.customer import Customer
+        from models.package import Package
+
+        query = Booking.objects(agencyId=agency_id).order_by('-createdAt')
+        for batch in ExportService.batches(query, size):
+            customers = load_refs(batch, 'customerId', Customer,
+                                  'fullName', 'phone', 'cnic', 'passportNumber', 'finger_print',
+                                  'enrollment_id', 'gender', 'address', agencyId=agency_id)
+            packages = load_refs(batch, 'packageId', Package,
+                                 'name', 'duration', 'startDate', 'endDate', 'description',
+                                 agencyId=agency_id)
+            for raw in batch:
+                yield ExportService.booking_row(raw, customers, packages)
+
+    @staticmethod
+    def ledger_row(raw, customers, bookings):
+        """One export row (in LEDGER_HEADERS order) from a raw ledger entry"""
+        cust = lookup(customers, raw.get('customerId'))
+        booking = lookup(bookings, raw.get('bookingId'))
+        return [
+            _day(raw.get('date')),
+            raw.get('type'),
+            raw.get('description'),
+            _amount(raw.get('amount')),
+            cust.fullName if cust else '-',
+            booking.bookingNumber if booking else '-'
+        ]
+
+    @staticmethod
+    def ledger_rows(agency_id, size=BATCH_SIZE):
+        """All of an agency's ledger entries as export rows, newest first"""
+        from models.ledger import LedgerEntry
+        from models.customer import Customer
+        from models.booking import Booking
+
+        query = LedgerEntry.objects(agencyId=agency_id).order_by('-date')
+        for batch in ExportService.batches(query, size):
+            customers = load_refs(batch, 'customerId', Customer, 'fullName', agencyId=agency_id)
+            bookings = load_refs(batch, 'bookingId', Booking, 'bookingNumber', agencyId=agency_id)
+            for raw in batch:
+                yield ExportService.ledger_row(raw, customers, bookings)
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def csv_chunks(headers, rows, chunk_rows=500):
+        """Encode rows as CSV, yielding a chunk of text every `chunk_rows` rows"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        pending = 0
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= chunk_rows:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue()
+
+    @staticmethod
+    def write_excel(headers, rows, output, title='Sheet'):
+        """
+        Write rows to `output` with openpyxl's write-only workbook.
+        Column widths are fixed from the headers since rows are not kept around.
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Alignment
+        from openpyxl.utils import get_column_letter
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title)
+        for index, header in enumerate(headers, start=1):
+            ws.column_dimensions[get_column_letter(index)].width = min(max(len(header) + 4, 14), 50)
+
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+            cell.alignment = Alignment(horizontal="center")
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        for row in rows:
+            ws.append(row)
+        wb.save(output)
+
+    @staticmethod
+    def write_bookings_pdf(rows, output):
+        """Bookings report table (landscape). Slow for big agencies: run it as an export job."""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import inch
+
+        doc = SimpleDocTemplate(output, pagesize=landscape(letter))
+        styles = getSampleStyleSheet()
+        elements = [Paragraph("<b>Bookings Report</b>", styles['Title']), Spacer(1, 0.3*inch)]
+
+        table_data = [list(BOOKING_HEADERS)] + [list(row) for row in rows]
+        if len(table_data) > 1:
+            table = Table(table_data)
+            table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4F81BD')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ]))
+            elements.append(table)
+
+        doc.build(elements)
+        return len(table_data) - 1
+
+    @staticmethod
+    def write_ledger_pdf(rows, output):
+        """Ledger table with customer and booking number merged into one column"""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+        doc = SimpleDocTemplate(output, pagesize=letter)
+        table_data = [['Date', 'Type', 'Description', 'Amount', 'Customer (Book#)']]
+        for date, entry_type, description, amount, customer, booking in rows:
+            description = description or ''
+            desc = description[:25] + '...' if len(description) > 25 else description
+            if booking != '-':
+                customer += f" ({booking})"
+            table_data.append([date, entry_type, desc, str(amount), customer])
+
+        t = Table(table_data)
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        doc.build([t])
+        return len(table_data) - 1
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def csv_response(headers, rows, filename):
+        """Stream a CSV download; the first bytes go out before the query finishes"""
+        return Response(
+            stream_with_context(ExportService.csv_chunks(headers, rows)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+
+    @staticmethod
+    def excel_response(headers, rows, filename, title='Sheet'):
+        """Build the workbook in a temp file and send it in chunks from disk"""
+        output = tempfile.TemporaryFile()
+        ExportService.write_excel(headers, rows, output, title)
+        output.seek(0)
+        return send_file(output, mimetype=EXCEL_MIMETYPE, as_attachment=True, download_name=filename)
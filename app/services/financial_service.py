@@ -6,96 +6,145 @@ from models.ledger import LedgerEntry
 from models.agent import Agent
 from models.miscellaneous_expense import MiscellaneousExpense
 from bson import ObjectId
+from app.services.query_executor import QueryExecutor, query_options
 
 
 class FinancialService:
     @staticmethod
-    def calculate_total_debit(agency_id, start_date=None, end_date=None):
+    def _date_match(agency_field, agency_id, date_field, start_date=None, end_date=None):
+        """Build the $match stage shared by all financial aggregations"""
+        match = {agency_field: agency_id}
+        date_range = {}
+        if start_date:
+            date_range['$gte'] = start_date
+        if end_date:
+            date_range['$lte'] = end_date
+        if date_range:
+            match[date_field] = date_range
+        return match
+
+    @staticmethod
+    def _sum(document, match, amount_field, group_by=None):
+        """
+        Run a single $group on the database and return {group_key: total}.
+        Amounts are stored as doubles (DecimalField precision=2), so the
+        totals are rounded back to 2 places like the Decimal values are.
+        """
+        pipeline = [
+            {'$match': match},
+            {'$group': {'_id': group_by, 'total': {'$sum': amount_field}}}
+        ]
+        return {
+            row['_id']: round(float(row['total'] or 0), 2)
+            for row in document.objects.aggregate(*pipeline, **query_options())
+        }
+
+    @staticmethod
+    def ledger_totals(agency_id, start_date=None, end_date=None):
+        """
+        Sum ledger entries per type in one aggregation.
+
+        Returns:
+            dict: {'Credit': float, 'Debit': float}
+        """
+        if isinstance(agency_id, str):
+            agency_id = ObjectId(agency_id)
+
+        match = FinancialService._date_match('agencyId', agency_id, 'date', start_date, end_date)
+        totals = FinancialService._sum(LedgerEntry, match, '$amount', group_by='$type')
+        return {
+            'Credit': totals.get('Credit', 0.0),
+            'Debit': totals.get('Debit', 0.0)
+        }
+
+    @staticmethod
+    def calculate_total_debit(agency_id, start_date=None, end_date=None, ledger_debit=None):
         """
         Calculate total debit from multiple sources:
         1. Ledger entries with type='Debit'
         2. Agent payments
         3. Miscellaneous expenses
-        
+
+        Each source is summed by a $group on the database; no documents
+        are pulled into Python, and the sums run concurrently.
+
         Args:
             agency_id: Agency ObjectId or string
             start_date: Optional datetime filter
             end_date: Optional datetime filter
-            
+            ledger_debit: Optional pre-computed ledger debit (from ledger_totals)
+
         Returns:
             dict with breakdown: {
                 'ledger_debit': float,
                 'agent_payments': float,
                 'misc_expenses': float,
-                'total_debit': float
+                'total_debit': float,
+                'ledger_credit': float  # only when ledger_debit was not given
             }
         """
         # Ensure ObjectId
         if isinstance(agency_id, str):
             agency_id = ObjectId(agency_id)
-        
+
+        # The sources are independent; read them concurrently
+        period = (agency_id, start_date, end_date)
+        queries = {
+            'agent_payments': (FinancialService.agent_payments, *period),
+            'misc_expenses': (FinancialService.misc_expenses, *period)
+        }
+        if ledger_debit is None:
+            queries['ledger'] = (FinancialService.ledger_totals, *period)
+        results, _ = QueryExecutor.run(queries)
+
         # 1. Ledger debits
-        ledger_filters = {'agencyId': agency_id, 'type': 'Debit'}
-        if start_date:
-            ledger_filters['date__gte'] = start_date
-        if end_date:
-            ledger_filters['date__lte'] = end_date
-            
-        debit_entries = LedgerEntry.objects(**ledger_filters)
-        ledger_debit = sum(float(entry.amount) for entry in debit_entries)
-        
-        # 2. Agent payments
-        agent_filters = {'created_by_agency': agency_id}
-        if start_date:
-            agent_filters['created_at__gte'] = start_date
-        if end_date:
-            agent_filters['created_at__lte'] = end_date
-            
-        agents = Agent.objects(**agent_filters)
-        agent_payments = sum(float(agent.amount_paid or 0) for agent in agents)
-        
-        # 3. Miscellaneous expenses
-        misc_filters = {'agencyId': agency_id}
-        if start_date:
-            misc_filters['expense_date__gte'] = start_date
-        if end_date:
-            misc_filters['expense_date__lte'] = end_date
-            
-        misc_expenses = MiscellaneousExpense.objects(**misc_filters)
-        misc_debit = sum(float(expense.amount) for expense in misc_expenses)
-        
+        if ledger_debit is None:
+            ledger_debit = results['ledger']['Debit']
+
+        # 2. Agent payments, 3. Miscellaneous expenses
+        agent_payments = results['agent_payments']
+        misc_debit = results['misc_expenses']
+
         # Total
-        total_debit = ledger_debit + agent_payments + misc_debit
-        
-        return {
+        total_debit = round(ledger_debit + agent_payments + misc_debit, 2)
+
+        breakdown = {
             'ledger_debit': ledger_debit,
             'agent_payments': agent_payments,
             'misc_expenses': misc_debit,
             'total_debit': total_debit
         }
-    
+        if 'ledger' in results:
+            breakdown['ledger_credit'] = results['ledger']['Credit']
+        return breakdown
+
+    @staticmethod
+    def agent_payments(agency_id, start_date=None, end_date=None):
+        """Sum of Agent.amount_paid"""
+        match = FinancialService._date_match(
+            'created_by_agency', agency_id, 'created_at', start_date, end_date
+        )
+        return FinancialService._sum(Agent, match, '$amount_paid').get(None, 0.0)
+
+    @staticmethod
+    def misc_expenses(agency_id, start_date=None, end_date=None):
+        """Sum of MiscellaneousExpense.amount"""
+        match = FinancialService._date_match(
+            'agencyId', agency_id, 'expense_date', start_date, end_date
+        )
+        return FinancialService._sum(MiscellaneousExpense, match, '$amount').get(None, 0.0)
+
     @staticmethod
     def calculate_total_credit(agency_id, start_date=None, end_date=None):
         """
         Calculate total credit from ledger entries
-        
+
         Args:
             agency_id: Agency ObjectId or string
             start_date: Optional datetime filter
             end_date: Optional datetime filter
-            
+
         Returns:
             float: Total credit amount
         """
-        # Ensure ObjectId
-        if isinstance(agency_id, str):
-            agency_id = ObjectId(agency_id)
-        
-        filters = {'agencyId': agency_id, 'type': 'Credit'}
-        if start_date:
-            filters['date__gte'] = start_date
-        if end_date:
-            filters['date__lte'] = end_date
-            
-        credit_entries = LedgerEntry.objects(**filters)
-        return sum(float(entry.amount) for entry in credit_entries)
+        return FinancialService.ledger_totals(agency_id, start_date, end_date)['Credit']
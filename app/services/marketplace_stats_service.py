@@ -0,0 +1,108 @@
+"""
+Marketplace-wide ticket counters
+Every write that changes the seats open for sale on active groups, or the
+seats sold on confirmed bookings, applies the same delta to the single
+marketplace_stats document with $inc. Reads are one document fetch.
+
+Writes that race with a non-atomic group edit can leave the counters
+slightly off, so reconcile() recomputes them from the raw collections. It
+runs in the background at most every MARKETPLACE_STATS_RECONCILE_MINUTES
+per process, and from scripts/reconcile_marketplace_stats.py.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from models.marketplace_stats import MarketplaceStats
+from models.ticket_group import TicketGroup
+from models.ticket_booking import TicketBooking
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATS_KEY = 'global'
+RECONCILE_INTERVAL = timedelta(minutes=int(os.getenv('MARKETPLACE_STATS_RECONCILE_MINUTES', '60')))
+
+
+class MarketplaceStatsService:
+    _lock = threading.Lock()
+    _last_reconcile = None
+
+    @staticmethod
+    def adjust(active=0, sold=0):
+        """Atomically apply seat deltas (never raises; drift is reconciled later)"""
+        if not active and not sold:
+            return
+        try:
+            MarketplaceStats._get_collection().update_one(
+                {'_id': STATS_KEY},
+                {'$inc': {'activeTickets': int(active), 'soldTickets': int(sold)},
+                 '$set': {'updatedAt': datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception:
+            logger.exception("Failed to update marketplace stats")
+
+    @staticmethod
+    def group_change(before_status, before_seats, after_status, after_seats):
+        """Apply the change in seats offered by one ticket group"""
+        before = before_seats if before_status == 'active' else 0
+        after = after_seats if after_status == 'active' else 0
+        MarketplaceStatsService.adjust(active=(after or 0) - (before or 0))
+
+    @staticmethod
+    def compute():
+        """Totals straight from the raw collections (full scans)"""
+        def total(document, match, field):
+            rows = list(document.objects(**match).aggregate(
+                {'$group': {'_id': None, 'total': {'$sum': f'${field}'}}}
+            ))
+            return int(rows[0]['total']) if rows else 0
+
+        return {
+            'activeTickets': total(TicketGroup, {'status': 'active'}, 'available_seats'),
+            'soldTickets': total(TicketBooking, {'status': 'confirmed'}, 'seats_booked')
+        }
+
+    @staticmethod
+    def reconcile():
+        """Overwrite the counters with freshly computed totals; returns them"""
+        totals = MarketplaceStatsService.compute()
+        now = datetime.utcnow()
+        MarketplaceStats._get_collection().update_one(
+            {'_id': STATS_KEY},
+            {'$set': dict(totals, updatedAt=now, reconciledAt=now)},
+            upsert=True
+        )
+        return totals
+
+    @staticmethod
+    def reconcile_if_due():
+        now = datetime.utcnow()
+        with MarketplaceStatsService._lock:
+            last = MarketplaceStatsService._last_reconcile
+            if last and now - last < RECONCILE_INTERVAL:
+                return
+            MarketplaceStatsService._last_reconcile = now
+
+        def run():
+            try:
+                MarketplaceStatsService.reconcile()
+            except Exception:
+                logger.exception("Marketplace stats reconciliation failed")
+        threading.Thread(target=run, name='marketplace-stats-reconcile', daemon=True).start()
+
+    @staticmethod
+    def get():
+        """Current totals: {'active_tickets': int, 'sold_tickets': int}"""
+        raw = MarketplaceStats._get_collection().find_one({'_id': STATS_KEY})
+        if raw is None or not raw.get('reconciledAt'):
+            # Never computed: deltas alone are not a total yet
+            totals = MarketplaceStatsService.reconcile()
+        else:
+            totals = raw
+            if datetime.utcnow() - raw['reconciledAt'] > RECONCILE_INTERVAL:
+                MarketplaceStatsService.reconcile_if_due()
+        return {
+            'active_tickets': max(0, totals.get('activeTickets') or 0),
+            'sold_tickets': max(0, totals.get('soldTickets') or 0)
+        }
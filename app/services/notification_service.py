@@ -1,7 +1,15 @@
-import os
-import requests
+from datetime import datetime
 from models.notification import Notification
-from models.user import User
+from models.broadcast import Broadcast, BroadcastReadState
+from app.services.outbox_service import OutboxService
+from app.services.event_bus import EventBus, user_channel, role_channel
+from app.utils.batch_loader import ref_id
+from app.utils.transactions import insert_together
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+AGENCY_ROLES = ['AgencyOwner', 'AgencyAdmin', 'Agent']
 
 class NotificationService:
     @staticmethod
@@ -16,64 +24,146 @@ class NotificationService:
                 data=data or {}
             )
             notification.save()
+            EventBus.publish([user_channel(ref_id(user))], 'notification.created',
+                             {'id': str(notification.id), 'type': type, 'title': title})
             return notification
-        except Exception as e:
-            print(f"Error creating notification: {e}")
+        except Exception:
+            logger.exception("Error creating notification")
             return None
 
+    @staticmethod
+    def broadcast_documents(type, title, message, data=None, exclude_user_id=None):
+        """
+        Unsaved documents for a broadcast to all Agency users: the Broadcast
+        and, when n8n is configured, its outbox event. Write them with
+        insert_together() alongside the change that caused them.
+        """
+        broadcast = Broadcast(
+            type=type,
+            title=title,
+            message=message,
+            data=data or {},
+            audienceRoles=AGENCY_ROLES,
+            excludeUser=exclude_user_id
+        )
+        event = NotificationService.n8n_event(type, data)
+        return [broadcast, event] if event else [broadcast]
+
+    @staticmethod
+    def announce(broadcast):
+        """Push a saved broadcast to the live clients of its audience"""
+        EventBus.publish([role_channel(role) for role in broadcast.audienceRoles], 'notification.created',
+                         {'id': str(broadcast.id), 'type': broadcast.type, 'title': broadcast.title})
+
     @staticmethod
     def broadcast_to_agencies(type, title, message, data=None, exclude_user_id=None):
-        """Creates notifications for all Agency users (Owner/Agent)."""
+        """
+        Notifies all Agency users (Owner/Admin/Agent).
+        Stored once as a Broadcast and merged into each user's list when read,
+        so the cost does not grow with the number of users.
+        """
         try:
-            # Find all relevant users (all agency staff)
-            # In a real app we might batch this or use a queue
-            query = {'role__in': ['AgencyOwner', 'AgencyAdmin', 'Agent']}
-            if exclude_user_id:
-                query['id__ne'] = exclude_user_id
-
-            users = User.objects(**query)
-            
-            notifications = []
-            for user in users:
-                # We save individually for now to trigger signals if needed, 
-                # but bulk_insert is better for scale.
-                # MongoDB creates are fast enough for N < 1000
-                n = Notification(
-                    recipient=user,
-                    type=type,
-                    title=title,
-                    message=message,
-                    data=data or {}
-                )
-                notifications.append(n)
-            
-            if notifications:
-                Notification.objects.insert(notifications)
-                
-            # Trigger N8N
-            NotificationService.trigger_n8n_webhook(type, data)
-            
-            return len(notifications)
-        except Exception as e:
-            print(f"Error broadcasting notifications: {e}")
-            return 0
+            documents = NotificationService.broadcast_documents(type, title, message, data, exclude_user_id)
+            insert_together(*documents)
+            OutboxService.wake()
+            NotificationService.announce(documents[0])
+            return documents[0]
+        except Exception:
+            logger.exception("Error broadcasting notifications")
+            return None
 
     @staticmethod
-    def trigger_n8n_webhook(type, data):
-        """Sends an event to n8n webhook."""
-        webhook_url = os.environ.get('N8N_WEBHOOK_URL')
-        if not webhook_url:
-            # print("N8N_WEBHOOK_URL not set, skipping webhook.")
-            return
+    def _read_state(user):
+        return BroadcastReadState.objects(user=user.pk).first()
 
-        try:
-            payload = {
-                "event": "broadcast_notification",
-                "type": type,
-                "data": data,
-                "timestamp": str(datetime.utcnow())
-            }
-            # Fire and forget (timeout short)
-            requests.post(webhook_url, json=payload, timeout=2)
-        except Exception as e:
-            print(f"Failed to trigger n8n webhook: {e}")
+    @staticmethod
+    def _broadcast_filters(user, state):
+        """Raw filters for the broadcasts a user sees: (unread, read)"""
+        visible = {'audienceRoles': user.role, 'excludeUser': {'$ne': user.pk}}
+        if user.createdAt:
+            # Users only get broadcasts sent after they joined
+            visible['createdAt'] = {'$gte': user.createdAt}
+
+        read_up_to = state.readUpTo if state else None
+        read_ids = list(state.readIds) if state else []
+
+        unread = dict(visible, _id={'$nin': read_ids})
+        read_clauses = [{'_id': {'$in': read_ids}}]
+        if read_up_to:
+            unread['createdAt'] = dict(visible.get('createdAt', {}), **{'$gt': read_up_to})
+            read_clauses.append({'createdAt': {'$lte': read_up_to}})
+        read = {'$and': [visible, {'$or': read_clauses}]}
+        return unread, read
+
+    @staticmethod
+    def _to_dict(n, is_read):
+        return {
+            'id': str(n.id),
+            'type': n.type,
+            'title': n.title,
+            'message': n.message,
+            'data': n.data,
+            'isRead': is_read,
+            'createdAt': n.createdAt.isoformat()
+        }
+
+    @staticmethod
+    def list_for_user(user, limit=50):
+        """Personal notifications and broadcasts, unread first, then newest"""
+        results = [
+            NotificationService._to_dict(n, n.isRead)
+            for n in Notification.objects(recipient=user.pk).order_by('isRead', '-createdAt').limit(limit)
+        ]
+
+        unread, read = NotificationService._broadcast_filters(user, NotificationService._read_state(user))
+        unread_broadcasts = list(Broadcast.objects(__raw__=unread).order_by('-createdAt').limit(limit))
+        results += [NotificationService._to_dict(b, False) for b in unread_broadcasts]
+        if len(unread_broadcasts) < limit:
+            results += [
+                NotificationService._to_dict(b, True)
+                for b in Broadcast.objects(__raw__=read).order_by('-createdAt').limit(limit)
+            ]
+
+        results.sort(key=lambda n: n['createdAt'], reverse=True)
+        results.sort(key=lambda n: n['isRead'])
+        return results[:limit]
+
+    @staticmethod
+    def unread_count(user):
+        unread, _ = NotificationService._broadcast_filters(user, NotificationService._read_state(user))
+        personal = Notification.objects(recipient=user.pk, isRead=False).count()
+        return personal + Broadcast.objects(__raw__=unread).count()
+
+    @staticmethod
+    def mark_read(user, notification_id):
+        """Mark one personal notification or broadcast as read; False if neither exists"""
+        if not Notification.objects(id=notification_id, recipient=user.pk).update(set__isRead=True):
+            broadcast = Broadcast.objects(id=notification_id).only('id').first()
+            if not broadcast:
+                return False
+            BroadcastReadState.objects(user=user.pk).update_one(add_to_set__readIds=broadcast.pk, upsert=True)
+        EventBus.publish([user_channel(user.pk)], 'notification.read', {'id': str(notification_id)})
+        return True
+
+    @staticmethod
+    def mark_all_read(user):
+        Notification.objects(recipient=user.pk, isRead=False).update(set__isRead=True)
+        # Advancing the watermark makes the individually read ids redundant
+        BroadcastReadState.objects(user=user.pk).update_one(
+            set__readUpTo=datetime.utcnow(), set__readIds=[], upsert=True
+        )
+        EventBus.publish([user_channel(user.pk)], 'notification.read', {'all': True})
+
+    @staticmethod
+    def n8n_payload(type, data):
+        return {
+            "event": "broadcast_notification",
+            "type": type,
+            "data": data,
+            "timestamp": str(datetime.utcnow())
+        }
+
+    @staticmethod
+    def n8n_event(type, data):
+        """Unsaved outbox event for the n8n webhook (None when N8N_WEBHOOK_URL is not set)"""
+        return OutboxService.event('n8n', NotificationService.n8n_payload(type, data))
@@ -0,0 +1,234 @@
+"""
+Outbox delivery
+Events in the outbox_events collection are delivered by a background
+dispatcher thread per process: it claims due events in batches (including
+ones left behind by other processes), posts them concurrently from a small
+thread pool, and records the outcome with one bulk write. create_app()
+starts it when a topic target is configured, so events left Pending,
+backing off or stuck in Delivering across a restart are delivered without
+waiting for a new write.
+Failed deliveries are retried with exponential backoff; after
+OUTBOX_MAX_ATTEMPTS the event is marked Dead and kept for inspection.
+
+Environment:
+    N8N_WEBHOOK_URL         target of 'n8n' events (events are not recorded when unset)
+    OUTBOX_WORKERS          concurrent deliveries per process (4)
+    OUTBOX_BATCH_SIZE       events claimed per round (50)
+    OUTBOX_MAX_ATTEMPTS     deliveries before an event is dead-lettered (8)
+    OUTBOX_POLL_SECONDS     how often retries and other processes' events are picked up (5)
+"""
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from pymongo import ReturnDocument, UpdateOne
+from models.outbox_event import OutboxEvent
+from app.utils import metrics
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', '4'))
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_POLL_SECONDS = float(os.getenv('OUTBOX_POLL_SECONDS', '5'))
+
+DELIVERY_TIMEOUT = 5
+BACKOFF_BASE = 2       # seconds before the first retry, doubled each attempt
+BACKOFF_MAX = 3600
+DELIVERED_RETENTION = timedelta(days=7)
+# A Delivering event whose dispatcher died is retried after this long
+STALE_AFTER = timedelta(minutes=5)
+
+TOPIC_URLS = {'n8n': 'N8N_WEBHOOK_URL'}
+
+DELIVERED = metrics.REGISTRY.register(metrics.Counter(
+    'outbox_events_delivered_total', 'Outbox events delivered', ('topic',)))
+FAILURES = metrics.REGISTRY.register(metrics.Counter(
+    'outbox_delivery_failures_total', 'Failed outbox delivery attempts', ('topic',)))
+DEAD = metrics.REGISTRY.register(metrics.Counter(
+    'outbox_events_dead_total', 'Outbox events dead-lettered after the last attempt', ('topic',)))
+DELIVERY_DURATION = metrics.REGISTRY.register(metrics.Histogram(
+    'outbox_delivery_duration_seconds', 'Time per delivery attempt', metrics.DURATION_BUCKETS, ('topic',)))
+
+
+def _backlog():
+    try:
+        collection = OutboxEvent._get_collection()
+        return {status: collection.count_documents({'status': status}) for status in ('Pending', 'Dead')}
+    except Exception:
+        return {}
+
+
+metrics.REGISTRY.register(metrics.Gauge(
+    'outbox_events', 'Outbox events by status', _backlog, ('status',)))
+
+
+def topic_url(topic):
+    env = TOPIC_URLS.get(topic)
+    return os.environ.get(env) if env else None
+
+
+def backoff(attempts):
+    """Delay before the next try after `attempts` failures (exponential, jittered)"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+class OutboxService:
+    _executor = None
+    _dispatcher = None
+    _dispatcher_pid = None
+    _wakeup = threading.Event()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def event(topic, payload):
+        """
+        Unsaved OutboxEvent for `topic`, to be written together with the
+        change that caused it. None when the topic has no target configured.
+        """
+        if not topic_url(topic):
+            logger.debug("No target configured for outbox topic %s, skipping", topic)
+            return None
+        return OutboxEvent(topic=topic, payload=payload)
+
+    @staticmethod
+    def publish(topic, payload):
+        """Record an event on its own and wake the dispatcher; returns the event or None"""
+        event = OutboxService.event(topic, payload)
+        if event:
+            event.save()
+            OutboxService.wake()
+        return event
+
+    @staticmethod
+    def start():
+        """Start this process's dispatcher if any topic has a target configured"""
+        if any(topic_url(topic) for topic in TOPIC_URLS):
+            OutboxService._ensure_dispatcher()
+
+    @staticmethod
+    def wake():
+        """Ask this process's dispatcher to run now (starting it if needed)"""
+        if not any(topic_url(topic) for topic in TOPIC_URLS):
+            return
+        OutboxService._ensure_dispatcher()
+        OutboxService._wakeup.set()
+
+    @staticmethod
+    def _ensure_dispatcher():
+        # Threads do not survive fork, so each gunicorn worker starts its own
+        with OutboxService._lock:
+            if OutboxService._dispatcher_pid == os.getpid():
+                return
+            OutboxService._executor = ThreadPoolExecutor(
+                max_workers=OUTBOX_WORKERS, thread_name_prefix='outbox-delivery'
+            )
+            OutboxService._dispatcher = threading.Thread(
+                target=OutboxService._dispatch_forever, name='outbox-dispatcher', daemon=True
+            )
+            OutboxService._dispatcher_pid = os.getpid()
+            OutboxService._dispatcher.start()
+
+    @staticmethod
+    def _dispatch_forever():
+        while True:
+            OutboxService._wakeup.wait(OUTBOX_POLL_SECONDS)
+            OutboxService._wakeup.clear()
+            try:
+                OutboxService.dispatch_pending()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+
+    @staticmethod
+    def claim_batch(limit=None):
+        """Atomically claim up to `limit` due events; returns their raw documents"""
+        now = datetime.utcnow()
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        collection = OutboxEvent._get_collection()
+        claimed = []
+        for _ in range(limit or OUTBOX_BATCH_SIZE):
+            raw = collection.find_one_and_update(
+                {'$or': [
+                    {'status': 'Pending', 'nextAttemptAt': {'$lte': now}},
+                    {'status': 'Delivering', 'claimedAt': {'$lt': now - STALE_AFTER}}
+                ]},
+                {
+                    '$set': {'status': 'Delivering', 'claimedAt': now, 'workerId': worker},
+                    '$inc': {'attempts': 1}
+                },
+                sort=[('nextAttemptAt', 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if raw is None:
+                break
+            claimed.append(raw)
+        return claimed
+
+    @staticmethod
+    def deliver(raw):
+        """
+        POST one event to its topic's URL.
+
+        Returns:
+            str or None: error message, or None on success
+        """
+        url = topic_url(raw['topic'])
+        if not url:
+            return f"No target configured for topic {raw['topic']}"
+        start = time.perf_counter()
+        try:
+            response = requests.post(url, json=raw.get('payload'), timeout=DELIVERY_TIMEOUT)
+            if response.status_code >= 300:
+                return f"HTTP {response.status_code}"
+            return None
+        except requests.RequestException as e:
+            return str(e)
+        finally:
+            DELIVERY_DURATION.observe(time.perf_counter() - start, raw['topic'])
+
+    @staticmethod
+    def outcome(raw, error, now):
+        """Bulk update recording one delivery attempt"""
+        topic = raw['topic']
+        if error is None:
+            DELIVERED.inc(topic)
+            return UpdateOne({'_id': raw['_id']}, {
+                '$set': {'status': 'Delivered', 'deliveredAt': now, 'expiresAt': now + DELIVERED_RETENTION},
+                '$unset': {'lastError': ''}
+            })
+
+        FAILURES.inc(topic)
+        if raw['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+            DEAD.inc(topic)
+            logger.warning("Outbox event dead-lettered", extra={
+                'event_id': str(raw['_id']), 'topic': topic, 'attempts': raw['attempts'], 'error': error
+            })
+            return UpdateOne({'_id': raw['_id']}, {'$set': {'status': 'Dead', 'lastError': error}})
+        return UpdateOne({'_id': raw['_id']}, {'$set': {
+            'status': 'Pending', 'lastError': error, 'nextAttemptAt': now + backoff(raw['attempts'])
+        }})
+
+    @staticmethod
+    def dispatch_pending():
+        """Deliver due events batch by batch until none are left; returns how many were attempted"""
+        attempted = 0
+        while True:
+            batch = OutboxService.claim_batch()
+            if not batch:
+                return attempted
+            executor = OutboxService._executor
+            if executor is not None and OutboxService._dispatcher_pid == os.getpid():
+                errors = list(executor.map(OutboxService.deliver, batch))
+            else:
+                errors = [OutboxService.deliver(raw) for raw in batch]
+
+            now = datetime.utcnow()
+            ops = [OutboxService.outcome(raw, error, now) for raw, error in zip(batch, errors)]
+            OutboxEvent._get_collection().bulk_write(ops, ordered=False)
+            attempted += len(batch)
@@ -0,0 +1,162 @@
+"""
+Payment allocation for ledger credits
+A Credit is applied to bookings as a plan of (booking, amount) pairs: the
+whole amount to the linked booking, or a customer-level payment spread over
+the customer's unpaid bookings oldest first. The plan is applied with one
+bulk_write of pipeline updates (paidAmount += amount, balanceDue =
+totalAmount - paidAmount, both rounded to cents), in the same transaction as the ledger entry
+where the deployment supports transactions, and stored on the entry as
+`allocations` so edits and deletes reverse exactly what was applied.
+The customers' maintained summaries (CustomerSummaryService) are updated in
+that same write.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from pymongo import UpdateOne
+from app.utils.batch_loader import ref_id
+from app.utils.transactions import run_in_transaction, save_document
+from app.services.customer_summary_service import CustomerSummaryService
+from models.booking import Booking
+from models.ledger import LedgerEntry, Allocation
+
+CENT = Decimal('0.01')
+
+
+def money(value):
+    if value is None:
+        return Decimal('0.00')
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class PaymentAllocationService:
+    @staticmethod
+    def recorded(entry):
+        """
+        {booking ObjectId: Decimal} this entry has applied. Entries written
+        before allocations were recorded fall back to their linked booking.
+        """
+        if entry.allocations:
+            result = {}
+            for allocation in entry.allocations:
+                oid = ref_id(allocation._data.get('bookingId'))
+                result[oid] = result.get(oid, Decimal('0.00')) + money(allocation.amount)
+            return result
+        booking = ref_id(entry._data.get('bookingId'))
+        if booking and entry.type == 'Credit':
+            return {booking: money(entry.amount)}
+        return {}
+
+    @staticmethod
+    def plan(entry, released=None):
+        """
+        Allocation plan for an entry's current state.
+
+        Args:
+            entry: LedgerEntry (unsaved or about to be updated)
+            released: {booking id: amount} being reversed in the same write,
+                added back to those bookings' balances before planning
+
+        Returns:
+            list: [(booking ObjectId, Decimal)]
+        """
+        if entry.type != 'Credit':
+            return []
+        amount = money(entry.amount)
+
+        booking = ref_id(entry._data.get('bookingId'))
+        if booking:
+            return [(booking, amount)]
+
+        customer = ref_id(entry._data.get('customerId'))
+        if not customer:
+            return []
+
+        released = released or {}
+        # Unpaid bookings, plus any that only become unpaid once `released` is reversed
+        query = Booking.objects(
+            __raw__={
+                'agencyId': ref_id(entry._data.get('agencyId')),
+                'customerId': customer,
+                '$or': [{'balanceDue': {'$gt': 0}}, {'_id': {'$in': list(released)}}]
+            }
+        ).order_by('createdAt', 'id').only('id', 'balanceDue').as_pymongo()
+
+        plan = []
+        remaining = amount
+        for raw in query:
+            if remaining <= 0:
+                break
+            balance = money(raw.get('balanceDue')) + released.get(raw['_id'], Decimal('0.00'))
+            if balance <= 0:
+                continue
+            amount_to_pay = min(remaining, balance)
+            plan.append((raw['_id'], amount_to_pay))
+            remaining -= amount_to_pay
+        # Anything left over stays as credit on the entry without a booking
+        return plan
+
+    @staticmethod
+    def _operations(deltas):
+        """
+        Pipeline updates that add each delta to paidAmount and recompute
+        balanceDue from totalAmount, rounded to cents on the server. Plain
+        $inc of floats would leave residue (0.40 paid as 0.10 + 0.30 owes
+        5.55e-17) that still matches balanceDue > 0.
+        """
+        ops = []
+        for booking, amount in deltas.items():
+            value = float(amount)
+            if value:
+                ops.append(UpdateOne({'_id': booking}, [
+                    {'$set': {'paidAmount': {'$round': [{'$add': [{'$ifNull': ['$paidAmount', 0]}, value]}, 2]}}},
+                    {'$set': {'balanceDue': {'$round': [{'$subtract': ['$totalAmount', '$paidAmount']}, 2]}}}
+                ]))
+        return ops
+
+    @staticmethod
+    def _write(entry, plan, reverse=None, delete=False):
+        """Persist the entry and the net booking deltas together"""
+        deltas = {}
+        for booking, amount in (reverse or {}).items():
+            deltas[booking] = deltas.get(booking, Decimal('0.00')) - amount
+        for booking, amount in plan:
+            deltas[booking] = deltas.get(booking, Decimal('0.00')) + amount
+
+        if not delete:
+            entry.allocations = [Allocation(bookingId=booking, amount=amount) for booking, amount in plan]
+        ops = PaymentAllocationService._operations(deltas)
+        summaries = CustomerSummaryService.payment_operations(deltas, entry.date)
+
+        def write(session):
+            if delete:
+                LedgerEntry._get_collection().delete_one({'_id': entry.pk}, session=session)
+            else:
+                save_document(entry, session=session)
+            if ops:
+                Booking._get_collection().bulk_write(ops, ordered=False, session=session)
+            CustomerSummaryService.write(summaries, session=session)
+
+        run_in_transaction(LedgerEntry._get_db().client, write)
+        return entry
+
+    @staticmethod
+    def create(entry):
+        """Save a new entry and apply its allocation"""
+        return PaymentAllocationService._write(entry, PaymentAllocationService.plan(entry))
+
+    @staticmethod
+    def update(entry, previous):
+        """
+        Save an edited entry: reverse what it applied before (`previous`, from
+        recorded() taken before the edit) and apply its new allocation.
+        """
+        plan = PaymentAllocationService.plan(entry, released=previous)
+        return PaymentAllocationService._write(entry, plan, reverse=previous)
+
+    @staticmethod
+    def delete(entry):
+        """Delete an entry and reverse what it applied"""
+        return PaymentAllocationService._write(
+            entry, [], reverse=PaymentAllocationService.recorded(entry), delete=True
+        )
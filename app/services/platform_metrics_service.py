@@ -0,0 +1,164 @@
+"""
+SuperAdmin platform metrics
+The admin dashboard numbers (agencies by status, booking totals, 30-day
+activity and GMV per agency) are computed with one aggregation per
+collection and stored as the single platform_metrics document. Reads are one
+document fetch; a snapshot older than PLATFORM_METRICS_REFRESH_MINUTES is
+returned as is and refreshed in the background, at most once per interval
+per process. Agency registrations and status changes are applied to the
+stored counts with $inc straight away. scripts/refresh_platform_metrics.py refreshes it on demand.
+
+admin_emails() resolves the admin of a page of agencies with one
+aggregation over users.
+
+Environment:
+- PLATFORM_METRICS_REFRESH_MINUTES: snapshot age before a refresh (default 15)
+- PLATFORM_METRICS_GMV_AGENCIES: agencies kept in the GMV ranking (default 50)
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from models.agency import Agency
+from models.booking import Booking
+from models.user import User
+from models.platform_metrics import PlatformMetrics
+from app.utils.batch_loader import ref_id
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+METRICS_KEY = 'global'
+REFRESH_INTERVAL = timedelta(minutes=int(os.getenv('PLATFORM_METRICS_REFRESH_MINUTES', '15')))
+GMV_AGENCIES = int(os.getenv('PLATFORM_METRICS_GMV_AGENCIES', '50'))
+RECENT_DAYS = 30
+ADMIN_ROLES = ['AgencyAdmin', 'SuperAdmin']
+
+
+class PlatformMetricsService:
+    _lock = threading.Lock()
+    _last_refresh = None
+
+    @staticmethod
+    def compute(now=None):
+        """Snapshot fields straight from the raw collections (full scans)"""
+        now = now or datetime.utcnow()
+        since = now - timedelta(days=RECENT_DAYS)
+
+        agencies = {'total': 0}
+        for row in Agency.objects.aggregate({'$group': {'_id': '$status', 'count': {'$sum': 1}}}):
+            status = row['_id'] or 'Pending'  # the model default
+            agencies[status] = agencies.get(status, 0) + row['count']
+            agencies['total'] += row['count']
+
+        live = {'status': {'$ne': 'Cancelled'}}
+        recent = {'createdAt': {'$gte': since}}
+        # Every branch ends in a bounded output: $facet results share one 16MB document
+        rows = list(Booking.objects.aggregate({'$facet': {
+            'total': [{'$count': 'count'}],
+            'recent': [
+                {'$match': recent},
+                {'$group': {'_id': '$agencyId', 'bookings': {'$sum': 1},
+                            'gmv': {'$sum': {'$cond': [{'$ne': ['$status', 'Cancelled']}, '$totalAmount', 0]}}}},
+                {'$group': {'_id': None, 'bookings': {'$sum': '$bookings'}, 'gmv': {'$sum': '$gmv'},
+                            'agencies': {'$sum': 1}}}
+            ],
+            'gmv': [
+                {'$match': live},
+                {'$group': {'_id': None, 'gmv': {'$sum': '$totalAmount'}}}
+            ],
+            'ranking': [
+                {'$match': live},
+                {'$group': {'_id': '$agencyId', 'gmv': {'$sum': '$totalAmount'}, 'bookings': {'$sum': 1}}},
+                {'$sort': {'gmv': -1, '_id': 1}},
+                {'$limit': GMV_AGENCIES}
+            ]
+        }}))
+        facets = rows[0] if rows else {}
+        total = (facets.get('total') or [{}])[0]
+        recent_totals = (facets.get('recent') or [{}])[0]
+        gmv = (facets.get('gmv') or [{}])[0]
+        ranking = facets.get('ranking', [])
+
+        names = {
+            a['_id']: a.get('name')
+            for a in Agency._get_collection().find({'_id': {'$in': [r['_id'] for r in ranking]}}, {'name': 1})
+        }
+        return {
+            'agencies': agencies,
+            'totalBookings': total.get('count', 0),
+            'recentBookings': recent_totals.get('bookings', 0),
+            'recentActiveAgencies': recent_totals.get('agencies', 0),
+            'gmv': round(float(gmv.get('gmv') or 0), 2),
+            'recentGmv': round(float(recent_totals.get('gmv') or 0), 2),
+            'gmvByAgency': [{
+                'agencyId': str(r['_id']),
+                'name': names.get(r['_id'], "Unknown (Deleted)"),
+                'gmv': round(float(r['gmv'] or 0), 2),
+                'bookings': r['bookings']
+            } for r in ranking]
+        }
+
+    @staticmethod
+    def agency_status_change(before, after):
+        """Move one agency between status counts (before=None for a new agency; never raises)"""
+        if before == after:
+            return
+        inc = {f'agencies.{after}': 1}
+        if before is None:
+            inc['agencies.total'] = 1
+        else:
+            inc[f'agencies.{before}'] = -1
+        try:
+            # No upsert: without a snapshot the next read computes one
+            PlatformMetrics._get_collection().update_one({'_id': METRICS_KEY}, {'$inc': inc})
+        except Exception:
+            logger.exception("Failed to update platform metrics")
+
+    @staticmethod
+    def refresh():
+        """Recompute and store the snapshot; returns it"""
+        snapshot = PlatformMetricsService.compute()
+        snapshot['refreshedAt'] = datetime.utcnow()
+        PlatformMetrics._get_collection().update_one(
+            {'_id': METRICS_KEY}, {'$set': snapshot}, upsert=True
+        )
+        return snapshot
+
+    @staticmethod
+    def refresh_if_due():
+        now = datetime.utcnow()
+        with PlatformMetricsService._lock:
+            last = PlatformMetricsService._last_refresh
+            if last and now - last < REFRESH_INTERVAL:
+                return
+            PlatformMetricsService._last_refresh = now
+
+        def run():
+            try:
+                PlatformMetricsService.refresh()
+            except Exception:
+                logger.exception("Platform metrics refresh failed")
+        threading.Thread(target=run, name='platform-metrics-refresh', daemon=True).start()
+
+    @staticmethod
+    def get():
+        """The stored snapshot, computed first if there is none yet"""
+        raw = PlatformMetrics._get_collection().find_one({'_id': METRICS_KEY})
+        if raw is None or not raw.get('refreshedAt'):
+            return PlatformMetricsService.refresh()
+        if datetime.utcnow() - raw['refreshedAt'] > REFRESH_INTERVAL:
+            PlatformMetricsService.refresh_if_due()
+        return raw
+
+    @staticmethod
+    def admin_emails(agency_ids):
+        """{agency ObjectId: email of its first admin user} in one aggregation"""
+        ids = [oid for oid in (ref_id(a) for a in agency_ids) if oid]
+        if not ids:
+            return {}
+        rows = User.objects.aggregate(
+            {'$match': {'agencyId': {'$in': ids}, 'role': {'$in': ADMIN_ROLES}}},
+            {'$sort': {'_id': 1}},
+            {'$group': {'_id': '$agencyId', 'email': {'$first': '$email'}}}
+        )
+        return {row['_id']: row['email'] for row in rows}
@@ -0,0 +1,140 @@
+"""
+Concurrent read queries
+Report endpoints read several independent sources. QueryExecutor.run()
+starts them together on a shared, bounded thread pool so a request takes as
+long as its slowest query rather than the sum of all of them.
+
+Each query runs in a copy of the caller's contextvars context, so Flask's
+request/app context and the per-request DB metrics follow it into the
+worker thread. Each query also gets a deadline:
+- max_time_ms() gives the remaining budget, for passing to MongoDB as
+  maxTimeMS so the server stops work nobody is waiting for
+- a query that is still running (or failed) when its deadline passes is
+  replaced by its fallback value and reported as partial; a query without a
+  fallback is required and its error is raised instead
+
+Environment:
+- QUERY_WORKERS: threads shared by all requests (default 8)
+- QUERY_TIMEOUT_MS: default per-query deadline (default 5000)
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import jsonify
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUERY_WORKERS = int(os.getenv('QUERY_WORKERS', '8'))
+QUERY_TIMEOUT_MS = int(os.getenv('QUERY_TIMEOUT_MS', '5000'))
+
+PARTIAL_RESULTS_HEADER = 'X-Partial-Results'
+
+_deadline = contextvars.ContextVar('query_deadline', default=None)
+
+
+class QueryTimeout(Exception):
+    """A required query did not finish before its deadline"""
+
+
+def max_time_ms():
+    """Milliseconds left for the running query, or None outside QueryExecutor"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(1, int((deadline - time.monotonic()) * 1000))
+
+
+def query_options():
+    """aggregate() keyword arguments carrying the remaining budget"""
+    remaining = max_time_ms()
+    return {'maxTimeMS': remaining} if remaining else {}
+
+
+def _call(deadline, fn, args):
+    _deadline.set(deadline)
+    return fn(*args)
+
+
+def partial_response(data, partial, status=200):
+    """jsonify a payload, naming any parts that fell back in a header"""
+    response = jsonify(data)
+    response.status_code = status
+    if partial:
+        response.headers[PARTIAL_RESULTS_HEADER] = ','.join(partial)
+    return response
+
+
+class QueryExecutor:
+    _executor = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _pool():
+        # Created lazily so each forked gunicorn worker gets its own threads
+        with QueryExecutor._lock:
+            if QueryExecutor._executor is None:
+                QueryExecutor._executor = ThreadPoolExecutor(
+                    max_workers=QUERY_WORKERS, thread_name_prefix='query'
+                )
+            return QueryExecutor._executor
+
+    @staticmethod
+    def run(queries, fallbacks=None, timeouts=None):
+        """
+        Run independent queries concurrently.
+
+        Args:
+            queries: {name: (callable, *args)}
+            fallbacks: {name: value} used when that query fails or times out;
+                queries without one are required
+            timeouts: {name: milliseconds} overriding QUERY_TIMEOUT_MS
+
+        Returns:
+            tuple: ({name: result}, [names that fell back])
+
+        Raises:
+            QueryTimeout, or the query's own exception, when a required query
+            does not succeed
+        """
+        fallbacks = fallbacks or {}
+        timeouts = timeouts or {}
+        start = time.monotonic()
+        deadlines = {name: start + timeouts.get(name, QUERY_TIMEOUT_MS) / 1000.0 for name in queries}
+
+        if len(queries) == 1:
+            # Nothing to overlap; skip the thread hop
+            (name, (fn, *args)), = queries.items()
+            futures = None
+        else:
+            pool = QueryExecutor._pool()
+            futures = {
+                name: pool.submit(contextvars.copy_context().run, _call, deadlines[name], fn, args)
+                for name, (fn, *args) in queries.items()
+            }
+
+        results = {}
+        partial = []
+        for name in queries:
+            try:
+                if futures is None:
+                    results[name] = contextvars.copy_context().run(_call, deadlines[name], fn, args)
+                else:
+                    remaining = max(0, deadlines[name] - time.monotonic())
+                    results[name] = futures[name].result(timeout=remaining)
+            except TimeoutError:
+                futures[name].cancel()
+                if name not in fallbacks:
+                    raise QueryTimeout(f"Query '{name}' timed out")
+                logger.warning("Query timed out; returning partial results", extra={'query': name})
+                results[name] = fallbacks[name]
+                partial.append(name)
+            except Exception:
+                if name not in fallbacks:
+                    raise
+                logger.exception("Query failed; returning partial results", extra={'query': name})
+                results[name] = fallbacks[name]
+                partial.append(name)
+        return results, partial
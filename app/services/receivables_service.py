@@ -0,0 +1,183 @@
+"""
+Receivables aging
+Outstanding balances on non-cancelled bookings, grouped by age
+(0-30, 31-60, 61-90, 90+ days since the booking was made) and by customer.
+
+Every query starts from {agencyId, balanceDue > 0}, which the partial
+'unpaid_by_age' index on bookings covers. That index holds only unpaid
+bookings, so the cost follows the number of open receivables rather than
+the agency's booking history.
+"""
+from datetime import datetime, timedelta
+from app.utils.batch_loader import ref_id
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_query, page_size
+from app.services.query_executor import query_options
+from models.booking import Booking
+
+# (name, youngest age in days, oldest age in days)
+BUCKETS = (('0-30', 0, 30), ('31-60', 31, 60), ('61-90', 61, 90), ('90+', 91, None))
+BUCKET_NAMES = [name for name, _, _ in BUCKETS]
+FAR_FUTURE = datetime(9999, 1, 1)
+
+
+def as_of(now=None):
+    """Reference time, at the millisecond precision MongoDB stores"""
+    now = now or datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def unpaid_match(agency_id):
+    return {'agencyId': ref_id(agency_id), 'balanceDue': {'$gt': 0}, 'status': {'$ne': 'Cancelled'}}
+
+
+def bucket_dates(name, now):
+    """createdAt range of a bucket: {'$gt': ..., '$lte': ...}"""
+    _, youngest, oldest = next(bucket for bucket in BUCKETS if bucket[0] == name)
+    dates = {'$lte': now - timedelta(days=youngest)}
+    if oldest is not None:
+        dates['$gt'] = now - timedelta(days=oldest + 1)
+    return dates
+
+
+CUSTOMER_LOOKUP = [
+    {'$lookup': {'from': 'customers', 'localField': 'customerId', 'foreignField': '_id', 'as': 'customer'}},
+    {'$addFields': {'customer': {'$arrayElemAt': ['$customer', 0]}}}
+]
+
+
+class ReceivablesService:
+    @staticmethod
+    def summary(agency_id, top=10, now=None):
+        """
+        Aging buckets and the customers owing the most, in one aggregation.
+
+        Returns:
+            dict: {'asOf', 'total', 'bookings',
+                   'buckets': [{'bucket', 'amount', 'bookings'}] in age order,
+                   'customers': [{'customerId', 'customerName', 'phone',
+                                  'outstanding', 'bookings', 'oldestDays'}]}
+        """
+        now = as_of(now)
+        # $bucket boundaries ascend, so the oldest range comes first; anything
+        # older (or without a date) falls into the default 90+ bucket
+        boundaries = [now - timedelta(days=oldest + 1) for _, _, oldest in reversed(BUCKETS[:-1])] + [FAR_FUTURE]
+        labels = [name for name, _, _ in reversed(BUCKETS[:-1])]
+
+        pipeline = [
+            {'$match': unpaid_match(agency_id)},
+            {'$facet': {
+                'total': [
+                    {'$group': {'_id': None, 'amount': {'$sum': '$balanceDue'}, 'bookings': {'$sum': 1}}}
+                ],
+                'buckets': [
+                    {'$bucket': {
+                        'groupBy': '$createdAt',
+                        'boundaries': boundaries,
+                        'default': '90+',
+                        'output': {'amount': {'$sum': '$balanceDue'}, 'bookings': {'$sum': 1}}
+                    }}
+                ],
+                'customers': [
+                    {'$group': {
+                        '_id': '$customerId',
+                        'outstanding': {'$sum': '$balanceDue'},
+                        'bookings': {'$sum': 1},
+                        'oldest': {'$min': '$createdAt'}
+                    }},
+                    {'$sort': {'outstanding': -1, '_id': 1}},
+                    {'$limit': top},
+                    {'$addFields': {'customerId': '$_id'}},
+                    *CUSTOMER_LOOKUP
+                ]
+            }}
+        ]
+        rows = list(Booking.objects.aggregate(*pipeline, **query_options()))
+        result = rows[0] if rows else {'total': [], 'buckets': [], 'customers': []}
+
+        amounts = {}
+        for row in result['buckets']:
+            name = row['_id'] if row['_id'] == '90+' else labels[boundaries.index(row['_id'])]
+            amounts[name] = row
+        total = result['total'][0] if result['total'] else {}
+
+        return {
+            'asOf': now.isoformat(),
+            'total': round(float(total.get('amount') or 0), 2),
+            'bookings': total.get('bookings', 0),
+            'buckets': [{
+                'bucket': name,
+                'amount': round(float(amounts.get(name, {}).get('amount') or 0), 2),
+                'bookings': amounts.get(name, {}).get('bookings', 0)
+            } for name in BUCKET_NAMES],
+            'customers': [{
+                'customerId': str(row['_id']),
+                'customerName': (row.get('customer') or {}).get('fullName', "Unknown (Deleted)"),
+                'phone': (row.get('customer') or {}).get('phone'),
+                'outstanding': round(float(row['outstanding'] or 0), 2),
+                'bookings': row['bookings'],
+                'oldestDays': (now - row['oldest']).days if row.get('oldest') else None
+            } for row in result['customers']]
+        }
+
+    @staticmethod
+    def bookings(agency_id, bucket=None, customer_id=None, cursor=None, limit=None, now=None):
+        """
+        Unpaid bookings, oldest first, with customer names joined in.
+
+        Args:
+            bucket: optional name from BUCKET_NAMES
+            customer_id: optional customer to drill into
+            cursor: token from the previous page
+            limit: page size (see app.utils.pagination.page_size)
+
+        Returns:
+            tuple: (list of rows, next cursor token or None)
+
+        Raises:
+            ValueError: for an unknown bucket or a malformed cursor
+        """
+        now = as_of(now)
+        limit = page_size(limit)
+        match = unpaid_match(agency_id)
+        clauses = []
+        if bucket:
+            if bucket not in BUCKET_NAMES:
+                raise ValueError(f"Unknown bucket '{bucket}'")
+            if bucket == '90+':
+                # Undated bookings are counted as 90+ too
+                clauses.append({'$or': [{'createdAt': bucket_dates(bucket, now)}, {'createdAt': None}]})
+            else:
+                match['createdAt'] = bucket_dates(bucket, now)
+        if customer_id:
+            match['customerId'] = ref_id(customer_id)
+        if cursor:
+            value, pk = decode_cursor(cursor)
+            clauses.append(keyset_query('createdAt', value, pk, descending=False))
+        if clauses:
+            match['$and'] = clauses
+
+        rows = list(Booking.objects.aggregate(
+            {'$match': match},
+            {'$sort': {'createdAt': 1, '_id': 1}},
+            {'$limit': limit + 1},
+            *CUSTOMER_LOOKUP,
+            **query_options()
+        ))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].get('createdAt'), rows[-1]['_id'])
+
+        return [{
+            'id': str(b['_id']),
+            'bookingNumber': b.get('bookingNumber'),
+            'customerId': str(b['customerId']) if b.get('customerId') else None,
+            'customerName': (b.get('customer') or {}).get('fullName', "Unknown (Deleted)"),
+            'bookingType': b.get('category'),
+            'serviceType': b.get('serviceType') or 'Other',
+            'totalAmount': float(b.get('totalAmount') or 0),
+            'paidAmount': float(b.get('paidAmount') or 0),
+            'remainingAmount': float(b.get('balanceDue') or 0),
+            'createdAt': b['createdAt'].isoformat() if b.get('createdAt') else None,
+            'daysOverdue': (now - b['createdAt']).days if b.get('createdAt') else 0
+        } for b in rows], next_cursor
@@ -0,0 +1,247 @@
+"""
+Agency dashboard reports
+Each dashboard widget is built here, so the single /api/agency/dashboard
+call and the older per-widget endpoints share one implementation.
+
+dashboard() runs the independent queries concurrently through
+QueryExecutor, falling back to empty values (and reporting the affected
+widgets as partial) when one fails or times out:
+- every booking-based widget comes from one $facet aggregation over the
+  agency's non-cancelled bookings, with sorting and limits inside it
+- ledger/expense numbers come from the daily rollups
+- outstanding payments are the first page of ReceivablesService.bookings()
+- top customers are an indexed sort on the maintained Customer.summary
+- visa and ticket sales, visa follow-ups and expiring passports are one
+  bounded query each
+"""
+from datetime import datetime, timedelta
+from app.utils.batch_loader import ref_id
+from app.utils.serializers import mongo_to_dict
+from app.utils.date_helpers import get_date_range
+from app.services.rollup_service import RollupService
+from app.services.query_executor import QueryExecutor, query_options
+from app.services.receivables_service import ReceivablesService
+from app.services.customer_summary_service import CustomerSummaryService
+from models.booking import Booking
+from models.customer import Customer
+from models.package import SERVICE_TYPES
+from models.visa_booking import VisaBooking
+from models.ticket_booking import TicketBooking
+from models.visa_case import VisaCase
+
+WIDGETS = ('summary', 'cashFlow', 'revenueByService', 'outstandingPayments',
+           'topCustomers', 'expensesBreakdown', 'tasks')
+
+OUTSTANDING_LIMIT = 50
+TOP_CUSTOMERS_LIMIT = 5
+TASKS_LIMIT = 5
+
+# Booking $facet branches each widget needs
+BOOKING_FACETS = {
+    'summary': ['pending'],
+    'revenueByService': ['revenueByService'],
+    'tasks': ['duePayments']
+}
+
+
+def date_range(args):
+    """(start, end) from ?filter= and, for filter=custom, ?startDate=/?endDate= (ISO)"""
+    filter_type = args.get('filter', 'this_month')
+    start_date, end_date = args.get('startDate'), args.get('endDate')
+    if filter_type == 'custom' and start_date and end_date:
+        # naive UTC
+        return (datetime.fromisoformat(start_date.replace('Z', '+00:00')).replace(tzinfo=None),
+                datetime.fromisoformat(end_date.replace('Z', '+00:00')).replace(tzinfo=None))
+    # get_date_range treats 'custom' without dates as this month so far
+    return get_date_range(filter_type)
+
+
+class ReportService:
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def booking_facets(agency_id, start_date, end_date, branches):
+        """One aggregation over the agency's non-cancelled bookings"""
+        in_range = {'createdAt': {'$gte': start_date, '$lte': end_date}}
+        unpaid = {'balanceDue': {'$gt': 0}}
+        facets = {
+            'pending': [
+                {'$match': dict(in_range, **unpaid)},
+                {'$group': {'_id': None, 'total': {'$sum': '$balanceDue'}}}
+            ],
+            'revenueByService': [
+                {'$match': in_range},
+                # Bookings written before serviceType existed count as Other until backfilled
+                {'$group': {'_id': {'$ifNull': ['$serviceType', 'Other']}, 'total': {'$sum': '$totalAmount'}}}
+            ],
+            'duePayments': [
+                {'$match': unpaid},
+                {'$sort': {'createdAt': -1}},
+                {'$limit': TASKS_LIMIT}
+            ]
+        }
+        pipeline = [
+            {'$match': {'agencyId': ref_id(agency_id), 'status': {'$ne': 'Cancelled'}}},
+            {'$facet': {name: facets[name] for name in branches}}
+        ]
+        rows = list(Booking.objects.aggregate(*pipeline, **query_options()))
+        return rows[0] if rows else {name: [] for name in branches}
+
+    @staticmethod
+    def sales_total(document, match, field):
+        rows = list(document.objects.aggregate(
+            {'$match': match},
+            {'$group': {'_id': None, 'total': {'$sum': f'${field}'}}},
+            **query_options()
+        ))
+        return rows[0]['total'] if rows else 0
+
+    @staticmethod
+    def visa_sales(agency_id, start_date, end_date):
+        return ReportService.sales_total(VisaBooking, {
+            'seller_agency_id': ref_id(agency_id),
+            'created_at': {'$gte': start_date, '$lte': end_date},
+            'status': {'$ne': 'rejected'}
+        }, 'final_amount')
+
+    @staticmethod
+    def ticket_sales(agency_id, start_date, end_date):
+        return ReportService.sales_total(TicketBooking, {
+            'sellerAgencyId': ref_id(agency_id),
+            'created_at': {'$gte': start_date, '$lte': end_date},
+            'status': {'$in': ['confirmed', 'ticketed']}
+        }, 'total_price')
+
+    @staticmethod
+    def visa_follow_ups(agency_id):
+        """Active visa cases, earliest expected issue date first"""
+        return mongo_to_dict(VisaCase.objects(
+            agencyId=agency_id,
+            status__nin=['Approved', 'Rejected', 'Completed']
+        ).order_by('expectedIssueDate').limit(TASKS_LIMIT))
+
+    @staticmethod
+    def top_customers(agency_id):
+        """Highest lifetime spend first, from the (agencyId, -summary.totalSpend) index"""
+        CustomerSummaryService.ensure(agency_id)
+        customers = Customer.objects(
+            agencyId=agency_id,
+            summary__bookingCount__gt=0
+        ).only('fullName', 'summary').order_by('-summary.totalSpend').limit(TOP_CUSTOMERS_LIMIT)
+        return [{
+            'name': c.fullName,
+            'totalSpend': c.summary.totalSpend,
+            'bookingCount': c.summary.bookingCount,
+            'outstandingBalance': c.summary.outstandingBalance
+        } for c in customers]
+
+    @staticmethod
+    def expiring_passports(agency_id):
+        """Customers whose passport expires within six months"""
+        today = datetime.utcnow()
+        return mongo_to_dict(Customer.objects(
+            agencyId=agency_id,
+            passportExpiry__gte=today,
+            passportExpiry__lte=today + timedelta(days=180)
+        ).order_by('passportExpiry').limit(TASKS_LIMIT))
+
+    # ------------------------------------------------------------------
+    # Widgets (shaped exactly as the per-widget endpoints return them)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def summary(totals, facets):
+        pending = facets['pending']
+        return {
+            'totalCredit': totals['credit'],
+            'totalDebit': totals['totalDebit'],
+            'netBalance': totals['credit'] - totals['totalDebit'],
+            'pendingAmount': pending[0]['total'] if pending else 0
+        }
+
+    @staticmethod
+    def revenue_by_service(facets, visa_total, ticket_total):
+        revenue = {'Visa': visa_total, 'Ticket': ticket_total}
+        revenue.update({service: 0 for service in SERVICE_TYPES})
+        for group in facets['revenueByService']:
+            revenue[group['_id']] = revenue.get(group['_id'], 0) + float(group.get('total') or 0)
+        return [{'name': k, 'value': v} for k, v in revenue.items()]
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def dashboard(agency_id, start_date, end_date, widgets=WIDGETS):
+        """
+        Build the requested widgets.
+
+        Args:
+            agency_id: tenant
+            start_date, end_date: reporting period (tasks ignore it)
+            widgets: names from WIDGETS
+
+        Returns:
+            tuple: ({widget name: widget payload}, [widgets built from
+            partial results because a query failed or timed out])
+        """
+        widgets = [w for w in WIDGETS if w in widgets]
+        branches = [b for w in widgets for b in BOOKING_FACETS.get(w, [])]
+
+        # query name -> (callable, *args), fallback and the widgets it feeds
+        jobs, fallbacks, feeds = {}, {}, {}
+
+        def add(name, job, fallback, *fed):
+            jobs[name], fallbacks[name], feeds[name] = job, fallback, fed
+
+        period = (agency_id, start_date, end_date)
+        if branches:
+            add('facets', (ReportService.booking_facets, *period, branches),
+                {branch: [] for branch in branches}, *[w for w in widgets if w in BOOKING_FACETS])
+        if 'summary' in widgets:
+            add('totals', (RollupService.totals, *period),
+                {'credit': 0, 'debit': 0, 'agentPayments': 0, 'miscExpenses': 0, 'totalDebit': 0}, 'summary')
+        if 'cashFlow' in widgets:
+            add('cashFlow', (RollupService.cash_flow, *period), [], 'cashFlow')
+        if 'outstandingPayments' in widgets:
+            add('outstandingPayments', (ReceivablesService.bookings, agency_id, None, None, None, OUTSTANDING_LIMIT),
+                ([], None), 'outstandingPayments')
+        if 'topCustomers' in widgets:
+            add('topCustomers', (ReportService.top_customers, agency_id), [], 'topCustomers')
+        if 'expensesBreakdown' in widgets:
+            add('expensesBreakdown', (RollupService.expenses_by_title, *period), [], 'expensesBreakdown')
+        if 'revenueByService' in widgets:
+            add('visaSales', (ReportService.visa_sales, *period), 0, 'revenueByService')
+            add('ticketSales', (ReportService.ticket_sales, *period), 0, 'revenueByService')
+        if 'tasks' in widgets:
+            add('visaFollowUps', (ReportService.visa_follow_ups, agency_id), [], 'tasks')
+            add('expiringPassports', (ReportService.expiring_passports, agency_id), [], 'tasks')
+
+        results, failed = QueryExecutor.run(jobs, fallbacks)
+        partial = [w for w in widgets if any(w in feeds[name] for name in failed)]
+
+        facets = results.get('facets', {})
+
+        data = {}
+        if 'summary' in widgets:
+            data['summary'] = ReportService.summary(results['totals'], facets)
+        if 'cashFlow' in widgets:
+            data['cashFlow'] = results['cashFlow']
+        if 'revenueByService' in widgets:
+            data['revenueByService'] = ReportService.revenue_by_service(
+                facets, results['visaSales'], results['ticketSales'])
+        if 'outstandingPayments' in widgets:
+            data['outstandingPayments'] = results['outstandingPayments'][0]
+        if 'topCustomers' in widgets:
+            data['topCustomers'] = results['topCustomers']
+        if 'expensesBreakdown' in widgets:
+            data['expensesBreakdown'] = results['expensesBreakdown']
+        if 'tasks' in widgets:
+            data['tasks'] = {
+                'visaFollowUps': results['visaFollowUps'],
+                'duePayments': mongo_to_dict(facets['duePayments']),
+                'expiringPassports': results['expiringPassports']
+            }
+        return data, partial
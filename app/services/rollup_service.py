@@ -0,0 +1,163 @@
+"""
+Daily financial rollups
+Keeps DailyAgencyRollup in sync with ledger, expense and agent writes and
+serves the report totals from it.
+"""
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from pymongo.errors import DuplicateKeyError
+from app.utils.batch_loader import ref_id
+from models.daily_agency_rollup import DailyAgencyRollup
+
+
+class RollupService:
+    @staticmethod
+    def day_of(value):
+        """Truncate a datetime to midnight (the rollup key)"""
+        value = value or datetime.utcnow()
+        return datetime(value.year, value.month, value.day)
+
+    @staticmethod
+    def escape_key(title):
+        """Titles become document keys; '.' and a leading '$' are not allowed there"""
+        key = (title or 'Untitled').replace('.', '．')
+        if key.startswith('$'):
+            key = '＄' + key[1:]
+        return key
+
+    @staticmethod
+    def unescape_key(key):
+        return key.replace('．', '.').replace('＄', '$')
+
+    @staticmethod
+    def money(value):
+        """Round like DecimalField(precision=2) does before it stores the value"""
+        return float(Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+    # ------------------------------------------------------------------
+    # Contributions: what a single document adds to its day's rollup
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _contribution(agency, when, amounts):
+        return {
+            'agencyId': ref_id(agency),
+            'day': RollupService.day_of(when),
+            'amounts': {k: RollupService.money(v) for k, v in amounts.items() if v}
+        }
+
+    @staticmethod
+    def ledger_contribution(entry):
+        field = 'credit' if entry.type == 'Credit' else 'debit'
+        return RollupService._contribution(entry.agencyId, entry.date, {field: entry.amount})
+
+    @staticmethod
+    def expense_contribution(expense):
+        return RollupService._contribution(expense.agencyId, expense.expense_date, {
+            'miscExpenses': expense.amount,
+            'expensesByTitle.' + RollupService.escape_key(expense.title): expense.amount
+        })
+
+    @staticmethod
+    def agent_contribution(agent):
+        return RollupService._contribution(agent.created_by_agency, agent.created_at, {
+            'agentPayments': agent.amount_paid or 0
+        })
+
+    @staticmethod
+    def apply(contribution, sign=1):
+        """Atomically $inc the day's rollup row (upserting it if needed)"""
+        if not contribution or not contribution['amounts']:
+            return
+        update = {
+            '$inc': {field: sign * amount for field, amount in contribution['amounts'].items()},
+            '$set': {'updatedAt': datetime.utcnow()}
+        }
+        query = {'agencyId': contribution['agencyId'], 'day': contribution['day']}
+        collection = DailyAgencyRollup._get_collection()
+        try:
+            collection.update_one(query, update, upsert=True)
+        except DuplicateKeyError:
+            # Lost the race to create the row; it exists now
+            collection.update_one(query, update)
+
+    @staticmethod
+    def replace(before, after):
+        """Move a document's contribution after an update"""
+        RollupService.apply(before, -1)
+        RollupService.apply(after, 1)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _match(agency_id, start_date=None, end_date=None):
+        match = {'agencyId': ref_id(agency_id)}
+        day_range = {}
+        if start_date:
+            day_range['$gte'] = RollupService.day_of(start_date)
+        if end_date:
+            day_range['$lte'] = RollupService.day_of(end_date)
+        if day_range:
+            match['day'] = day_range
+        return match
+
+    @staticmethod
+    def totals(agency_id, start_date=None, end_date=None):
+        """
+        Sum the rollup rows in a date range (day granularity).
+
+        Returns:
+            dict: {'credit', 'debit', 'agentPayments', 'miscExpenses', 'totalDebit'}
+        """
+        pipeline = [
+            {'$match': RollupService._match(agency_id, start_date, end_date)},
+            {'$group': {
+                '_id': None,
+                'credit': {'$sum': '$credit'},
+                'debit': {'$sum': '$debit'},
+                'agentPayments': {'$sum': '$agentPayments'},
+                'miscExpenses': {'$sum': '$miscExpenses'}
+            }}
+        ]
+        rows = list(DailyAgencyRollup.objects.aggregate(*pipeline))
+        row = rows[0] if rows else {}
+        totals = {
+            key: round(float(row.get(key) or 0), 2)
+            for key in ('credit', 'debit', 'agentPayments', 'miscExpenses')
+        }
+        totals['totalDebit'] = round(totals['debit'] + totals['agentPayments'] + totals['miscExpenses'], 2)
+        return totals
+
+    @staticmethod
+    def cash_flow(agency_id, start_date=None, end_date=None):
+        """Ledger credit/debit per day, oldest first"""
+        rows = DailyAgencyRollup.objects(
+            __raw__=RollupService._match(agency_id, start_date, end_date)
+        ).only('day', 'credit', 'debit').order_by('day')
+
+        data = []
+        for row in rows:
+            credit = round(row.credit or 0, 2)
+            debit = round(row.debit or 0, 2)
+            if credit or debit:
+                data.append({'date': row.day.strftime('%Y-%m-%d'), 'Credit': credit, 'Debit': debit})
+        return data
+
+    @staticmethod
+    def expenses_by_title(agency_id, start_date=None, end_date=None):
+        """Misc expense totals per title"""
+        rows = DailyAgencyRollup.objects(
+            __raw__=RollupService._match(agency_id, start_date, end_date)
+        ).only('expensesByTitle')
+
+        totals = {}
+        for row in rows:
+            for key, amount in (row.expensesByTitle or {}).items():
+                totals[key] = totals.get(key, 0) + (amount or 0)
+
+        return [
+            {'name': RollupService.unescape_key(key), 'value': round(total, 2)}
+            for key, total in totals.items() if round(total, 2)
+        ]
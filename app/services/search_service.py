@@ -0,0 +1,233 @@
+"""
+Tenant search index
+Customers, bookings, agents and agent profiles are mirrored into
+search_entries as normalized tokens: every whole value ("terms") plus its
+prefixes. A query becomes a handful of tokens matched with $all on the
+(agencyId, tokens, kind) index, so lookups are equality probes instead of
+case-insensitive regex scans.
+
+API handlers call SearchService.index(doc) after saving a source document
+and SearchService.remove(doc) after deleting one. Index writes never fail
+the request; scripts/rebuild_search_index.py rebuilds the collection.
+"""
+import re
+from datetime import datetime
+from pymongo import UpdateOne
+from app.utils.batch_loader import ref_id
+from app.utils.logger import get_logger
+from models.search_entry import SearchEntry
+from models.customer import Customer
+from models.booking import Booking
+from models.agent import Agent
+from models.agent_profile import AgentProfile
+
+logger = get_logger(__name__)
+
+MIN_PREFIX = 1
+MAX_TOKEN = 24
+MAX_CANDIDATES = 200
+
+# kind -> how to index a source document
+SOURCES = {
+    'customer': {
+        'document': Customer, 'agency': 'agencyId', 'title': 'fullName', 'subtitle': 'phone',
+        'words': ['fullName'], 'codes': ['phone', 'cnic', 'passportNumber']
+    },
+    'booking': {
+        'document': Booking, 'agency': 'agencyId', 'title': 'bookingNumber', 'subtitle': 'pnr',
+        'words': [], 'codes': ['bookingNumber', 'pnr']
+    },
+    'agent': {
+        'document': Agent, 'agency': 'created_by_agency', 'title': 'agent_name', 'subtitle': 'mobile_number',
+        'words': ['agent_name', 'source_name'], 'codes': ['mobile_number', 'source_cnic_number', 'slip_number']
+    },
+    'agent_profile': {
+        'document': AgentProfile, 'agency': 'agencyId', 'title': 'name', 'subtitle': 'mobile_number',
+        'words': ['name', 'source_name'], 'codes': ['mobile_number', 'cnic']
+    }
+}
+KIND_BY_DOCUMENT = {source['document']: kind for kind, source in SOURCES.items()}
+
+
+def words(value):
+    """'Muhammad  Ali-Khan' -> ['muhammad', 'ali', 'khan']"""
+    return re.sub(r'[\W_]+', ' ', str(value or '').lower()).split()
+
+
+def compact(value):
+    """Identifiers lose their separators: '+92 300-1234567' -> '923001234567'"""
+    return ''.join(words(value))
+
+
+def code_terms(value):
+    """The whole identifier, its parts, and for +92 numbers the local 03xx form"""
+    whole = compact(value)
+    if not whole:
+        return []
+    terms = [whole] + words(value)
+    if whole.startswith('92') and len(whole) == 12 and whole.isdigit():
+        terms.append('0' + whole[2:])
+    return terms
+
+
+def query_terms(q):
+    """Whitespace-separated query terms, compacted and clipped to MAX_TOKEN"""
+    terms = []
+    for chunk in str(q or '').split():
+        term = compact(chunk)[:MAX_TOKEN]
+        if len(term) >= MIN_PREFIX and term not in terms:
+            terms.append(term)
+    return terms
+
+
+class SearchService:
+    @staticmethod
+    def entry(kind, raw):
+        """Index fields for a source document given as a raw pymongo dict"""
+        source = SOURCES[kind]
+        fields = source['document']._fields
+        value = lambda name: raw.get(fields[name].db_field)
+
+        terms = []
+        for name in source['words']:
+            terms.extend(words(value(name)))
+        for name in source['codes']:
+            terms.extend(code_terms(value(name)))
+        terms = list(dict.fromkeys(term[:MAX_TOKEN] for term in terms))
+
+        tokens = set()
+        for term in terms:
+            tokens.update(term[:length] for length in range(MIN_PREFIX, len(term) + 1))
+
+        return {
+            'agencyId': ref_id(value(source['agency'])),
+            'kind': kind,
+            'refId': raw['_id'],
+            'title': value(source['title']),
+            'subtitle': value(source['subtitle']),
+            'terms': terms,
+            'tokens': sorted(tokens),
+            'updatedAt': datetime.utcnow()
+        }
+
+    @staticmethod
+    def operation(kind, raw):
+        entry = SearchService.entry(kind, raw)
+        if entry['agencyId'] is None:
+            return None
+        return UpdateOne({'kind': kind, 'refId': entry['refId']}, {'$set': entry}, upsert=True)
+
+    @staticmethod
+    def index(doc):
+        """Add or refresh the entry for a saved source document"""
+        kind = KIND_BY_DOCUMENT[type(doc)]
+        try:
+            operation = SearchService.operation(kind, doc.to_mongo().to_dict())
+            if operation:
+                SearchEntry._get_collection().bulk_write([operation])
+        except Exception:
+            logger.exception("Failed to index %s %s", kind, doc.pk)
+
+    @staticmethod
+    def remove(doc):
+        """Drop the entry of a deleted source document"""
+        kind = KIND_BY_DOCUMENT[type(doc)]
+        try:
+            SearchEntry._get_collection().delete_one({'kind': kind, 'refId': doc.pk})
+        except Exception:
+            logger.exception("Failed to remove %s %s from the search index", kind, doc.pk)
+
+    @staticmethod
+    def rebuild(kind, batch_size=1000):
+        """Re-index every document of one kind; returns how many were written"""
+        source = SOURCES[kind]
+        collection = SearchEntry._get_collection()
+        ops = []
+        written = 0
+        for raw in source['document']._get_collection().find():
+            operation = SearchService.operation(kind, raw)
+            if operation:
+                ops.append(operation)
+            if len(ops) >= batch_size:
+                collection.bulk_write(ops, ordered=False)
+                written += len(ops)
+                ops = []
+        if ops:
+            collection.bulk_write(ops, ordered=False)
+            written += len(ops)
+        return written
+
+    @staticmethod
+    def score(terms, row):
+        """3 per term equal to a whole value, 2 if it starts the title, else 1"""
+        title = words(row.get('title'))
+        score = 0
+        for term in terms:
+            if term in row.get('terms', []):
+                score += 3
+            elif title and title[0].startswith(term):
+                score += 2
+            else:
+                score += 1
+        return score
+
+    @staticmethod
+    def search(agency_id, q, kinds=None, limit=20):
+        """
+        Ranked matches for a query within one agency.
+
+        Args:
+            agency_id: tenant to search
+            q: free-text query; every term must prefix-match some indexed value
+            kinds: optional list of kinds to restrict to
+            limit: number of results returned
+
+        Returns:
+            list: [{'type', 'id', 'title', 'subtitle', 'score'}], best first
+        """
+        terms = query_terms(q)
+        if not terms:
+            return []
+
+        match = {'agencyId': ref_id(agency_id), 'tokens': {'$all': terms}}
+        if kinds:
+            match['kind'] = {'$in': list(kinds)}
+        projection = {'kind': 1, 'refId': 1, 'title': 1, 'subtitle': 1, 'terms': 1}
+        cap = max(limit, MAX_CANDIDATES)
+        collection = SearchEntry._get_collection()
+
+        # Whole-value hits outrank prefix hits, so fetch them first: a common
+        # prefix must not push an exact phone or passport match past the cap
+        rows = list(collection.find(dict(match, terms={'$in': terms}), projection).limit(cap))
+        seen = {row['_id'] for row in rows}
+        for row in collection.find(match, projection).limit(cap + len(rows)):
+            if len(rows) >= cap:
+                break
+            if row['_id'] not in seen:
+                rows.append(row)
+
+        for row in rows:
+            row['score'] = SearchService.score(terms, row)
+        rows.sort(key=lambda row: (-row['score'], str(row.get('title') or '')))
+        return [{
+            'type': row['kind'],
+            'id': str(row['refId']),
+            'title': row.get('title'),
+            'subtitle': row.get('subtitle'),
+            'score': row['score']
+        } for row in rows[:limit]]
+
+    @staticmethod
+    def ids(agency_id, kind, q):
+        """
+        ObjectIds of every document of one kind matching a query, for
+        filtering list endpoints. Not capped or ranked: the list applies its
+        own order and paging to the full match set.
+        """
+        terms = query_terms(q)
+        if not terms:
+            return []
+        rows = SearchEntry._get_collection().find(
+            {'agencyId': ref_id(agency_id), 'tokens': {'$all': terms}, 'kind': kind}, {'refId': 1}
+        )
+        return [row['refId'] for row in rows]
@@ -0,0 +1,118 @@
+"""
+Per-agency document number sequences
+Numbers like BK-2024-0042 come from an atomic $inc on the counters
+collection, so generation is O(1) and concurrent requests never receive the
+same number.
+
+With SEQUENCE_BLOCK_SIZE > 1 each worker process reserves a block of
+numbers per counter in one round trip and hands them out locally. Numbers
+stay unique but are no longer strictly in creation order across workers,
+and unused numbers in a block are skipped when the process exits.
+"""
+import os
+import re
+import threading
+from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.utils.batch_loader import ref_id
+from models.counter import Counter
+
+BLOCK_SIZE = max(1, int(os.getenv('SEQUENCE_BLOCK_SIZE', '1')))
+
+
+def _numbered_documents():
+    # prefix -> (model, number field) used to seed a new counter from existing data
+    from models.booking import Booking
+    from models.quotation import Quotation
+    return {
+        'BK': (Booking, 'bookingNumber'),
+        'QT': (Quotation, 'quoteNumber')
+    }
+
+
+class SequenceService:
+    _blocks = {}  # (agency, prefix, year) -> [next value, last value]
+    _blocks_pid = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _key(agency_id, prefix, year):
+        return {'agencyId': ref_id(agency_id), 'prefix': prefix, 'year': year}
+
+    @staticmethod
+    def existing_max(agency_id, prefix, year):
+        """Highest NNNN already used as <prefix>-<year>-NNNN (0 if none)"""
+        documents = _numbered_documents()
+        if prefix not in documents:
+            return 0
+        model, field = documents[prefix]
+        pattern = re.compile(rf'^{re.escape(prefix)}-{year}-(\d+)$')
+        highest = 0
+        query = model.objects(agencyId=agency_id, **{f'{field}__startswith': f'{prefix}-{year}-'})
+        for raw in query.only(field).as_pymongo():
+            match = pattern.match(raw.get(field) or '')
+            if match:
+                highest = max(highest, int(match.group(1)))
+        return highest
+
+    @staticmethod
+    def _seed(agency_id, prefix, year):
+        """Create the counter at the highest number already in use (safe to race)"""
+        key = SequenceService._key(agency_id, prefix, year)
+        seed = SequenceService.existing_max(agency_id, prefix, year)
+        try:
+            Counter._get_collection().update_one(
+                key,
+                {'$max': {'value': seed}, '$setOnInsert': {'updatedAt': datetime.utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Another request created it; $max again so the seed still applies
+            Counter._get_collection().update_one(key, {'$max': {'value': seed}})
+
+    @staticmethod
+    def reserve(agency_id, prefix, year, count=1):
+        """
+        Atomically advance a counter by `count`.
+
+        Returns:
+            int: the last value reserved; the block is (value - count, value]
+        """
+        collection = Counter._get_collection()
+        key = SequenceService._key(agency_id, prefix, year)
+        update = {'$inc': {'value': count}, '$set': {'updatedAt': datetime.utcnow()}}
+
+        doc = collection.find_one_and_update(key, update, return_document=ReturnDocument.AFTER)
+        if doc is None:
+            SequenceService._seed(agency_id, prefix, year)
+            doc = collection.find_one_and_update(key, update, return_document=ReturnDocument.AFTER)
+        return doc['value']
+
+    @staticmethod
+    def next_value(agency_id, prefix, year=None):
+        """Next number of an agency's <prefix> sequence for `year` (default: this year)"""
+        year = year or datetime.now().year
+        if BLOCK_SIZE == 1:
+            return SequenceService.reserve(agency_id, prefix, year)
+
+        cache_key = (str(ref_id(agency_id)), prefix, year)
+        with SequenceService._lock:
+            # Blocks reserved before a fork must not be reused by the children
+            if SequenceService._blocks_pid != os.getpid():
+                SequenceService._blocks = {}
+                SequenceService._blocks_pid = os.getpid()
+
+            block = SequenceService._blocks.get(cache_key)
+            if block is None or block[0] > block[1]:
+                last = SequenceService.reserve(agency_id, prefix, year, BLOCK_SIZE)
+                block = SequenceService._blocks[cache_key] = [last - BLOCK_SIZE + 1, last]
+            value = block[0]
+            block[0] += 1
+            return value
+
+    @staticmethod
+    def next_number(agency_id, prefix):
+        """Formatted document number, e.g. BK-2024-0042"""
+        year = datetime.now().year
+        return f"{prefix}-{year}-{SequenceService.next_value(agency_id, prefix, year):04d}"
@@ -0,0 +1,122 @@
+"""
+Ticket-group marketplace search
+Sector/airline filters match each query word as an anchored prefix of some
+word in the multikey sector_search/airline_search arrays ('jed' finds
+'LHE-JED'), so they can use the compound (status, <field>, date,
+available_seats) indexes instead of scanning with an unanchored
+case-insensitive regex. The page, the total and the per-airline,
+per-sector and per-travel-type counts come back from one $facet aggregation.
+"""
+import re
+from datetime import datetime, timedelta
+from app.utils.batch_loader import ref_id
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_query
+from models.ticket_group import TicketGroup, search_tokens
+
+SORT_FIELDS = ('created_at', 'price_per_seat', 'date', 'airline', 'sector')
+FACET_FIELDS = ('airline', 'sector', 'travel_type')
+FACET_LIMIT = 50
+MAX_LIMIT = 100
+
+
+class TicketSearchService:
+    @staticmethod
+    def build_match(args, role, agency_id):
+        """
+        Raw $match for the marketplace listing.
+
+        Args:
+            args: request arguments (sector, airline, travel_type, date, status)
+            role: caller's role ('Public' when anonymous)
+            agency_id: caller's agency (None when anonymous)
+        """
+        match = {}
+        words = []
+        for field in ('sector', 'airline'):
+            # Every query word must start some word of the field
+            for token in search_tokens(args.get(field)):
+                words.append({f'{field}_search': {'$regex': '^' + re.escape(token)}})
+        if words:
+            match['$and'] = words
+        if args.get('travel_type'):
+            match['travel_type'] = args['travel_type']
+
+        date = (args.get('date') or '').strip()
+        if date:
+            try:
+                target_date = datetime.strptime(date, '%Y-%m-%d')
+                match['date'] = {'$gte': target_date, '$lt': target_date + timedelta(days=1)}
+            except ValueError:
+                pass
+
+        if args.get('status'):
+            match['status'] = args['status']
+
+        if role == 'SuperAdmin':
+            return match
+
+        # Everyone else sees open future groups with seats, plus their own agency's groups
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        public = {'status': 'active', 'date': {'$gte': today}, 'available_seats': {'$gt': 0}}
+        owner = ref_id(agency_id)
+        if owner is None:
+            return {'$and': [match, public]} if match else public
+        return {'$and': [match, {'$or': [public, {'agencyId': owner}]}]}
+
+    @staticmethod
+    def search(match, sort_by='created_at', descending=True, page=1, limit=20, cursor=None):
+        """
+        One page of ticket groups with totals and facet counts.
+
+        Pages are addressed either by `page` (skip) or, cheaper for deep
+        pages, by the `cursor` returned with the previous page.
+
+        Returns:
+            dict: {'rows': [raw docs], 'total': int, 'facets': {...}, 'next_cursor': str or None,
+                   'limit': the page size applied (clamped to 1..MAX_LIMIT)}
+
+        Raises:
+            ValueError: if the cursor token is malformed
+        """
+        if sort_by not in SORT_FIELDS:
+            sort_by, descending = 'created_at', True
+        limit = max(1, min(limit, MAX_LIMIT))
+        direction = -1 if descending else 1
+
+        rows = []
+        if cursor:
+            value, pk = decode_cursor(cursor)
+            rows.append({'$match': keyset_query(sort_by, value, pk, descending)})
+        rows.append({'$sort': {sort_by: direction, '_id': direction}})
+        if not cursor and page > 1:
+            rows.append({'$skip': (page - 1) * limit})
+        rows += [
+            {'$limit': limit + 1},
+            {'$project': {'sector_search': 0, 'airline_search': 0}}
+        ]
+
+        facet = {'rows': rows, 'total': [{'$count': 'count'}]}
+        for field in FACET_FIELDS:
+            facet[field] = [{'$sortByCount': f'${field}'}, {'$limit': FACET_LIMIT}]
+
+        pipeline = [{'$match': match}, {'$facet': facet}]
+        result = next(iter(TicketGroup.objects.aggregate(*pipeline)), {})
+
+        page_rows = result.get('rows', [])
+        next_cursor = None
+        if len(page_rows) > limit:
+            page_rows = page_rows[:limit]
+            last = page_rows[-1]
+            next_cursor = encode_cursor(last.get(sort_by), last['_id'])
+
+        total = result.get('total')
+        return {
+            'rows': page_rows,
+            'total': total[0]['count'] if total else 0,
+            'facets': {
+                field: [{'value': b['_id'], 'count': b['count']} for b in result.get(field, [])]
+                for field in FACET_FIELDS
+            },
+            'next_cursor': next_cursor,
+            'limit': limit
+        }
@@ -0,0 +1,94 @@
+"""
+In-process caches for the auth layer
+ClaimsCache keeps verified JWT claims so a repeat token is a dict lookup
+instead of an HMAC check; TTLCache keeps short-lived lookups such as the
+current user document.
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ClaimsCache:
+    """
+    Bounded LRU of verified token claims, keyed by a digest of the token.
+    Entries are dropped when the token's `exp` passes (or after max_age for
+    tokens without one), so an expired token is always re-verified and
+    rejected by jwt.decode.
+    """
+
+    def __init__(self, maxsize=10000, max_age=900):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(secret, token):
+        # The secret is part of the key so a token is never trusted under another key
+        return hashlib.sha256(f"{secret}\x00{token}".encode('utf-8')).digest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, claims = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, key, claims):
+        expires = claims.get('exp') if isinstance(claims.get('exp'), (int, float)) else None
+        expires = min(expires or float('inf'), time.time() + self.max_age)
+        with self._lock:
+            self._entries[key] = (expires, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TTLCache:
+    """Small thread-safe cache whose entries expire `ttl` seconds after being stored"""
+
+    def __init__(self, ttl=30, maxsize=5000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
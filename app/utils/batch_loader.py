@@ -0,0 +1,106 @@
+"""
+Batch reference loading for list endpoints
+Resolves the references of a whole page of documents with one $in query
+per collection instead of one query per row.
+"""
+from bson import ObjectId, DBRef
+from mongoengine.base import BaseDocument
+
+
+def ref_id(value):
+    """
+    Return the ObjectId behind a reference value.
+
+    Accepts a Document, DBRef, ObjectId, string id or an extended-JSON
+    {'$oid': ...} dict. Returns None when there is no usable id.
+    """
+    if value is None:
+        return None
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, DBRef):
+        return value.id
+    if isinstance(value, BaseDocument):
+        return getattr(value, 'pk', None)
+    if isinstance(value, dict):
+        value = value.get('$oid')
+    try:
+        return ObjectId(str(value))
+    except Exception:
+        return None
+
+
+def _raw_value(item, field):
+    # Read documents through _data so the reference is not dereferenced
+    if isinstance(item, BaseDocument):
+        return item._data.get(field)
+    if isinstance(item, dict):
+        return item.get(field)
+    return getattr(item, field, None)
+
+
+def collect_ids(items, *fields):
+    """Distinct referenced ids of the given fields over documents or serialized dicts"""
+    ids = set()
+    for item in items:
+        for field in fields:
+            oid = ref_id(_raw_value(item, field))
+            if oid:
+                ids.add(oid)
+    return ids
+
+
+def load_by_ids(model, ids, *only, **filters):
+    """
+    Load documents by id with a single $in query.
+
+    Args:
+        model: Document class
+        ids: iterable of ids (any form accepted by ref_id)
+        only: optional field names to project
+        filters: extra query filters (e.g. agencyId for tenant scoping)
+
+    Returns:
+        dict: {ObjectId: document}
+    """
+    ids = [oid for oid in {ref_id(i) for i in ids} if oid]
+    if not ids:
+        return {}
+    query = model.objects(id__in=ids, **filters)
+    if only:
+        query = query.only(*only)
+    return {doc.pk: doc for doc in query}
+
+
+def load_refs(items, field, model, *only, **filters):
+    """Resolve one reference field over a page of items; returns {ObjectId: document}"""
+    return load_by_ids(model, collect_ids(items, field), *only, **filters)
+
+
+def load_first_by(model, field, values, *only, **filters):
+    """
+    First matching document per value of `field`, in one query.
+    e.g. the AgencyAdmin user of each agency on a page.
+
+    Returns:
+        dict: {ObjectId: document}
+    """
+    values = [oid for oid in {ref_id(v) for v in values} if oid]
+    if not values:
+        return {}
+    query = model.objects(**{f'{field}__in': values}, **filters).order_by('id')
+    if only:
+        query = query.only(field, *only)
+
+    result = {}
+    for doc in query.no_dereference():
+        key = ref_id(doc._data.get(field))
+        if key not in result:
+            result[key] = doc
+    return result
+
+
+def lookup(mapping, value):
+    """Fetch a loaded document for a reference value (None when missing)"""
+    oid = ref_id(value)
+    return mapping.get(oid) if oid else None
@@ -5,6 +5,9 @@ from flask import current_app
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
 
@@ -34,7 +37,7 @@ def save_file(file, subfolder):
             )
             return upload_result.get('secure_url')
         except Exception as e:
-            print(f"Cloudinary upload failed: {e}")
+            logger.error("Cloudinary upload failed: %s", e)
             return None
     return None
 
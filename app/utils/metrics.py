@@ -0,0 +1,245 @@
+"""
+Request instrumentation
+Per endpoint: wall time, MongoDB command count and time (via a pymongo
+CommandListener), and response size. Exposed as Prometheus histograms at
+/metrics and summarised on every response in a Server-Timing header.
+
+register_command_listener() must run before the MongoClient is created.
+"""
+import os
+import time
+import threading
+import contextvars
+from flask import g, request, Response
+from pymongo import monitoring
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join('{}="{}"'.format(n, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                     for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}')
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time"""
+
+    def __init__(self, name, help, callback, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.callback = callback
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        names = self.labels + ('le',)
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for i, bound in enumerate(self.buckets):
+                    labels = _format_labels(names, key + (_format_value(bound),))
+                    lines.append(f'{self.name}_bucket{labels} {series[i]}')
+                labels = _format_labels(self.labels, key)
+                lines.append(f'{self.name}_sum{labels} {_format_value(float(series[-2]))}')
+                lines.append(f'{self.name}_count{labels} {series[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+LABELS = ('method', 'endpoint')
+REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'Requests handled', LABELS + ('status',)))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Wall time per request', DURATION_BUCKETS, LABELS))
+DB_COMMANDS = REGISTRY.register(Histogram(
+    'http_request_db_commands', 'MongoDB commands issued per request', COUNT_BUCKETS, LABELS))
+DB_DURATION = REGISTRY.register(Histogram(
+    'http_request_db_duration_seconds', 'Time spent in MongoDB commands per request', DURATION_BUCKETS, LABELS))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    'http_response_size_bytes', 'Response body size (before compression)', SIZE_BUCKETS, LABELS))
+
+
+# ----------------------------------------------------------------------
+# MongoDB command accounting
+# ----------------------------------------------------------------------
+
+class RequestStats:
+    """DB work done on behalf of one request (shared by threads that copy its context)"""
+
+    def __init__(self):
+        self.commands = 0
+        self.db_micros = 0
+        self._lock = threading.Lock()
+
+    def add(self, duration_micros):
+        with self._lock:
+            self.commands += 1
+            self.db_micros += duration_micros
+
+
+_current_stats = contextvars.ContextVar('request_db_stats', default=None)
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    """Attributes each finished command to the request active in the calling context"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add(event.duration_micros)
+
+    def failed(self, event):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add(event.duration_micros)
+
+
+_listener_registered = False
+
+
+def register_command_listener():
+    global _listener_registered
+    if not _listener_registered:
+        monitoring.register(CommandStatsListener())
+        _listener_registered = True
+
+
+# ----------------------------------------------------------------------
+# Flask hooks
+# ----------------------------------------------------------------------
+
+def _endpoint_label():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def init_app(app):
+    """Install the before/after request hooks and the /metrics route"""
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_start = time.perf_counter()
+        g._metrics_token = _current_stats.set(RequestStats())
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = getattr(g, '_metrics_start', None)
+        stats = _current_stats.get()
+        if start is None or stats is None:
+            return response
+
+        elapsed = time.perf_counter() - start
+        db_seconds = stats.db_micros / 1e6
+        labels = (request.method, _endpoint_label())
+
+        REQUESTS.inc(*labels, response.status_code)
+        REQUEST_DURATION.observe(elapsed, *labels)
+        DB_COMMANDS.observe(stats.commands, *labels)
+        DB_DURATION.observe(db_seconds, *labels)
+        size = response.calculate_content_length()
+        if size is not None:
+            RESPONSE_SIZE.observe(size, *labels)
+
+        response.headers.add('Server-Timing', 'app;dur={:.1f}, db;dur={:.1f};desc="{} queries"'.format(
+            elapsed * 1000, db_seconds * 1000, stats.commands))
+        return response
+
+    @app.teardown_request
+    def _reset_request_stats(exc):
+        token = g.pop('_metrics_token', None)
+        if token is not None:
+            try:
+                _current_stats.reset(token)
+            except ValueError:
+                # Torn down from a different context; the value dies with it
+                pass
+
+    @app.route('/metrics')
+    def metrics():
+        # Optional shared secret for scrapers: METRICS_TOKEN=<token>, sent as a Bearer token
+        expected = os.getenv('METRICS_TOKEN')
+        if expected and request.headers.get('Authorization') != f'Bearer {expected}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
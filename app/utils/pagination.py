@@ -0,0 +1,110 @@
+"""
+Keyset (cursor) pagination for list endpoints
+Pages are fetched with a range query on (sort field, _id) instead of skip(),
+so every page costs one index seek regardless of how deep the caller is.
+
+The response body stays a plain JSON array; the token for the next page is
+returned in the X-Next-Cursor header and sent back as ?cursor=<token>.
+"""
+import base64
+import binascii
+from flask import request, jsonify
+from bson import json_util
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(value, pk):
+    """Opaque token for the position after (value, pk)"""
+    raw = json_util.dumps([value, pk]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; raises ValueError on a malformed token"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, pk = json_util.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    return value, pk
+
+
+def page_size(limit=None):
+    """Parse the ?limit= argument, falling back to the default page size"""
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_query(field, value, pk, descending=True):
+    """
+    Raw filter selecting documents strictly after (value, pk) in
+    (field, _id) order. Missing/null values sort lowest in MongoDB, so they
+    come last in descending order and first in ascending order.
+    """
+    op = '$lt' if descending else '$gt'
+    if value is None:
+        after_nulls = {field: None, '_id': {op: pk}}
+        if descending:
+            return after_nulls
+        return {'$or': [after_nulls, {field: {'$ne': None}}]}
+
+    clauses = [
+        {field: {op: value}},
+        {field: value, '_id': {op: pk}}
+    ]
+    if descending:
+        clauses.append({field: None})
+    return {'$or': clauses}
+
+
+def paginate(queryset, sort_field, descending=True, cursor=None, limit=None):
+    """
+    Fetch one page of a queryset in (sort_field, _id) order.
+
+    Args:
+        queryset: filtered MongoEngine QuerySet (any existing ordering is replaced)
+        sort_field: document field to page on, e.g. 'createdAt'
+        descending: newest first when True
+        cursor: token from the previous page (defaults to ?cursor=)
+        limit: page size (defaults to ?limit=, then DEFAULT_PAGE_SIZE)
+
+    Returns:
+        tuple: (list of raw pymongo dicts, next cursor token or None)
+
+    Raises:
+        ValueError: if the cursor token is malformed
+    """
+    if cursor is None:
+        cursor = request.args.get('cursor')
+    limit = page_size(limit if limit is not None else request.args.get('limit'))
+
+    db_field = queryset._document._fields[sort_field].db_field
+    direction = '-' if descending else '+'
+    queryset = queryset.order_by(direction + sort_field, direction + 'id')
+
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        queryset = queryset.filter(__raw__=keyset_query(db_field, value, pk, descending))
+
+    rows = list(queryset.limit(limit + 1).as_pymongo())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.get(db_field), last['_id'])
+    return rows, next_cursor
+
+
+def paginated_response(data, next_cursor, status=200):
+    """jsonify a page, exposing the next cursor (if any) as a header"""
+    response = jsonify(data)
+    response.status_code = status
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
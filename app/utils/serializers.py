@@ -1,6 +1,14 @@
 import json
+import calendar
 
 from datetime import datetime
+from decimal import Decimal
+from bson import ObjectId, DBRef, Decimal128, json_util
+from bson.json_util import LEGACY_JSON_OPTIONS
+from mongoengine.base import BaseDocument
+from mongoengine.queryset.base import BaseQuerySet
+
+_PASSTHROUGH = (str, int, float, bool, type(None))
 
 def _convert_mongo_types(data):
     """Recursively convert MongoDB ObjectId objects to strings and Date objects to ISO strings"""
@@ -39,34 +47,76 @@ def _convert_mongo_types(data):
     else:
         return data
 
+def _datetime_to_iso(value):
+    """
+    Same output as the legacy extended-JSON round trip: the datetime is
+    truncated to milliseconds and rendered as a naive local-time ISO string.
+    """
+    if value.utcoffset() is not None:
+        value = value - value.utcoffset()
+    millis = calendar.timegm(value.timetuple()) * 1000 + value.microsecond // 1000
+    return datetime.fromtimestamp(millis / 1000.0).isoformat()
+
+def _convert_value(value):
+    """Single-pass conversion of BSON values (SON / raw pymongo dicts) to JSON-ready types"""
+    if type(value) in _PASSTHROUGH:
+        return value
+    if isinstance(value, dict):
+        return {key: _convert_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_convert_value(item) for item in value]
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return _datetime_to_iso(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, DBRef):
+        ref = {'$ref': value.collection, '$id': _convert_value(value.id)}
+        if value.database is not None:
+            ref['$db'] = value.database
+        return ref
+    if isinstance(value, _PASSTHROUGH):
+        return value
+    # Anything exotic (Binary, Regex, ...) takes the extended-JSON route
+    return _convert_mongo_types(json.loads(json_util.dumps(value, json_options=LEGACY_JSON_OPTIONS)))
+
+def _document_to_dict(raw):
+    result = _convert_value(raw)
+    if '_id' in result:
+        result['id'] = result['_id']
+    return result
+
 def mongo_to_dict(obj):
     """
-    Converts a MongoEngine Document or QuerySet to a dict/list
-    compatible with jsonify (by going through to_json()).
+    Converts a MongoEngine Document, QuerySet or raw pymongo dict to a
+    dict/list compatible with jsonify, in a single pass over to_mongo()
+    SON / as_pymongo() data.
     """
     if obj is None:
         return None
-        
-    # QuerySet or Document
-    if hasattr(obj, 'to_json'):
-        data = json.loads(obj.to_json())
-        result = _convert_mongo_types(data)
-        if isinstance(result, list):
-            for item in result:
-                if isinstance(item, dict) and '_id' in item:
-                    item['id'] = item['_id']
-        elif isinstance(result, dict) and '_id' in result:
-            result['id'] = result['_id']
-        return result
-    
+
+    # QuerySet: read raw dicts straight from the cursor
+    if isinstance(obj, BaseQuerySet):
+        return [_document_to_dict(raw) for raw in obj.as_pymongo()]
+
+    # Document
+    if isinstance(obj, BaseDocument):
+        return _document_to_dict(obj.to_mongo())
+
+    # Raw pymongo document (e.g. aggregation output)
+    if isinstance(obj, dict):
+        return _document_to_dict(obj)
+
     # List of documents
     if isinstance(obj, list):
         data_list = [mongo_to_dict(item) for item in obj]
         # Ensure id is injected for each item if missing
-        if isinstance(data_list, list): # Should always be true
-            for item in data_list:
-                if isinstance(item, dict) and '_id' in item and 'id' not in item:
-                    item['id'] = item['_id']
+        for item in data_list:
+            if isinstance(item, dict) and '_id' in item and 'id' not in item:
+                item['id'] = item['_id']
         return data_list
-        
+
     return obj
@@ -0,0 +1,65 @@
+"""
+Multi-document writes
+MongoEngine 0.28 cannot pass a session to save(), so documents that must be
+written together go through pymongo inside one transaction.
+Transactions need a replica set or mongos; on a standalone server (local
+development, mongomock) the same writes run one after another instead.
+"""
+from bson import ObjectId
+
+TRANSACTION_TOPOLOGIES = ('ReplicaSetWithPrimary', 'Sharded', 'LoadBalanced')
+
+
+def supports_transactions(client):
+    description = getattr(client, 'topology_description', None)
+    return description is not None and description.topology_type_name in TRANSACTION_TOPOLOGIES
+
+
+def run_in_transaction(client, write):
+    """
+    Call write(session) inside a transaction (retried on transient errors),
+    or write(None) when the deployment has no transactions.
+    """
+    if not supports_transactions(client):
+        return write(None)
+    with client.start_session() as session:
+        return session.with_transaction(write)
+
+
+def _prepare(doc):
+    if doc.pk is None:
+        doc.pk = ObjectId()
+    doc.validate()
+
+
+def _mark_saved(doc):
+    doc._created = False
+    doc._clear_changed_fields()
+
+
+def save_document(doc, session=None):
+    """save() through pymongo: validate (running clean()) and write the full document"""
+    _prepare(doc)
+    doc._get_collection().replace_one({'_id': doc.pk}, doc.to_mongo(), upsert=True, session=session)
+    _mark_saved(doc)
+    return doc
+
+
+def insert_together(*documents):
+    """
+    Validate and insert new documents atomically (all or none).
+
+    Ids are assigned up front, so callers can read `doc.id` afterwards as if
+    each document had been saved.
+    """
+    for doc in documents:
+        _prepare(doc)
+
+    def write(session):
+        for doc in documents:
+            doc._get_collection().insert_one(doc.to_mongo(), session=session)
+
+    run_in_transaction(documents[0]._get_db().client, write)
+    for doc in documents:
+        _mark_saved(doc)
+    return documents
@@ -0,0 +1,27 @@
+"""
+Gunicorn settings, loaded automatically when gunicorn is started from the
+repository root (`gunicorn wsgi:app`).
+
+/api/events/stream keeps a response open for up to SSE_MAX_SECONDS. With
+the default sync workers each open EventSource would hold a whole worker
+process and be killed at the 30s timeout, so workers run threads (gthread):
+a stream holds one thread, and the timeout only applies to a worker that
+stops answering gunicorn's heartbeat, not to a long response.
+
+Size WEB_THREADS for the expected open streams per worker plus the normal
+request concurrency.
+
+Environment:
+- PORT: listen port (default 5000)
+- WEB_CONCURRENCY: worker processes (default 2)
+- WEB_THREADS: threads per worker (default 32)
+- WEB_TIMEOUT: seconds before a silent worker is restarted (default 60)
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '32'))
+timeout = int(os.getenv('WEB_TIMEOUT', '60'))
+graceful_timeout = 30
@@ -10,6 +10,12 @@ class ContactInfo(EmbeddedDocument):
     email = StringField()
     address = StringField()
 
+class AgencySnapshot(EmbeddedDocument):
+    """Display details of an agency copied onto posts, ticket groups and ticket bookings"""
+    name = StringField()
+    logoUrl = StringField()
+    phone = StringField()  # Agency admin's mobile number
+
 class Agency(Document):
     name = StringField(required=True)
     status = StringField(choices=('Active', 'Suspended', 'Pending', 'Rejected'), default='Pending')
@@ -20,5 +26,8 @@ class Agency(Document):
     
     meta = {
         'collection': 'agencies',
-        'strict': False
+        'strict': False,
+        'indexes': [
+            {'fields': ['-createdAt', '-id']} # Keyset pagination
+        ]
     }
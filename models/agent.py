@@ -21,7 +21,8 @@ class Agent(Document):
         'strict': False,
         'indexes': [
             {'fields': ['created_by_agency', 'mobile_number']},
-            {'fields': ['created_by_agency', 'agent_name']}
+            {'fields': ['created_by_agency', 'agent_name']},
+            {'fields': ['created_by_agency', '-created_at', '-id']} # Keyset pagination
         ]
     }
 
@@ -5,7 +5,7 @@ from .agency import Agency
 from .customer import Customer
 from .quotation import Quotation
 
-from .package import Package
+from .package import Package, SERVICE_TYPES
 
 class Booking(Document):
     agencyId = ReferenceField(Agency, required=True)
@@ -17,6 +17,7 @@ class Booking(Document):
     
     # Pricing Breakdown
     category = StringField(choices=('Sharing', '4 Bed', '3 Bed', '2 Bed')) # Category selected
+    serviceType = StringField(choices=SERVICE_TYPES, default='Other') # Copied from the package when written
     baseAmount = DecimalField(precision=2, default=Decimal('0.00')) # Price from package
     discount = DecimalField(precision=2, default=Decimal('0.00'))   # Discount given
     totalAmount = DecimalField(precision=2, required=True) # Final amount after discount
@@ -34,7 +35,11 @@ class Booking(Document):
     meta = {
         'collection': 'bookings',
         'indexes': [
-            {'fields': ['agencyId', 'bookingNumber'], 'unique': True}
+            {'fields': ['agencyId', 'bookingNumber'], 'unique': True},
+            {'fields': ['agencyId', '-createdAt', '-id']}, # Keyset pagination
+            # Only unpaid bookings: receivables aging and drill-down
+            {'fields': ['agencyId', 'createdAt', 'id'], 'name': 'unpaid_by_age',
+             'partialFilterExpression': {'balanceDue': {'$gt': 0}}}
         ]
     }
     
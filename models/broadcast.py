@@ -0,0 +1,33 @@
+from mongoengine import Document, ReferenceField, StringField, DateTimeField, DictField, ListField, ObjectIdField
+from datetime import datetime
+from models.user import User
+
+class Broadcast(Document):
+    """
+    A notification addressed to every user with one of `audienceRoles`.
+    Stored once and merged with personal notifications at read time.
+    """
+    type = StringField(required=True)
+    title = StringField(required=True)
+    message = StringField(required=True)
+    data = DictField()
+    audienceRoles = ListField(StringField())
+    excludeUser = ReferenceField(User)  # Usually the author
+    createdAt = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'broadcasts',
+        'indexes': [
+            {'fields': ['-createdAt', '-id']}
+        ]
+    }
+
+class BroadcastReadState(Document):
+    """Per-user read watermark for broadcasts"""
+    user = ReferenceField(User, required=True, unique=True)
+    readUpTo = DateTimeField()            # Everything created at or before this is read
+    readIds = ListField(ObjectIdField())  # Newer broadcasts read one by one
+
+    meta = {
+        'collection': 'broadcast_read_states'
+    }
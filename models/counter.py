@@ -0,0 +1,21 @@
+from mongoengine import Document, ReferenceField, StringField, IntField, DateTimeField
+from datetime import datetime
+from .agency import Agency
+
+class Counter(Document):
+    """
+    Per-agency yearly sequence (e.g. the NNNN in BK-2024-NNNN).
+    Incremented atomically by SequenceService; never decremented.
+    """
+    agencyId = ReferenceField(Agency, required=True)
+    prefix = StringField(required=True) # 'BK', 'QT'
+    year = IntField(required=True)
+    value = IntField(default=0)         # Last number handed out
+    updatedAt = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'counters',
+        'indexes': [
+            {'fields': ['agencyId', 'prefix', 'year'], 'unique': True}
+        ]
+    }
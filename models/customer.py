@@ -1,7 +1,18 @@
-from mongoengine import Document, StringField, ReferenceField, DateTimeField
+from mongoengine import Document, EmbeddedDocument, StringField, ReferenceField, DateTimeField, FloatField, IntField, EmbeddedDocumentField
 from datetime import datetime
 from .agency import Agency
 
+class CustomerSummary(EmbeddedDocument):
+    """
+    Account totals over the customer's non-cancelled bookings, kept current
+    with $inc by CustomerSummaryService on booking and ledger writes.
+    """
+    totalSpend = FloatField(default=0.0)          # Sum of totalAmount
+    bookingCount = IntField(default=0)
+    outstandingBalance = FloatField(default=0.0)  # Sum of balanceDue
+    lastBookingAt = DateTimeField()
+    lastPaymentAt = DateTimeField()
+
 class Customer(Document):
     agencyId = ReferenceField(Agency, required=True)
     fullName = StringField(required=True)
@@ -20,12 +31,14 @@ class Customer(Document):
     customer_photo = StringField() # Legacy/Alternate photo field
     passport_attachment = StringField()
     createdAt = DateTimeField(default=datetime.utcnow)
+    summary = EmbeddedDocumentField(CustomerSummary, default=CustomerSummary)
     
     meta = {
         'collection': 'customers',
         'strict': False,
         'indexes': [
             {'fields': ['agencyId', 'phone'], 'unique': True},
-            {'fields': ['agencyId', 'passportNumber']}
+            {'fields': ['agencyId', 'passportNumber']},
+            {'fields': ['agencyId', '-summary.totalSpend']} # Top customers
         ]
     }
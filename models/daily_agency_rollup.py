@@ -0,0 +1,28 @@
+from mongoengine import Document, ReferenceField, DateTimeField, FloatField, DictField
+from datetime import datetime
+from .agency import Agency
+
+class DailyAgencyRollup(Document):
+    """
+    Per-agency, per-day financial totals, maintained incrementally by
+    RollupService on every ledger, expense and agent write.
+    """
+    agencyId = ReferenceField(Agency, required=True)
+    day = DateTimeField(required=True) # Midnight UTC of the day
+
+    credit = FloatField(default=0.0)        # Ledger Credit entries
+    debit = FloatField(default=0.0)         # Ledger Debit entries
+    agentPayments = FloatField(default=0.0) # Agent.amount_paid
+    miscExpenses = FloatField(default=0.0)  # MiscellaneousExpense.amount
+
+    # Misc expense totals keyed by (escaped) title, for the expenses breakdown
+    expensesByTitle = DictField()
+
+    updatedAt = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'daily_agency_rollups',
+        'indexes': [
+            {'fields': ['agencyId', 'day'], 'unique': True}
+        ]
+    }
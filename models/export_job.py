@@ -0,0 +1,38 @@
+from mongoengine import Document, ReferenceField, StringField, DateTimeField, IntField
+from datetime import datetime
+from .agency import Agency
+from .user import User
+
+class ExportJob(Document):
+    """
+    A queued report/export render. The collection doubles as the job broker:
+    workers claim 'Queued' jobs atomically with find_one_and_update.
+    """
+    agencyId = ReferenceField(Agency, required=True)
+    requestedBy = ReferenceField(User)
+
+    kind = StringField(choices=('bookings', 'ledger'), required=True)
+    format = StringField(choices=('pdf', 'csv', 'excel'), default='pdf')
+    status = StringField(choices=('Queued', 'Running', 'Completed', 'Failed'), default='Queued')
+
+    fileName = StringField()  # Download name, e.g. bookings_20240101.pdf
+    filePath = StringField()  # Rendered artifact inside EXPORT_DIR
+    rowCount = IntField(default=0)
+    error = StringField()
+
+    workerId = StringField()  # host:pid of the claiming worker
+    attempts = IntField(default=0)
+
+    createdAt = DateTimeField(default=datetime.utcnow)
+    startedAt = DateTimeField()
+    finishedAt = DateTimeField()
+    expiresAt = DateTimeField()  # Artifact (and job) removed after this
+
+    meta = {
+        'collection': 'export_jobs',
+        'indexes': [
+            {'fields': ['status', 'createdAt']},
+            {'fields': ['agencyId', '-createdAt']},
+            {'fields': ['expiresAt'], 'expireAfterSeconds': 0}
+        ]
+    }
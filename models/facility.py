@@ -50,7 +50,8 @@ class Facility(Document):
     meta = {
         'collection': 'facilities',
         'indexes': [
-            {'fields': ['agencyId']}
+            {'fields': ['agencyId']},
+            {'fields': ['agencyId', '-createdAt', '-id']} # Keyset pagination
         ]
     }
 
@@ -1,9 +1,14 @@
-from mongoengine import Document, StringField, DecimalField, DateTimeField, ReferenceField
+from mongoengine import Document, EmbeddedDocument, StringField, DecimalField, DateTimeField, ReferenceField, ListField, EmbeddedDocumentField
 from datetime import datetime
 from .agency import Agency
 from .booking import Booking
 from .customer import Customer
 
+class Allocation(EmbeddedDocument):
+    """Part of a Credit applied to one booking's paidAmount"""
+    bookingId = ReferenceField(Booking, required=True)
+    amount = DecimalField(precision=2, required=True)
+
 class LedgerEntry(Document):
     agencyId = ReferenceField(Agency, required=True)
     bookingId = ReferenceField(Booking)
@@ -17,10 +22,14 @@ class LedgerEntry(Document):
     
     slip_number = StringField()
     slip_attachment = StringField() # Path to file
+
+    # Exactly what this Credit added to each booking (reversed on edit/delete)
+    allocations = ListField(EmbeddedDocumentField(Allocation))
     
     meta = {
         'collection': 'ledger_entries',
         'indexes': [
-            {'fields': ['agencyId', 'date']}
+            {'fields': ['agencyId', 'date']},
+            {'fields': ['agencyId', '-date', '-id']} # Keyset pagination
         ]
     }
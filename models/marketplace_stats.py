@@ -0,0 +1,18 @@
+from mongoengine import Document, StringField, IntField, DateTimeField
+from datetime import datetime
+
+class MarketplaceStats(Document):
+    """
+    Platform-wide ticket marketplace totals, kept current with $inc by
+    MarketplaceStatsService and periodically reconciled from the raw data.
+    There is a single document with key 'global'.
+    """
+    key = StringField(primary_key=True, default='global')
+    activeTickets = IntField(default=0)  # Sum of available_seats over active ticket groups
+    soldTickets = IntField(default=0)    # Sum of seats_booked over confirmed ticket bookings
+    updatedAt = DateTimeField(default=datetime.utcnow)
+    reconciledAt = DateTimeField()
+
+    meta = {
+        'collection': 'marketplace_stats'
+    }
@@ -12,6 +12,7 @@ class MiscellaneousExpense(Document):
     meta = {
         'collection': 'miscellaneous_expenses',
         'indexes': [
-            {'fields': ['agencyId', 'expense_date']}
+            {'fields': ['agencyId', 'expense_date']},
+            {'fields': ['agencyId', '-expense_date', '-id']} # Keyset pagination
         ]
     }
@@ -0,0 +1,30 @@
+from mongoengine import Document, StringField, DictField, IntField, DateTimeField
+from datetime import datetime
+
+class OutboxEvent(Document):
+    """
+    An event waiting to be delivered to an external system (e.g. the n8n
+    webhook). Written in the same transaction as the change that caused it;
+    OutboxService delivers it in the background.
+    """
+    topic = StringField(required=True)  # 'n8n'
+    payload = DictField()
+    status = StringField(choices=('Pending', 'Delivering', 'Delivered', 'Dead'), default='Pending')
+
+    attempts = IntField(default=0)
+    nextAttemptAt = DateTimeField(default=datetime.utcnow)
+    lastError = StringField()
+    workerId = StringField()  # host:pid of the delivering dispatcher
+
+    createdAt = DateTimeField(default=datetime.utcnow)
+    claimedAt = DateTimeField()
+    deliveredAt = DateTimeField()
+    expiresAt = DateTimeField()  # Delivered events are removed after this
+
+    meta = {
+        'collection': 'outbox_events',
+        'indexes': [
+            {'fields': ['status', 'nextAttemptAt']},
+            {'fields': ['expiresAt'], 'expireAfterSeconds': 0}
+        ]
+    }
@@ -3,11 +3,26 @@ from datetime import datetime
 from .agency import Agency
 from .facility import Facility
 
+# Revenue categories for package bookings (visas and tickets have their own models)
+SERVICE_TYPES = ('Umrah', 'Ziarat', 'Other')
+
+
+def classify_service(name):
+    """Service type implied by a package name: 'Umrah Deluxe 14 Days' -> 'Umrah'"""
+    name = (name or '').lower()
+    if 'umrah' in name:
+        return 'Umrah'
+    if 'ziarat' in name:
+        return 'Ziarat'
+    return 'Other'
+
+
 class Package(Document):
     agencyId = ReferenceField(Agency, required=True)
     facilityId = ReferenceField(Facility)  # Reference to Facility for Moaleem data
     name = StringField(required=True)
     description = StringField()
+    serviceType = StringField(choices=SERVICE_TYPES)  # Derived from the name unless set; copied onto bookings
     
     # Dates & Duration
     startDate = DateTimeField()
@@ -25,6 +40,15 @@ class Package(Document):
     meta = {
         'collection': 'packages',
         'indexes': [
-            {'fields': ['agencyId', 'name']}
+            {'fields': ['agencyId', 'name']},
+            {'fields': ['agencyId', '-createdAt', '-id']} # Keyset pagination
         ]
     }
+
+    def clean(self):
+        if not self.serviceType:
+            self.serviceType = classify_service(self.name)
+
+    def service_type(self):
+        """serviceType, also for packages saved before the field existed"""
+        return self.serviceType or classify_service(self.name)
@@ -0,0 +1,22 @@
+from mongoengine import Document, StringField, IntField, FloatField, DateTimeField, DictField, ListField
+from datetime import datetime
+
+class PlatformMetrics(Document):
+    """
+    SuperAdmin dashboard snapshot, recomputed from the raw collections by
+    PlatformMetricsService every PLATFORM_METRICS_REFRESH_MINUTES.
+    There is a single document with key 'global'.
+    """
+    key = StringField(primary_key=True, default='global')
+    agencies = DictField()          # {'total': n, <status>: n, ...}
+    totalBookings = IntField(default=0)
+    recentBookings = IntField(default=0)       # Created in the last 30 days
+    recentActiveAgencies = IntField(default=0) # Agencies with a booking in the last 30 days
+    gmv = FloatField(default=0.0)              # totalAmount over non-cancelled bookings
+    recentGmv = FloatField(default=0.0)
+    gmvByAgency = ListField(DictField())       # [{'agencyId', 'name', 'gmv', 'bookings'}], highest first
+    refreshedAt = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'platform_metrics'
+    }
@@ -1,6 +1,6 @@
 from datetime import datetime
 from mongoengine import Document, StringField, ListField, ReferenceField, DateTimeField, EmbeddedDocument, EmbeddedDocumentField, BooleanField
-from .agency import Agency
+from .agency import Agency, AgencySnapshot
 from .user import User
 
 class Comment(EmbeddedDocument):
@@ -12,6 +12,7 @@ class Comment(EmbeddedDocument):
 
 class Post(Document):
     agency = ReferenceField(Agency, required=True)
+    agencySnapshot = EmbeddedDocumentField(AgencySnapshot)  # Kept in sync by AgencySnapshotService
     content = StringField(required=True)
     mediaUrls = ListField(StringField())
     postType = StringField(default='announcement', choices=['visa', 'umrah', 'trick', 'announcement'])
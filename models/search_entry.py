@@ -0,0 +1,28 @@
+from mongoengine import Document, StringField, ReferenceField, ObjectIdField, ListField, DateTimeField
+from datetime import datetime
+from .agency import Agency
+
+class SearchEntry(Document):
+    """
+    One searchable record (customer, booking, agent or agent profile) in an
+    agency's search index, maintained by SearchService whenever the source
+    document is written.
+    """
+    agencyId = ReferenceField(Agency, required=True)
+    kind = StringField(choices=('customer', 'booking', 'agent', 'agent_profile'), required=True)
+    refId = ObjectIdField(required=True)  # _id of the source document
+
+    title = StringField()
+    subtitle = StringField()
+
+    terms = ListField(StringField())   # Whole normalized values, used for ranking
+    tokens = ListField(StringField())  # terms plus their prefixes, matched with $all
+    updatedAt = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'search_entries',
+        'indexes': [
+            {'fields': ['kind', 'refId'], 'unique': True},
+            {'fields': ['agencyId', 'tokens', 'kind']}
+        ]
+    }
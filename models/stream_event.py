@@ -0,0 +1,19 @@
+from mongoengine import Document, StringField, ListField, DictField, DateTimeField
+from datetime import datetime
+
+class StreamEvent(Document):
+    """
+    Change notification for live clients (SSE). The collection is capped so
+    every worker process can tail it; old events fall off automatically.
+    """
+    channels = ListField(StringField())  # e.g. 'agency:<id>', 'user:<id>', 'role:Agent'
+    type = StringField(required=True)    # e.g. 'ticket_booking.created'
+    data = DictField()
+    origin = StringField()               # host:pid of the publisher (skips its own events when tailing)
+    createdAt = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'stream_events',
+        'max_size': 16 * 1024 * 1024,
+        'max_documents': 50000
+    }
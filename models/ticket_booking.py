@@ -1,6 +1,6 @@
 from mongoengine import Document, StringField, ReferenceField, IntField, FloatField, DateTimeField, ListField, EmbeddedDocument, EmbeddedDocumentField, BooleanField
 from datetime import datetime
-from .agency import Agency
+from .agency import Agency, AgencySnapshot
 from .ticket_group import TicketGroup
 
 class Passenger(EmbeddedDocument):
@@ -15,6 +15,8 @@ class Passenger(EmbeddedDocument):
 class TicketBooking(Document):
     agencyId = ReferenceField(Agency, required=True) # The Buyer
     sellerAgencyId = ReferenceField(Agency, required=True) # The Seller (Owner of Group)
+    agencySnapshot = EmbeddedDocumentField(AgencySnapshot) # Buyer details, kept in sync by AgencySnapshotService
+    sellerSnapshot = EmbeddedDocumentField(AgencySnapshot) # Seller details
     ticketGroupId = ReferenceField(TicketGroup, required=True)
     booking_reference = StringField(required=True, unique=True)
     
@@ -35,6 +37,8 @@ class TicketBooking(Document):
         'indexes': [
             'agencyId',
             'ticketGroupId',
-            'booking_reference'
+            'booking_reference',
+            {'fields': ['agencyId', '-created_at', '-id']},      # Keyset pagination
+            {'fields': ['sellerAgencyId', '-created_at', '-id']}
         ]
     }
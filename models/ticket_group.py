@@ -1,9 +1,22 @@
-from mongoengine import Document, StringField, ReferenceField, IntField, FloatField, BooleanField, DateTimeField
+from mongoengine import Document, StringField, ReferenceField, IntField, FloatField, BooleanField, DateTimeField, EmbeddedDocumentField, ListField
 from datetime import datetime
-from .agency import Agency
+import re
+from .agency import Agency, AgencySnapshot
+
+
+def normalize_search(value):
+    """Lowercase and collapse punctuation/whitespace: ' LHE - Jed ' -> 'lhe jed'"""
+    return re.sub(r'[^0-9a-z]+', ' ', (value or '').lower()).strip()
+
+
+def search_tokens(value):
+    """Words of the normalized value: 'LHE-JED' -> ['lhe', 'jed']"""
+    return normalize_search(value).split()
+
 
 class TicketGroup(Document):
     agencyId = ReferenceField(Agency, required=True)
+    agencySnapshot = EmbeddedDocumentField(AgencySnapshot)  # Kept in sync by AgencySnapshotService
     airline = StringField(required=True)
     sector = StringField(required=True)
     travel_type = StringField(required=True) # Umrah, KSA One Way, etc.
@@ -27,17 +40,28 @@ class TicketGroup(Document):
     status = StringField(choices=('active', 'closed'), default='active')
     created_at = DateTimeField(default=datetime.utcnow)
 
+    # Normalized words of sector/airline, multikey for indexed per-word prefix search (set in clean)
+    sector_search = ListField(StringField())
+    airline_search = ListField(StringField())
+
     meta = {
         'collection': 'ticket_groups',
         'indexes': [
             'agencyId',
             'status',
             ('travel_type', 'sector'),
-            'date'
+            'date',
+            # Public marketplace filter: equality on status, then the searched field, then ranges
+            ('status', 'sector_search', 'date', 'available_seats'),
+            ('status', 'airline_search', 'date', 'available_seats'),
+            ('status', 'date', 'available_seats')
         ]
     }
 
     def clean(self):
+        self.sector_search = search_tokens(self.sector)
+        self.airline_search = search_tokens(self.airline)
+
         # Ensure available_seats doesn't exceed total_seats
         if self.available_seats > self.total_seats:
             self.available_seats = self.total_seats
@@ -30,6 +30,7 @@ class VisaCase(Document):
         'collection': 'visa_cases',
         'indexes': [
             {'fields': ['agencyId', 'status']},
-            {'fields': ['agencyId', 'customerId']}
+            {'fields': ['agencyId', 'customerId']},
+            {'fields': ['agencyId', '-updatedAt', '-id']} # Keyset pagination
         ]
     }
@@ -0,0 +1,59 @@
+"""
+Script to populate the embedded agency snapshots (name, logo, admin phone) on
+posts, ticket groups and ticket bookings. New documents get them when they are
+written; run this once after deploying, or any time the snapshots drift.
+
+Usage:
+    python scripts/backfill_agency_snapshots.py [agency_id]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from pymongo import UpdateMany
+from mongoengine import connect
+from dotenv import load_dotenv
+from models.agency import Agency
+from app.services.agency_snapshot_service import AgencySnapshotService, SNAPSHOT_TARGETS
+
+load_dotenv()
+
+# Connect to MongoDB
+connect(host=os.getenv('MONGODB_URI'))
+
+BATCH_SIZE = 500
+
+
+def backfill(agency_ids):
+    snapshots = AgencySnapshotService.for_agencies(agency_ids)
+    db = Agency._get_db()
+    updated = 0
+    for collection, targets in SNAPSHOT_TARGETS.items():
+        ops = [
+            UpdateMany({ref_field: oid}, {'$set': {snapshot_field: snapshot.to_mongo().to_dict()}})
+            for oid, snapshot in snapshots.items()
+            for ref_field, snapshot_field in targets
+        ]
+        if ops:
+            updated += db[collection].bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+def main():
+    if len(sys.argv) > 1:
+        agency_ids = [ObjectId(sys.argv[1])]
+    else:
+        agency_ids = [raw['_id'] for raw in Agency.objects.only('id').as_pymongo()]
+
+    print(f"Backfilling agency snapshots for {len(agency_ids)} agencies...")
+    updated = 0
+    for start in range(0, len(agency_ids), BATCH_SIZE):
+        updated += backfill(agency_ids[start:start + BATCH_SIZE])
+        print(f"  {min(start + BATCH_SIZE, len(agency_ids))}/{len(agency_ids)} agencies")
+
+    print(f"Done. {updated} documents updated.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Script to fill Package.serviceType (from the package name) and copy it onto
+existing bookings. New packages and bookings get it when they are written;
+run this once after deploying the serviceType revenue split.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import UpdateOne
+from mongoengine import connect
+from dotenv import load_dotenv
+from models.package import Package, classify_service
+from models.booking import Booking
+
+load_dotenv()
+
+# Connect to MongoDB
+connect(host=os.getenv('MONGODB_URI'))
+
+
+def main():
+    packages = Package._get_collection()
+    bookings = Booking._get_collection()
+    missing = {'serviceType': {'$exists': False}}
+
+    print("Classifying packages...")
+    ops = []
+    for raw in packages.find(missing, {'name': 1}):
+        ops.append(UpdateOne({'_id': raw['_id']}, {'$set': {'serviceType': classify_service(raw.get('name'))}}))
+    if ops:
+        packages.bulk_write(ops, ordered=False)
+    print(f"  {len(ops)} packages updated.")
+
+    print("Copying service types onto bookings...")
+    updated = 0
+    for service_type in packages.distinct('serviceType'):
+        package_ids = packages.distinct('_id', {'serviceType': service_type})
+        updated += bookings.update_many(dict(missing, packageId={'$in': package_ids}),
+                                        {'$set': {'serviceType': service_type}}).modified_count
+    # Quotation conversions and bookings of deleted packages
+    updated += bookings.update_many(missing, {'$set': {'serviceType': 'Other'}}).modified_count
+
+    print(f"Done. {updated} bookings updated.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Script to fill the sector_search/airline_search word arrays on existing
+ticket groups. New and edited groups get them in TicketGroup.clean(); run
+this once after deploying the indexed marketplace search (and again after
+the fields changed from normalized strings to word arrays).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import UpdateOne
+from mongoengine import connect
+from dotenv import load_dotenv
+from models.ticket_group import TicketGroup, search_tokens
+
+load_dotenv()
+
+# Connect to MongoDB
+connect(host=os.getenv('MONGODB_URI'))
+
+BATCH_SIZE = 1000
+
+
+def main():
+    TicketGroup.ensure_indexes()
+    collection = TicketGroup._get_collection()
+
+    print("Backfilling ticket group search fields...")
+    ops = []
+    updated = 0
+    for raw in collection.find({}, {'sector': 1, 'airline': 1}):
+        ops.append(UpdateOne({'_id': raw['_id']}, {'$set': {
+            'sector_search': search_tokens(raw.get('sector')),
+            'airline_search': search_tokens(raw.get('airline'))
+        }}))
+        if len(ops) >= BATCH_SIZE:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+
+    print(f"Done. {updated} ticket groups updated.")
+
+
+if __name__ == '__main__':
+    main()
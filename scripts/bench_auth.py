@@ -0,0 +1,97 @@
+"""
+Benchmark for the auth layer: requests/sec through token_required with a
+fresh jwt.decode per request (the old behaviour) versus the claims cache.
+Pass --db to also compare uncached and cached current-user lookups against
+the MONGODB_URI database (uses the first user found).
+
+Usage:
+    python scripts/bench_auth.py [requests] [--db]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import jwt
+from datetime import datetime, timedelta
+from flask import Flask, jsonify, g
+from dotenv import load_dotenv
+from app import middleware
+from app.middleware import token_required, get_current_user
+
+load_dotenv()
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'dev_key')
+
+    @app.route('/bench')
+    @token_required
+    def bench():
+        return jsonify({'user': g.user_id})
+
+    @app.route('/bench-user')
+    @token_required
+    def bench_user():
+        user = get_current_user()
+        return jsonify({'user': str(user.id) if user else None})
+
+    return app
+
+
+def run(client, path, headers, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.get_json()
+    return count / (time.perf_counter() - start)
+
+
+def report(label, before, after):
+    print(f"{label:<14} before {before:9,.0f} req/s   after {after:9,.0f} req/s   ({after / before:.2f}x)")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a != '--db']
+    count = int(args[0]) if args else 5000
+    app = make_app()
+    client = app.test_client()
+
+    user_id = '000000000000000000000000'
+    if '--db' in sys.argv:
+        from mongoengine import connect
+        from models.user import User
+        connect(host=os.getenv('MONGODB_URI'))
+        user_id = str(User.objects.only('id').first().id)
+
+    token = jwt.encode({
+        'sub': user_id,
+        'agencyId': '000000000000000000000001',
+        'role': 'AgencyAdmin',
+        'exp': datetime.utcnow() + timedelta(hours=1)
+    }, app.config['SECRET_KEY'], algorithm='HS256')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # "Before": clear the cache on every lookup so each request pays jwt.decode
+    cache = middleware._claims_cache
+    original_get = cache.get
+    cache.get = lambda key: None
+    before = run(client, '/bench', headers, count)
+    cache.get = original_get
+    cache.clear()
+    after = run(client, '/bench', headers, count)
+    report('token', before, after)
+
+    if '--db' in sys.argv:
+        user_cache = middleware._user_cache
+        original_user_get = user_cache.get
+        user_cache.get = lambda key: None
+        before = run(client, '/bench-user', headers, count // 10)
+        user_cache.get = original_user_get
+        after = run(client, '/bench-user', headers, count // 10)
+        report('token + user', before, after)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark for the streaming export pipeline.
+Reports rows/sec, time to first CSV chunk and peak Python memory (tracemalloc)
+for the CSV and Excel writers.
+
+By default rows are synthetic (no database needed). Pass --agency <id> to
+export a real agency's bookings from the MONGODB_URI database instead.
+
+Usage:
+    python scripts/bench_exports.py [rows] [--agency <id>]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from bson import ObjectId
+from dotenv import load_dotenv
+from models.customer import Customer
+from models.package import Package
+from app.services.export_service import ExportService, BOOKING_HEADERS
+
+load_dotenv()
+
+
+def synthetic_rows(count):
+    """Generate booking rows lazily, like booking_rows() does from the cursor"""
+    customers = {}
+    packages = {}
+    for i in range(200):
+        cid, pid = ObjectId(), ObjectId()
+        customers[cid] = Customer(id=cid, fullName=f'Customer {i}', phone='03001234567',
+                                  cnic='12345-1234567-1', gender='Male', address='Bannu')
+        packages[pid] = Package(id=pid, name=f'Umrah Package {i}', duration='14 Days',
+                                startDate=datetime(2024, 3, 1), endDate=datetime(2024, 3, 15),
+                                description='Standard package')
+    customer_ids, package_ids = list(customers), list(packages)
+
+    base = datetime(2024, 1, 1)
+    for i in range(count):
+        raw = {
+            '_id': ObjectId(),
+            'bookingNumber': f'BK-2024-{i:06d}',
+            'customerId': customer_ids[i % 200],
+            'packageId': package_ids[i % 200] if i % 10 else None,
+            'category': 'Sharing',
+            'status': 'Confirmed',
+            'baseAmount': 250000.0,
+            'discount': 5000.0,
+            'totalAmount': 245000.0,
+            'paidAmount': 100000.0,
+            'balanceDue': 145000.0,
+            'pnr': f'PNR{i}',
+            'createdAt': base + timedelta(minutes=i)
+        }
+        yield ExportService.booking_row(raw, customers, packages)
+
+
+def measure(label, count, run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    first_note = f", first chunk {first * 1000:.1f} ms" if first is not None else ''
+    print(f"{label:<6} {count / elapsed:12,.0f} rows/sec  peak {peak / 1024 / 1024:7.2f} MiB{first_note}")
+
+
+def main():
+    args = sys.argv[1:]
+    agency = None
+    if '--agency' in args:
+        index = args.index('--agency')
+        agency = ObjectId(args[index + 1])
+        del args[index:index + 2]
+    count = int(args[0]) if args else 200000
+
+    if agency:
+        from mongoengine import connect
+        from models.booking import Booking
+        connect(host=os.getenv('MONGODB_URI'))
+        count = Booking.objects(agencyId=agency).count()
+        rows = lambda: ExportService.booking_rows(agency)
+        print(f"Exporting {count} bookings of agency {agency}...")
+    else:
+        rows = lambda: synthetic_rows(count)
+        print(f"Exporting {count} synthetic bookings...")
+
+    def run_csv():
+        start = time.perf_counter()
+        first = None
+        with tempfile.TemporaryFile('w') as sink:
+            for chunk in ExportService.csv_chunks(BOOKING_HEADERS, rows()):
+                if first is None:
+                    first = time.perf_counter() - start
+                sink.write(chunk)
+        return first
+
+    def run_excel():
+        with tempfile.TemporaryFile() as sink:
+            ExportService.write_excel(BOOKING_HEADERS, rows(), sink, 'Bookings')
+
+    measure('csv', count, run_csv)
+    measure('excel', count, run_excel)
+
+
+if __name__ == '__main__':
+    main()
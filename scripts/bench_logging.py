@@ -0,0 +1,112 @@
+"""
+Benchmark for the logging overhead on the ticket booking hot path.
+Runs the per-request logging of POST /api/ticket-bookings the old way
+(synchronous print of the raw payload and parsed values) and the new way
+(app logger at LOG_LEVEL, DEBUG detail gated off at INFO) from several
+threads, and reports requests/sec for each.
+
+stdout is redirected to a file so the numbers reflect write cost, not a
+terminal. Pass --stdout to write to the real stdout instead.
+
+Usage:
+    LOG_LEVEL=INFO python scripts/bench_logging.py [requests] [threads] [--stdout]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import tempfile
+import threading
+from app.utils.logger import get_logger
+
+logger = get_logger('app.api.ticket_bookings')
+
+PAYLOAD = {
+    'ticketGroupId': '65f0c0ffee0000000000abcd',
+    'totalSeats': 3,
+    'totalPrice': 465000,
+    'passengers': [{
+        'type': 'Adult', 'title': 'Mr', 'givenName': f'Passenger{i}', 'surName': 'Khan',
+        'passportNumber': f'AB{i:07d}', 'passportIssueDate': '2020-01-01T00:00:00Z',
+        'expiryDate': '2030-01-01T00:00:00Z'
+    } for i in range(3)]
+}
+AGENCY_ID = '65f0c0ffee0000000000beef'
+
+
+def old_request():
+    data = PAYLOAD
+    print(f"\n{'='*60}")
+    print("BOOKING REQUEST RECEIVED")
+    print(f"{'='*60}")
+    print(f"Raw request data: {data}")
+    group_id = data.get('ticketGroupId')
+    seats_requested = int(data.get('totalSeats'))
+    total_price = float(data.get('totalPrice'))
+    print("Parsed values:")
+    print(f"  - group_id: {group_id}")
+    print(f"  - seats_requested: {seats_requested} (type: {type(seats_requested)})")
+    print(f"  - total_price: {total_price}")
+    print(f"  - passengers_count: {len(data['passengers'])}")
+    print(f"  - g.agency_id: {AGENCY_ID}")
+    print(f"{'='*60}\n")
+    print(f"DEBUG: Creating booking with agency_id={AGENCY_ID}, type={type(AGENCY_ID)}")
+    print(f"DEBUG: seller_agency={group_id}, type={type(group_id)}")
+
+
+def new_request():
+    data = PAYLOAD
+    group_id = data.get('ticketGroupId')
+    seats_requested = int(data.get('totalSeats'))
+    total_price = float(data.get('totalPrice'))
+    logger.debug("Booking request", extra={
+        'group_id': group_id,
+        'seats_requested': seats_requested,
+        'total_price': total_price,
+        'passengers_count': len(data['passengers']),
+        'agency_id': AGENCY_ID
+    })
+
+
+def run(fn, count, threads):
+    per_thread = count // threads
+
+    def work():
+        for _ in range(per_thread):
+            fn()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a != '--stdout']
+    count = int(args[0]) if args else 50000
+    threads = int(args[1]) if len(args) > 1 else 8
+    print(f"Logging level: {logger.getEffectiveLevel()} ({count} requests, {threads} threads)")
+
+    real_stdout = sys.stdout
+    sink = None
+    if '--stdout' not in sys.argv:
+        sink = tempfile.TemporaryFile('w')
+        sys.stdout = sink
+    try:
+        before = run(old_request, count, threads)
+        after = run(new_request, count, threads)
+    finally:
+        sys.stdout = real_stdout
+        if sink:
+            sink.close()
+
+    print(f"print()        {before:12,.0f} req/s")
+    print(f"app logger     {after:12,.0f} req/s   ({after / before:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
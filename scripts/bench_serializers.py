@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: legacy to_json -> json.loads -> _convert_mongo_types round trip
+versus the single-pass mongo_to_dict serializer.
+
+By default it runs on 10k synthetic booking documents (no database needed).
+Pass --db to serialize the first 10k bookings of the MONGODB_URI database instead.
+
+Usage:
+    python scripts/bench_serializers.py [--db] [count]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId, Decimal128, json_util
+from bson.json_util import LEGACY_JSON_OPTIONS
+from dotenv import load_dotenv
+from app.utils.serializers import mongo_to_dict, _convert_mongo_types
+
+load_dotenv()
+
+
+def legacy(docs):
+    data = _convert_mongo_types(json.loads(json_util.dumps(docs, json_options=LEGACY_JSON_OPTIONS)))
+    for item in data:
+        item['id'] = item['_id']
+    return data
+
+
+def synthetic(count):
+    base = datetime(2024, 1, 1)
+    agency = ObjectId()
+    return [{
+        '_id': ObjectId(),
+        'agencyId': agency,
+        'customerId': ObjectId(),
+        'packageId': ObjectId(),
+        'bookingNumber': f'BK-2024-{i:05d}',
+        'category': 'Sharing',
+        'baseAmount': 250000.0,
+        'discount': 5000.0,
+        'totalAmount': 245000.0,
+        'paidAmount': Decimal128('100000.00'),
+        'balanceDue': 145000.0,
+        'status': 'Confirmed',
+        'pnr': f'PNR{i}',
+        'travelers': [{'name': f'Traveler {j}', 'dob': base - timedelta(days=9000 + j)} for j in range(3)],
+        'createdAt': base + timedelta(minutes=i)
+    } for i in range(count)]
+
+
+def timed(label, fn, docs, rounds=3):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn(docs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<12} {best * 1000:9.1f} ms  ({len(result)} docs)")
+    return result, best
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a != '--db']
+    count = int(args[0]) if args else 10000
+
+    if '--db' in sys.argv:
+        from mongoengine import connect
+        from models.booking import Booking
+        connect(host=os.getenv('MONGODB_URI'))
+        docs = list(Booking.objects.limit(count).as_pymongo())
+        print(f"Serializing {len(docs)} bookings from the database...")
+    else:
+        docs = synthetic(count)
+        print(f"Serializing {len(docs)} synthetic bookings...")
+
+    old, old_time = timed('legacy', legacy, docs)
+    new, new_time = timed('single-pass', mongo_to_dict, docs)
+
+    assert old == new, "serializers disagree"
+    print(f"Speedup: {old_time / new_time:.1f}x, output identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark for the ticket-group marketplace search.
+Seeds a throwaway database with ticket groups and reports the median latency
+of filtered first and deep pages for:
+
+    old     sector/airline icontains + count() + skip()
+    page    indexed prefix search with $facet counts, ?page=N
+    cursor  the same search continued with ?cursor= (no skip)
+
+The benchmark database is dropped and re-seeded; it must differ from
+MONGODB_URI.
+
+Usage:
+    BENCH_MONGODB_URI=mongodb://localhost:27017/travel_bench \\
+        python scripts/bench_ticket_search.py [groups] [deep_page]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import random
+import statistics
+from datetime import datetime, timedelta
+from bson import ObjectId
+from mongoengine import connect
+from dotenv import load_dotenv
+from models.ticket_group import TicketGroup, search_tokens
+from app.services.ticket_search_service import TicketSearchService
+
+load_dotenv()
+
+BENCH_URI = os.getenv('BENCH_MONGODB_URI', 'mongodb://localhost:27017/travel_bench')
+AIRLINES = ['Saudi Airlines', 'PIA', 'Airblue', 'Serene Air', 'flydubai', 'Emirates', 'Qatar Airways', 'Fly Jinnah']
+SECTORS = ['LHE-JED', 'ISB-JED', 'KHI-JED', 'PEW-JED', 'LHE-MED', 'ISB-DXB', 'KHI-RUH', 'MUX-JED']
+TRAVEL_TYPES = ['Umrah', 'KSA One Way', 'UAE One Way', 'Return']
+FILTERS = {'sector': 'lhe-jed', 'airline': 'saudi'}
+PAGE_SIZE = 20
+RUNS = 20
+
+
+def seed(count):
+    collection = TicketGroup._get_collection()
+    collection.drop()
+    TicketGroup.ensure_indexes()
+
+    rng = random.Random(42)
+    agencies = [ObjectId() for _ in range(200)]
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    batch = []
+    for i in range(count):
+        airline, sector = rng.choice(AIRLINES), rng.choice(SECTORS)
+        seats = rng.randint(10, 50)
+        batch.append({
+            'agencyId': agencies[i % len(agencies)],
+            'airline': airline, 'airline_search': search_tokens(airline),
+            'sector': sector, 'sector_search': search_tokens(sector),
+            'travel_type': rng.choice(TRAVEL_TYPES),
+            'date': today + timedelta(days=rng.randint(-30, 180)),
+            'flight_no': f'SV{rng.randint(100, 999)}',
+            'price_per_seat': float(rng.randint(90, 250) * 1000),
+            'total_seats': seats,
+            'available_seats': rng.choice([0, seats, rng.randint(1, seats)]),
+            'status': 'active' if i % 10 else 'closed',
+            'created_at': today - timedelta(minutes=count - i)
+        })
+        if len(batch) == 5000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def old_page(page):
+    """The previous listing query for an anonymous caller"""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    query = TicketGroup.objects(
+        sector__icontains=FILTERS['sector'], airline__icontains=FILTERS['airline'],
+        status='active', date__gte=today, available_seats__gt=0
+    )
+    query.count()
+    return list(query.order_by('-created_at').skip((page - 1) * PAGE_SIZE).limit(PAGE_SIZE).as_pymongo())
+
+
+def new_page(page=1, cursor=None):
+    match = TicketSearchService.build_match(FILTERS, 'Public', None)
+    return TicketSearchService.search(match, page=page, limit=PAGE_SIZE, cursor=cursor)
+
+
+def median_ms(fn):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    deep = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    if BENCH_URI == os.getenv('MONGODB_URI'):
+        sys.exit("BENCH_MONGODB_URI must not be the application database")
+
+    connect(host=BENCH_URI)
+    print(f"Seeding {count} ticket groups into {BENCH_URI}...")
+    seed(count)
+
+    # Walk to the deep page once to get the cursor that reaches it
+    cursor = None
+    for _ in range(deep - 1):
+        cursor = new_page(cursor=cursor)['next_cursor']
+        if cursor is None:
+            sys.exit(f"Filter has fewer than {deep} pages; lower deep_page")
+
+    print(f"Median of {RUNS} runs, {PAGE_SIZE} rows/page, filter {FILTERS}")
+    print(f"{'':8} {'page 1':>10} {'page ' + str(deep):>12}")
+    print(f"{'old':8} {median_ms(lambda: old_page(1)):8.1f} ms {median_ms(lambda: old_page(deep)):10.1f} ms")
+    print(f"{'page':8} {median_ms(lambda: new_page(1)):8.1f} ms {median_ms(lambda: new_page(deep)):10.1f} ms")
+    print(f"{'cursor':8} {'':>11} {median_ms(lambda: new_page(cursor=cursor)):10.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
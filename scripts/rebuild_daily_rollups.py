@@ -0,0 +1,93 @@
+"""
+Script to rebuild the daily_agency_rollups collection from raw history
+Run once after deploying the rollups, or any time the rollups drift.
+
+Usage:
+    python scripts/rebuild_daily_rollups.py [agency_id]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from mongoengine import connect
+from dotenv import load_dotenv
+from models.ledger import LedgerEntry
+from models.agent import Agent
+from models.miscellaneous_expense import MiscellaneousExpense
+from models.daily_agency_rollup import DailyAgencyRollup
+from app.services.rollup_service import RollupService
+
+load_dotenv()
+
+# Connect to MongoDB
+connect(host=os.getenv('MONGODB_URI'))
+
+
+def day_expr(field):
+    """Midnight (UTC) of a date field, computed on the server"""
+    return {'$dateFromParts': {
+        'year': {'$year': field},
+        'month': {'$month': field},
+        'day': {'$dayOfMonth': field}
+    }}
+
+
+def grouped(document, agency_field, date_field, amount_field, agency_id=None, extra_key=None):
+    match = {date_field: {'$ne': None}}
+    if agency_id:
+        match[agency_field] = agency_id
+    group_id = {'agencyId': '$' + agency_field, 'day': day_expr('$' + date_field)}
+    if extra_key:
+        group_id['key'] = '$' + extra_key
+    pipeline = [
+        {'$match': match},
+        {'$group': {'_id': group_id, 'total': {'$sum': '$' + amount_field}}}
+    ]
+    return document.objects.aggregate(*pipeline, allowDiskUse=True)
+
+
+def rebuild(agency_id=None):
+    rows = {}
+
+    def row(key):
+        if key not in rows:
+            rows[key] = {'credit': 0.0, 'debit': 0.0, 'agentPayments': 0.0,
+                         'miscExpenses': 0.0, 'expensesByTitle': {}}
+        return rows[key]
+
+    print("Aggregating ledger entries...")
+    for r in grouped(LedgerEntry, 'agencyId', 'date', 'amount', agency_id, extra_key='type'):
+        field = 'credit' if r['_id'].get('key') == 'Credit' else 'debit'
+        row((r['_id']['agencyId'], r['_id']['day']))[field] += r['total'] or 0
+
+    print("Aggregating agent payments...")
+    for r in grouped(Agent, 'created_by_agency', 'created_at', 'amount_paid', agency_id):
+        row((r['_id']['agencyId'], r['_id']['day']))['agentPayments'] += r['total'] or 0
+
+    print("Aggregating miscellaneous expenses...")
+    for r in grouped(MiscellaneousExpense, 'agencyId', 'expense_date', 'amount', agency_id, extra_key='title'):
+        target = row((r['_id']['agencyId'], r['_id']['day']))
+        target['miscExpenses'] += r['total'] or 0
+        title_key = RollupService.escape_key(r['_id'].get('key'))
+        target['expensesByTitle'][title_key] = target['expensesByTitle'].get(title_key, 0) + (r['total'] or 0)
+
+    collection = DailyAgencyRollup._get_collection()
+    print(f"Writing {len(rows)} rollup rows...")
+    collection.delete_many({'agencyId': agency_id} if agency_id else {})
+
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne({'agencyId': agency, 'day': day}, {'$set': dict(values, updatedAt=now)}, upsert=True)
+        for (agency, day), values in rows.items()
+    ]
+    for i in range(0, len(ops), 1000):
+        collection.bulk_write(ops[i:i + 1000], ordered=False)
+
+    print("✅ Daily rollups rebuilt successfully!")
+
+
+if __name__ == '__main__':
+    rebuild(ObjectId(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,36 @@
+"""
+Script to (re)build the search_entries index from customers, bookings,
+agents and agent profiles. API writes keep it current; run this once after
+deploying /api/search, or to repair it.
+
+Usage: python scripts/rebuild_search_index.py [kind ...]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mongoengine import connect
+from dotenv import load_dotenv
+from models.search_entry import SearchEntry
+from app.services.search_service import SearchService, SOURCES
+
+load_dotenv()
+
+# Connect to MongoDB
+connect(host=os.getenv('MONGODB_URI'))
+
+
+def main():
+    SearchEntry.ensure_indexes()
+    kinds = sys.argv[1:] or list(SOURCES)
+    for kind in kinds:
+        if kind not in SOURCES:
+            print(f"Unknown kind '{kind}', expected one of: {', '.join(SOURCES)}")
+            continue
+        print(f"Indexing {kind}...")
+        print(f"  {SearchService.rebuild(kind)} entries written.")
+    print("Done.")
+
+
+if __name__ == '__main__':
+    main()
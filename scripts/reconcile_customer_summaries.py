@@ -0,0 +1,31 @@
+"""
+Script to recompute every customer's account summary (lifetime spend,
+booking count, outstanding balance, last booking and payment dates) from
+bookings and the ledger. Run once after deploying the summaries, and from
+cron to correct any drift.
+
+Usage: python scripts/reconcile_customer_summaries.py [agency_id]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mongoengine import connect
+from dotenv import load_dotenv
+from app.services.customer_summary_service import CustomerSummaryService
+
+load_dotenv()
+
+# Connect to MongoDB
+connect(host=os.getenv('MONGODB_URI'))
+
+
+def main():
+    agency_id = sys.argv[1] if len(sys.argv) > 1 else None
+    print("Reconciling customer summaries...")
+    written = CustomerSummaryService.reconcile(agency_id)
+    print(f"Done. {written} customers updated.")
+
+
+if __name__ == '__main__':
+    main()
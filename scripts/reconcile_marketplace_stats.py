@@ -0,0 +1,31 @@
+"""
+Script to recompute the marketplace_stats counters (active seats on sale,
+seats sold) from the ticket groups and ticket bookings. Safe to run from
+cron; the app also reconciles on its own every
+MARKETPLACE_STATS_RECONCILE_MINUTES.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mongoengine import connect
+from dotenv import load_dotenv
+from models.marketplace_stats import MarketplaceStats
+from app.services.marketplace_stats_service import MarketplaceStatsService, STATS_KEY
+
+load_dotenv()
+
+# Connect to MongoDB
+connect(host=os.getenv('MONGODB_URI'))
+
+
+def main():
+    before = MarketplaceStats._get_collection().find_one({'_id': STATS_KEY}) or {}
+    totals = MarketplaceStatsService.reconcile()
+    for field, value in totals.items():
+        drift = value - (before.get(field) or 0)
+        print(f"{field}: {value} (drift {drift:+d})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""
+Script to recompute the platform_metrics snapshot behind the SuperAdmin
+dashboard. Safe to run from cron; the app also refreshes it on its own
+every PLATFORM_METRICS_REFRESH_MINUTES.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mongoengine import connect
+from dotenv import load_dotenv
+from app.services.platform_metrics_service import PlatformMetricsService
+
+load_dotenv()
+
+# Connect to MongoDB
+connect(host=os.getenv('MONGODB_URI'))
+
+
+def main():
+    metrics = PlatformMetricsService.refresh()
+    print(f"Agencies: {metrics['agencies']}")
+    print(f"Bookings: {metrics['totalBookings']} ({metrics['recentBookings']} in the last 30 days)")
+    print(f"GMV: {metrics['gmv']:.2f} ({metrics['recentGmv']:.2f} in the last 30 days)")
+
+
+if __name__ == '__main__':
+    main()
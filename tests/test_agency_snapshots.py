@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from models.agency import Agency, Branding
+from models.user import User
+from models.ticket_group import TicketGroup
+from models.post import Post
+from app.services.agency_snapshot_service import AgencySnapshotService
+
+
+def test_snapshot_is_propagated_in_bulk(app):
+    agency = Agency(name="Seller", branding=Branding(logoUrl='/logo.png')).save()
+    admin = User(agencyId=agency, email="admin@seller.com", passwordHash="x",
+                 role="AgencyAdmin", name="Admin", phone="0300").save()
+    groups = [TicketGroup(
+        agencyId=agency, agencySnapshot=AgencySnapshotService.for_agency(agency.id),
+        airline='PIA', sector='LHE-JED', travel_type='Umrah', date=datetime.utcnow() + timedelta(days=5),
+        flight_no='PK741', price_per_seat=1000, total_seats=10, available_seats=10
+    ).save() for _ in range(3)]
+    assert groups[0].agencySnapshot.phone == '0300'
+    assert groups[0].agencySnapshot.logoUrl == '/logo.png'
+
+    admin.phone = '0311'
+    admin.save()
+    Agency.objects(id=agency.id).update(set__name="Seller Travels")
+    assert AgencySnapshotService.propagate(agency.id) == 3
+
+    for group in TicketGroup.objects(agencyId=agency):
+        assert group.agencySnapshot.name == "Seller Travels"
+        assert group.agencySnapshot.phone == '0311'
+
+
+def test_feed_fills_snapshots_of_legacy_posts(client):
+    agency = Agency(name="Old Agency", branding=Branding(logoUrl='/old.png')).save()
+    Post(agency=agency, content="Before snapshots", visibility='public').save()
+    Post(agency=agency, agencySnapshot=AgencySnapshotService.for_agency(agency.id),
+         content="After snapshots", visibility='public').save()
+
+    feed = client.get('/api/feed/').get_json()
+    assert {(p['agencyName'], p['agencyLogo']) for p in feed} == {("Old Agency", '/old.png')}
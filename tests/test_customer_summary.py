@@ -0,0 +1,86 @@
+from models.booking import Booking
+from models.customer import Customer
+from models.package import Package
+from models.user import User
+from app.services.customer_summary_service import CustomerSummaryService
+
+
+def _summary(customer):
+    summary = customer.reload().summary
+    return summary.totalSpend, summary.bookingCount, summary.outstandingBalance
+
+
+def test_summary_follows_booking_and_ledger_writes(client, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    customer = Customer(agencyId=agency, fullName="Account", phone="0300").save()
+    package = Package(agencyId=agency, name="Umrah Basic").save()
+    assert _summary(customer) == (0, 0, 0)
+
+    response = client.post('/api/bookings', headers=auth_header, json={
+        'customerId': str(customer.id), 'packageId': str(package.id), 'category': 'Sharing',
+        'totalAmount': 500, 'finalAmount': 400, 'paidAmount': 100
+    })
+    assert response.status_code == 201
+    booking_id = response.get_json()['_id']
+    assert _summary(customer) == (400, 1, 300)
+    assert customer.summary.lastBookingAt is not None
+
+    client.put(f'/api/bookings/{booking_id}', headers=auth_header, json={'finalAmount': 450})
+    assert _summary(customer) == (450, 1, 350)
+
+    response = client.post('/api/accounting/ledger', headers=auth_header, json={
+        'type': 'Credit', 'amount': '50', 'description': 'Payment', 'customerId': str(customer.id)
+    })
+    assert response.status_code == 201
+    assert _summary(customer) == (450, 1, 300)
+    assert customer.summary.lastPaymentAt is not None
+
+    client.delete(f"/api/accounting/ledger/{response.get_json()['_id']}", headers=auth_header)
+    assert _summary(customer) == (450, 1, 350)
+
+    # The customer list reads the summary instead of querying bookings
+    listed = client.get('/api/customers', headers=auth_header).get_json()
+    assert [c['bookingStatus'] for c in listed if c['_id'] == str(customer.id)] == ['Confirmed']
+
+
+def test_reconcile_rebuilds_summaries_from_bookings(client, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    customer = Customer(agencyId=agency, fullName="Drifted", phone="0301").save()
+    idle = Customer(agencyId=agency, fullName="Idle", phone="0302").save()
+    Booking(agencyId=agency, customerId=customer, bookingNumber="BK-S-1",
+            totalAmount=200, paidAmount=50).save()
+    Booking(agencyId=agency, customerId=customer, bookingNumber="BK-S-2",
+            totalAmount=900, status='Cancelled').save()
+    Customer.objects(id=idle.id).update_one(set__summary__bookingCount=3)
+
+    assert CustomerSummaryService.reconcile(agency.id) >= 2
+    assert _summary(customer) == (200, 1, 150)
+    assert _summary(idle) == (0, 0, 0)
+
+
+def test_customers_written_before_summaries_are_not_reported_empty(client, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    legacy = Customer._get_collection().insert_one(
+        {'agencyId': agency.id, 'fullName': "Legacy", 'phone': "0303"}
+    ).inserted_id
+    Booking(agencyId=agency, customerId=legacy, bookingNumber="BK-S-3", totalAmount=700).save()
+
+    listed = client.get('/api/customers', headers=auth_header).get_json()
+    assert [c['bookingStatus'] for c in listed if c['_id'] == str(legacy)] == ['Confirmed']
+
+    top = client.get('/api/agency/reports/top-customers', headers=auth_header).get_json()
+    assert [(c['name'], c['totalSpend']) for c in top] == [("Legacy", 700)]
+
+
+def test_backfill_only_writes_customers_without_a_summary(client, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    tracked = Customer(agencyId=agency, fullName="Tracked", phone="0304").save()
+    # A concurrent $inc already applied to this summary must survive the backfill
+    Customer.objects(id=tracked.id).update_one(inc__summary__totalSpend=80)
+    legacy = Customer._get_collection().insert_one(
+        {'agencyId': agency.id, 'fullName': "Legacy", 'phone': "0305"}
+    ).inserted_id
+
+    assert CustomerSummaryService.reconcile(agency.id, missing_only=True) == 1
+    assert _summary(tracked) == (80, 0, 0)
+    assert _summary(Customer.objects.get(id=legacy)) == (0, 0, 0)
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from models.booking import Booking
+from models.customer import Customer
+from models.package import Package
+from models.user import User
+from app.services.customer_summary_service import CustomerSummaryService
+
+
+def _seed(agency):
+    big = Customer(agencyId=agency, fullName="Big Spender", phone="0300").save()
+    small = Customer(agencyId=agency, fullName="Small Spender", phone="0301",
+                     passportExpiry=datetime.utcnow() + timedelta(days=30)).save()
+    umrah = Package(agencyId=agency, name="Umrah Deluxe").save()
+    assert umrah.serviceType == 'Umrah'
+    Booking(agencyId=agency, customerId=big, packageId=umrah, serviceType=umrah.serviceType,
+            bookingNumber="BK-D-1", totalAmount=500, paidAmount=200).save()
+    Booking(agencyId=agency, customerId=small, bookingNumber="BK-D-2",
+            totalAmount=100, paidAmount=100).save()
+    Booking(agencyId=agency, customerId=small, bookingNumber="BK-D-3",
+            totalAmount=900, status='Cancelled').save()
+    # Written directly rather than through the API, so build the summaries
+    CustomerSummaryService.reconcile(agency.id)
+
+
+def test_dashboard_returns_all_widgets_in_one_payload(client, auth_header):
+    _seed(User.objects(email="test@test.com").first().agencyId)
+
+    response = client.get('/api/agency/dashboard', headers=auth_header)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert set(data) == {'summary', 'cashFlow', 'revenueByService', 'outstandingPayments',
+                         'topCustomers', 'expensesBreakdown', 'tasks'}
+    assert data['summary']['pendingAmount'] == 300
+    revenue = {row['name']: row['value'] for row in data['revenueByService']}
+    assert revenue['Umrah'] == 500 and revenue['Other'] == 100
+    assert [c['name'] for c in data['topCustomers']] == ['Big Spender', 'Small Spender']
+    assert [(p['customerName'], p['remainingAmount']) for p in data['outstandingPayments']] == [('Big Spender', 300)]
+    assert [b['bookingNumber'] for b in data['tasks']['duePayments']] == ['BK-D-1']
+    assert [c['fullName'] for c in data['tasks']['expiringPassports']] == ['Small Spender']
+
+    # The per-widget endpoints serve the same payloads
+    assert client.get('/api/agency/reports/top-customers', headers=auth_header).get_json() == data['topCustomers']
+    assert client.get('/api/agency/reports/outstanding-payments', headers=auth_header).get_json() == data['outstandingPayments']
+    assert client.get('/api/dashboard/tasks', headers=auth_header).get_json() == data['tasks']
+
+
+def test_dashboard_widgets_are_selectable(client, auth_header):
+    response = client.get('/api/agency/dashboard?widgets=summary,tasks', headers=auth_header)
+    assert set(response.get_json()) == {'summary', 'tasks'}
+    assert client.get('/api/agency/dashboard?widgets=nope', headers=auth_header).status_code == 400
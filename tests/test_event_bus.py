@@ -0,0 +1,33 @@
+from models.stream_event import StreamEvent
+from models.user import User
+from app.services.event_bus import EventBus, agency_channel, user_channel
+from app.services.notification_service import NotificationService
+
+
+def test_publish_reaches_local_subscribers(app):
+    subscription = EventBus.subscribe([agency_channel('a1')])
+    other = EventBus.subscribe([agency_channel('a2')])
+    try:
+        EventBus.publish([agency_channel('a1')], 'ticket_booking.created', {'bookingId': 'b1'})
+        event = subscription.get(timeout=1)
+        assert event['type'] == 'ticket_booking.created'
+        assert event['data'] == {'bookingId': 'b1'}
+        assert other.get(timeout=0) is None
+        # Also recorded for the other worker processes
+        assert StreamEvent.objects(type='ticket_booking.created').count() == 1
+    finally:
+        EventBus.unsubscribe(subscription)
+        EventBus.unsubscribe(other)
+
+    EventBus.publish([agency_channel('a1')], 'ticket_booking.read')
+    assert subscription.get(timeout=0) is None
+
+
+def test_notification_insert_is_published(app, auth_header):
+    user = User.objects(email="test@test.com").first()
+    subscription = EventBus.subscribe([user_channel(user.id)])
+    try:
+        NotificationService.create_notification(user, 'general', 'Hi', 'Hello')
+        assert subscription.get(timeout=1)['type'] == 'notification.created'
+    finally:
+        EventBus.unsubscribe(subscription)
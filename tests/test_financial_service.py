@@ -0,0 +1,76 @@
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.agency import Agency
+from models.ledger import LedgerEntry
+from models.agent import Agent
+from models.miscellaneous_expense import MiscellaneousExpense
+from app.services.financial_service import FinancialService
+
+AMOUNTS = ['0.10', '0.20', '19.995', '1234.565', '7.333', '0.005', '99999.99', '45.10']
+
+
+def python_totals(agency, start_date=None, end_date=None):
+    """The original in-Python summation the aggregation replaced"""
+    ledger = {'agencyId': agency}
+    agents = {'created_by_agency': agency}
+    misc = {'agencyId': agency}
+    if start_date:
+        ledger['date__gte'] = start_date
+        agents['created_at__gte'] = start_date
+        misc['expense_date__gte'] = start_date
+    if end_date:
+        ledger['date__lte'] = end_date
+        agents['created_at__lte'] = end_date
+        misc['expense_date__lte'] = end_date
+
+    credit = sum(float(e.amount) for e in LedgerEntry.objects(type='Credit', **ledger))
+    ledger_debit = sum(float(e.amount) for e in LedgerEntry.objects(type='Debit', **ledger))
+    agent_payments = sum(float(a.amount_paid or 0) for a in Agent.objects(**agents))
+    misc_debit = sum(float(m.amount) for m in MiscellaneousExpense.objects(**misc))
+    return credit, ledger_debit, agent_payments, misc_debit
+
+
+@pytest.fixture
+def ledger_agency(app):
+    agency = Agency(name="Ledger Agency").save()
+    base = datetime(2024, 1, 1)
+    for i, amount in enumerate(AMOUNTS * 5):
+        day = base + timedelta(days=i)
+        LedgerEntry(agencyId=agency, type='Credit' if i % 3 else 'Debit',
+                    amount=Decimal(amount), date=day, description=f"Entry {i}").save()
+        MiscellaneousExpense(agencyId=agency, title=f"Expense {i % 4}",
+                             amount=Decimal(amount), expense_date=day).save()
+        Agent(agent_name=f"Agent {i}", source_name="Source", mobile_number=f"0300{i:07d}",
+              amount_paid=None if i % 7 == 0 else i * 13, created_by_agency=agency,
+              created_at=day).save()
+    yield agency
+    for model, field in ((LedgerEntry, 'agencyId'), (MiscellaneousExpense, 'agencyId'),
+                         (Agent, 'created_by_agency')):
+        model.objects(**{field: agency}).delete()
+    agency.delete()
+
+
+@pytest.mark.parametrize('start_date,end_date', [
+    (None, None),
+    (datetime(2024, 1, 5), None),
+    (None, datetime(2024, 1, 20)),
+    (datetime(2024, 1, 10), datetime(2024, 1, 30)),
+    (datetime(2030, 1, 1), None),
+])
+def test_totals_match_python_summation(ledger_agency, start_date, end_date):
+    credit, ledger_debit, agent_payments, misc_debit = python_totals(ledger_agency, start_date, end_date)
+
+    debit = FinancialService.calculate_total_debit(str(ledger_agency.id), start_date, end_date)
+    assert debit['ledger_debit'] == round(ledger_debit, 2)
+    assert debit['agent_payments'] == round(agent_payments, 2)
+    assert debit['misc_expenses'] == round(misc_debit, 2)
+    assert debit['total_debit'] == round(ledger_debit + agent_payments + misc_debit, 2)
+
+    assert FinancialService.calculate_total_credit(ledger_agency.id, start_date, end_date) == round(credit, 2)
+
+
+def test_ledger_totals_single_round_trip(ledger_agency):
+    totals = FinancialService.ledger_totals(ledger_agency.id)
+    credit, ledger_debit, _, _ = python_totals(ledger_agency)
+    assert totals == {'Credit': round(credit, 2), 'Debit': round(ledger_debit, 2)}
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+from models.agency import Agency
+from models.ticket_group import TicketGroup
+from app.services.marketplace_stats_service import MarketplaceStatsService
+
+
+def test_counters_follow_writes_and_reconcile(client, auth_header):
+    seller = Agency(name="Seller").save()
+    group = TicketGroup(
+        agencyId=seller, airline='PIA', sector='LHE-JED', travel_type='Umrah',
+        date=datetime.utcnow() + timedelta(days=10), flight_no='PK741',
+        price_per_seat=1000, total_seats=20, available_seats=20
+    ).save()
+    assert MarketplaceStatsService.get() == {'active_tickets': 20, 'sold_tickets': 0}
+
+    res = client.post('/api/ticket-bookings/', headers=auth_header, json={
+        'ticketGroupId': str(group.id), 'totalSeats': 3, 'totalPrice': 3000, 'passengers': []
+    })
+    assert res.status_code == 201
+    assert MarketplaceStatsService.get()['active_tickets'] == 17
+
+    # Drift is corrected by reconciliation
+    MarketplaceStatsService.adjust(active=5, sold=2)
+    assert MarketplaceStatsService.get() == {'active_tickets': 22, 'sold_tickets': 2}
+    assert MarketplaceStatsService.reconcile() == {'activeTickets': 17, 'soldTickets': 0}
+
+    TicketGroup.objects(id=group.id).update(set__status='closed')
+    MarketplaceStatsService.group_change('active', 17, 'closed', 17)
+    assert MarketplaceStatsService.get()['active_tickets'] == 0
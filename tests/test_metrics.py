@@ -0,0 +1,27 @@
+from app.utils.metrics import Histogram
+
+
+def test_server_timing_header(client, auth_header):
+    res = client.get('/api/packages', headers=auth_header)
+    assert res.status_code == 200
+    assert res.headers['Server-Timing'].startswith('app;dur=')
+    assert 'db;dur=' in res.headers['Server-Timing']
+
+
+def test_metrics_endpoint_reports_requests(client, auth_header):
+    client.get('/api/packages', headers=auth_header)
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",endpoint="/api/packages",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",endpoint="/api/packages",le="+Inf"}' in body
+    assert 'http_request_db_commands_count{method="GET",endpoint="/api/packages"}' in body
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram('test_seconds', 'Test', (1, 5))
+    for value in (0.5, 2, 7):
+        hist.observe(value)
+    lines = hist.render()
+    assert 'test_seconds_bucket{le="1"} 1' in lines
+    assert 'test_seconds_bucket{le="5"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'test_seconds_count 3' in lines
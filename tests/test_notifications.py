@@ -0,0 +1,26 @@
+from models.broadcast import Broadcast
+from models.notification import Notification
+from models.user import User
+from app.services.notification_service import NotificationService
+
+
+def test_broadcast_is_stored_once_and_merged_on_read(client, auth_header):
+    author = User.objects(email="test@test.com").first()
+    NotificationService.broadcast_to_agencies('general', 'Own post', 'Hidden from author', exclude_user_id=author.id)
+    NotificationService.broadcast_to_agencies('general', 'Hello', 'Platform news')
+    NotificationService.create_notification(author, 'general', 'Personal', 'Just for you')
+    assert Broadcast.objects.count() == 2
+    assert Notification.objects.count() == 1
+
+    assert client.get('/api/notifications/unread-count', headers=auth_header).get_json() == {'count': 2}
+    items = client.get('/api/notifications/', headers=auth_header).get_json()
+    assert sorted(n['title'] for n in items) == ['Hello', 'Personal']
+
+    broadcast_id = next(n['id'] for n in items if n['title'] == 'Hello')
+    assert client.post(f'/api/notifications/{broadcast_id}/read', headers=auth_header).status_code == 200
+    assert client.get('/api/notifications/unread-count', headers=auth_header).get_json() == {'count': 1}
+
+    client.post('/api/notifications/read-all', headers=auth_header)
+    assert client.get('/api/notifications/unread-count', headers=auth_header).get_json() == {'count': 0}
+    items = client.get('/api/notifications/', headers=auth_header).get_json()
+    assert len(items) == 2 and all(n['isRead'] for n in items)
@@ -0,0 +1,73 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from models.outbox_event import OutboxEvent
+from app.services import outbox_service
+from app.services.outbox_service import OutboxService
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """Local stub for the n8n webhook; set `status` to control its replies"""
+    state = {'status': 200, 'received': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            state['received'].append(json.loads(body))
+            self.send_response(state['status'])
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv('N8N_WEBHOOK_URL', f'http://127.0.0.1:{server.server_port}/hook')
+    yield state
+    server.shutdown()
+
+
+def queue_event(payload):
+    event = OutboxService.event('n8n', payload)
+    event.save()
+    return event
+
+
+def test_events_are_delivered_in_batches(app, webhook):
+    for i in range(3):
+        queue_event({'type': 'new_post', 'n': i})
+
+    assert OutboxService.dispatch_pending() == 3
+    assert sorted(p['n'] for p in webhook['received']) == [0, 1, 2]
+    assert OutboxEvent.objects(status='Delivered').count() == 3
+    assert OutboxService.dispatch_pending() == 0
+
+
+def test_failures_are_retried_then_dead_lettered(app, webhook, monkeypatch):
+    monkeypatch.setattr(outbox_service, 'OUTBOX_MAX_ATTEMPTS', 2)
+    webhook['status'] = 500
+    event = queue_event({'type': 'visa_update'})
+
+    assert OutboxService.dispatch_pending() == 1
+    event.reload()
+    assert event.status == 'Pending'
+    assert event.lastError == 'HTTP 500'
+    assert event.nextAttemptAt > datetime.utcnow()
+
+    # Not due yet, so nothing is claimed until the backoff has passed
+    assert OutboxService.dispatch_pending() == 0
+    OutboxEvent.objects(id=event.id).update(set__nextAttemptAt=datetime.utcnow())
+    assert OutboxService.dispatch_pending() == 1
+    event.reload()
+    assert event.status == 'Dead'
+    assert event.attempts == 2
+    assert len(webhook['received']) == 2
+
+
+def test_no_event_without_webhook_url(app, monkeypatch):
+    monkeypatch.delenv('N8N_WEBHOOK_URL', raising=False)
+    assert OutboxService.event('n8n', {}) is None
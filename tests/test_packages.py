@@ -0,0 +1,16 @@
+from models.package import Package
+
+
+def test_derived_service_type_follows_a_rename(client, auth_header):
+    response = client.post('/api/packages', headers=auth_header, json={'name': 'Umrah Deluxe'})
+    assert response.status_code == 201
+    package_id = response.get_json()['_id']
+    assert Package.objects.get(id=package_id).serviceType == 'Umrah'
+
+    client.put(f'/api/packages/{package_id}', headers=auth_header, json={'name': 'Ziarat Deluxe'})
+    assert Package.objects.get(id=package_id).serviceType == 'Ziarat'
+
+    # An explicit type is kept across renames
+    client.put(f'/api/packages/{package_id}', headers=auth_header, json={'serviceType': 'Other'})
+    client.put(f'/api/packages/{package_id}', headers=auth_header, json={'name': 'Umrah Economy'})
+    assert Package.objects.get(id=package_id).serviceType == 'Other'
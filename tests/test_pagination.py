@@ -0,0 +1,47 @@
+import pytest
+from datetime import datetime, timedelta
+from models.agency import Agency
+from models.package import Package
+from app.utils.pagination import paginate, encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def packages(app):
+    agency = Agency(name="Paging Agency").save()
+    base = datetime(2024, 1, 1)
+    for i in range(25):
+        # Every third package shares a timestamp to exercise the _id tie-break
+        Package(agencyId=agency, name=f"Package {i}", createdAt=base + timedelta(hours=i // 3)).save()
+    return agency
+
+
+def walk(app, query, limit):
+    pages, cursor = [], None
+    while True:
+        with app.test_request_context():
+            rows, cursor = paginate(query, 'createdAt', cursor=cursor, limit=limit)
+        pages.append(rows)
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize('limit', [1, 4, 7, 25, 100])
+def test_pages_cover_the_collection_in_order(app, packages, limit):
+    query = Package.objects(agencyId=packages)
+    pages = walk(app, query, limit)
+    ids = [row['_id'] for page in pages for row in page]
+    expected = [p['_id'] for p in query.order_by('-createdAt', '-id').as_pymongo()]
+    assert ids == expected
+    assert all(len(page) <= limit for page in pages)
+
+
+def test_cursor_round_trip():
+    value, pk = decode_cursor(encode_cursor(datetime(2024, 5, 1, 12, 30), 'abc'))
+    assert value.replace(tzinfo=None) == datetime(2024, 5, 1, 12, 30)
+    assert pk == 'abc'
+
+
+def test_invalid_cursor_is_rejected(app, packages):
+    with app.test_request_context('/?cursor=not-a-cursor'):
+        with pytest.raises(ValueError):
+            paginate(Package.objects(agencyId=packages), 'createdAt')
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.booking import Booking
+from models.customer import Customer
+from models.ledger import LedgerEntry
+from models.user import User
+
+
+def _bookings(agency, customer, totals):
+    start = datetime.utcnow() - timedelta(days=len(totals))
+    return [
+        Booking(agencyId=agency, customerId=customer, bookingNumber=f"BK-A-{i}",
+                totalAmount=total, createdAt=start + timedelta(days=i)).save()
+        for i, total in enumerate(totals)
+    ]
+
+
+def _balances(bookings):
+    return [(b.reload().paidAmount, b.balanceDue) for b in bookings]
+
+
+def test_customer_credit_is_allocated_oldest_first_and_reversed(client, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    customer = Customer(agencyId=agency, fullName="Payer", phone="0300").save()
+    bookings = _bookings(agency, customer, [100, 50, 80])
+
+    response = client.post('/api/accounting/ledger', headers=auth_header, json={
+        'type': 'Credit', 'amount': '120.50', 'description': 'Payment',
+        'customerId': str(customer.id)
+    })
+    assert response.status_code == 201
+    entry = LedgerEntry.objects.get(id=response.get_json()['_id'])
+    assert [(str(a.bookingId.id), a.amount) for a in entry.allocations] == [
+        (str(bookings[0].id), Decimal('100.00')), (str(bookings[1].id), Decimal('20.50'))
+    ]
+    assert _balances(bookings) == [
+        (Decimal('100.00'), Decimal('0.00')),
+        (Decimal('20.50'), Decimal('29.50')),
+        (Decimal('0.00'), Decimal('80.00'))
+    ]
+
+    # Raising the payment re-plans against the balances it had taken
+    response = client.put(f'/api/accounting/ledger/{entry.id}', headers=auth_header, json={
+        'type': 'Credit', 'amount': '160', 'description': 'Payment',
+        'customerId': str(customer.id)
+    })
+    assert response.status_code == 200
+    assert _balances(bookings) == [
+        (Decimal('100.00'), Decimal('0.00')),
+        (Decimal('50.00'), Decimal('0.00')),
+        (Decimal('10.00'), Decimal('70.00'))
+    ]
+
+    response = client.delete(f'/api/accounting/ledger/{entry.id}', headers=auth_header)
+    assert response.status_code == 200
+    assert LedgerEntry.objects(id=entry.id).count() == 0
+    assert _balances(bookings) == [
+        (Decimal('0.00'), Decimal('100.00')),
+        (Decimal('0.00'), Decimal('50.00')),
+        (Decimal('0.00'), Decimal('80.00'))
+    ]
+
+
+def test_legacy_booking_credit_is_reversed_in_full(client, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    customer = Customer(agencyId=agency, fullName="Legacy", phone="0301").save()
+    booking = Booking(agencyId=agency, customerId=customer, bookingNumber="BK-L-1",
+                      totalAmount=100, paidAmount=40).save()
+    # Written before allocations were recorded
+    entry = LedgerEntry(agencyId=agency, bookingId=booking, type='Credit',
+                        amount=Decimal('40'), description='Old payment').save()
+
+    response = client.delete(f'/api/accounting/ledger/{entry.id}', headers=auth_header)
+    assert response.status_code == 200
+    assert _balances([booking]) == [(Decimal('0.00'), Decimal('100.00'))]
+
+
+def test_booking_paid_in_inexact_parts_leaves_unpaid_list(client, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    customer = Customer(agencyId=agency, fullName="Cents", phone="0302").save()
+    booking = Booking(agencyId=agency, customerId=customer, bookingNumber="BK-C-1",
+                      totalAmount=Decimal('0.40')).save()
+
+    # 0.10 + 0.30 is 0.4000000000000001 in floats
+    for amount in ('0.10', '0.30'):
+        response = client.post('/api/accounting/ledger', headers=auth_header, json={
+            'type': 'Credit', 'amount': amount, 'description': 'Payment',
+            'bookingId': str(booking.id)
+        })
+        assert response.status_code == 201
+
+    assert _balances([booking]) == [(Decimal('0.40'), Decimal('0.00'))]
+    response = client.get('/api/accounting/unpaid', headers=auth_header)
+    assert response.status_code == 200
+    assert str(booking.id) not in [row['_id'] for row in response.get_json()]
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from models.agency import Agency
+from models.booking import Booking
+from models.customer import Customer
+from models.user import User
+from models.platform_metrics import PlatformMetrics
+from app.services.platform_metrics_service import PlatformMetricsService
+
+
+def test_snapshot_counts_agencies_bookings_and_gmv(client, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    Agency(name="Live", status='Active').save()
+    customer = Customer(agencyId=agency, fullName="Buyer", phone="0300").save()
+    Booking(agencyId=agency, customerId=customer, bookingNumber="BK-P-1", totalAmount=300).save()
+    Booking(agencyId=agency, customerId=customer, bookingNumber="BK-P-2", totalAmount=200,
+            createdAt=datetime.utcnow() - timedelta(days=90)).save()
+    Booking(agencyId=agency, customerId=customer, bookingNumber="BK-P-3", totalAmount=900,
+            status='Cancelled').save()
+
+    metrics = PlatformMetricsService.get()
+    assert metrics['agencies'] == {'total': 2, 'Pending': 1, 'Active': 1}
+    assert (metrics['totalBookings'], metrics['recentBookings'], metrics['recentActiveAgencies']) == (3, 2, 1)
+    assert (metrics['gmv'], metrics['recentGmv']) == (500, 300)
+    assert metrics['gmvByAgency'] == [
+        {'agencyId': str(agency.id), 'name': "Test Agency", 'gmv': 500, 'bookings': 2}
+    ]
+
+    # Reads come from the stored snapshot; status changes are applied to it
+    Booking(agencyId=agency, customerId=customer, bookingNumber="BK-P-4", totalAmount=50).save()
+    PlatformMetricsService.agency_status_change('Pending', 'Active')
+    metrics = PlatformMetricsService.get()
+    assert metrics['totalBookings'] == 3
+    assert metrics['agencies'] == {'total': 2, 'Pending': 0, 'Active': 2}
+    assert PlatformMetricsService.refresh()['totalBookings'] == 4
+    assert PlatformMetrics.objects.count() == 1
+
+
+def test_admin_emails_resolves_a_page_in_one_lookup(client, auth_header):
+    first = Agency(name="First").save()
+    second = Agency(name="Second").save()
+    User(agencyId=first, email="admin@first.com", passwordHash="x", name="A", role='AgencyAdmin').save()
+    User(agencyId=first, email="agent@first.com", passwordHash="x", name="B", role='Agent').save()
+
+    emails = PlatformMetricsService.admin_emails([first.id, str(second.id)])
+    assert emails == {first.id: "admin@first.com"}
+
+
+def test_gmv_ranking_is_capped_but_total_covers_every_agency(client, auth_header, monkeypatch):
+    monkeypatch.setattr('app.services.platform_metrics_service.GMV_AGENCIES', 1)
+    for name, amount in (("Large", 900), ("Small", 100)):
+        agency = Agency(name=name, status='Active').save()
+        customer = Customer(agencyId=agency, fullName="Buyer", phone=name).save()
+        Booking(agencyId=agency, customerId=customer, bookingNumber=f"BK-{name}", totalAmount=amount).save()
+
+    metrics = PlatformMetricsService.refresh()
+    assert metrics['gmv'] == 1000
+    assert [row['name'] for row in metrics['gmvByAgency']] == ["Large"]
@@ -0,0 +1,47 @@
+import contextvars
+import time
+import pytest
+from flask import g
+from app.services.query_executor import QueryExecutor, QueryTimeout, max_time_ms
+
+request_tag = contextvars.ContextVar('request_tag', default=None)
+
+
+def slow(value, seconds=0.2):
+    time.sleep(seconds)
+    return value
+
+
+def test_queries_overlap_and_see_the_request_context(app):
+    with app.test_request_context('/'):
+        g.agency_id = 'a1'
+        request_tag.set('req-1')
+        started = time.monotonic()
+        results, partial = QueryExecutor.run({
+            'one': (slow, 1),
+            'two': (slow, 2),
+            'three': (slow, 3),
+            'context': (lambda: (g.agency_id, request_tag.get(), max_time_ms() is not None),)
+        })
+        elapsed = time.monotonic() - started
+
+    assert results == {'one': 1, 'two': 2, 'three': 3, 'context': ('a1', 'req-1', True)}
+    assert partial == []
+    assert elapsed < 0.5
+
+
+def test_slow_or_failing_queries_fall_back_to_partial_results(app):
+    def broken():
+        raise RuntimeError("boom")
+
+    results, partial = QueryExecutor.run(
+        {'fast': (slow, 'ok', 0), 'slow': (slow, 'late', 1), 'broken': (broken,)},
+        fallbacks={'slow': None, 'broken': []},
+        timeouts={'slow': 50}
+    )
+    assert results == {'fast': 'ok', 'slow': None, 'broken': []}
+    assert sorted(partial) == ['broken', 'slow']
+
+    # Without a fallback the query is required
+    with pytest.raises(QueryTimeout):
+        QueryExecutor.run({'fast': (slow, 'ok', 0), 'slow': (slow, 'late', 1)}, timeouts={'slow': 50})
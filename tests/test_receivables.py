@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from models.booking import Booking
+from models.customer import Customer
+from models.user import User
+
+
+def _seed(agency):
+    now = datetime.utcnow()
+    ali = Customer(agencyId=agency, fullName="Ali", phone="0300").save()
+    sara = Customer(agencyId=agency, fullName="Sara", phone="0301").save()
+    for i, (customer, total, paid, days, status) in enumerate([
+        (ali, 100, 0, 5, 'Confirmed'),
+        (ali, 200, 50, 45, 'Confirmed'),
+        (sara, 300, 0, 75, 'Confirmed'),
+        (sara, 400, 100, 200, 'Confirmed'),
+        (sara, 500, 500, 10, 'Confirmed'),   # Paid
+        (ali, 600, 0, 20, 'Cancelled'),      # Cancelled
+    ]):
+        Booking(agencyId=agency, customerId=customer, bookingNumber=f"BK-R-{i}", totalAmount=total,
+                paidAmount=paid, status=status, createdAt=now - timedelta(days=days)).save()
+    return ali, sara
+
+
+def test_aging_buckets_and_customer_totals(client, auth_header):
+    _seed(User.objects(email="test@test.com").first().agencyId)
+
+    data = client.get('/api/accounting/receivables', headers=auth_header).get_json()
+    assert data['total'] == 850 and data['bookings'] == 4
+    assert [(b['bucket'], b['amount'], b['bookings']) for b in data['buckets']] == [
+        ('0-30', 100, 1), ('31-60', 150, 1), ('61-90', 300, 1), ('90+', 300, 1)
+    ]
+    assert [(c['customerName'], c['outstanding'], c['bookings'], c['oldestDays']) for c in data['customers']] == [
+        ('Sara', 600, 2, 200), ('Ali', 250, 2, 45)
+    ]
+
+
+def test_drill_down_is_sorted_and_paginated(client, auth_header):
+    ali, _ = _seed(User.objects(email="test@test.com").first().agencyId)
+
+    response = client.get('/api/accounting/receivables/bookings?limit=3', headers=auth_header)
+    first = response.get_json()
+    assert [b['bookingNumber'] for b in first] == ['BK-R-3', 'BK-R-2', 'BK-R-1']
+    assert first[0]['customerName'] == 'Sara' and first[0]['remainingAmount'] == 300
+
+    cursor = response.headers['X-Next-Cursor']
+    rest = client.get(f'/api/accounting/receivables/bookings?limit=3&cursor={cursor}', headers=auth_header)
+    assert [b['bookingNumber'] for b in rest.get_json()] == ['BK-R-0']
+    assert 'X-Next-Cursor' not in rest.headers
+
+    in_bucket = client.get('/api/accounting/receivables/bookings?bucket=31-60', headers=auth_header).get_json()
+    assert [b['bookingNumber'] for b in in_bucket] == ['BK-R-1']
+    for_customer = client.get(f'/api/accounting/receivables/bookings?customerId={ali.id}', headers=auth_header).get_json()
+    assert [b['bookingNumber'] for b in for_customer] == ['BK-R-1', 'BK-R-0']
+    assert client.get('/api/accounting/receivables/bookings?bucket=7-8', headers=auth_header).status_code == 400
@@ -0,0 +1,62 @@
+from models.agent import Agent
+from models.booking import Booking
+from models.customer import Customer
+from models.search_entry import SearchEntry
+from models.user import User
+from app.services.search_service import SearchService
+
+
+def test_search_endpoint_ranks_typed_results(client, auth_header):
+    response = client.post('/api/customers', headers=auth_header, json={
+        'fullName': 'Ali Raza', 'phone': '+92 300-1234567', 'passportNumber': 'AB123456'
+    })
+    assert response.status_code == 201
+    customer = Customer.objects.get(phone='+92 300-1234567')
+    client.post('/api/customers', headers=auth_header, json={'fullName': 'Alina Khan', 'phone': '0321'})
+
+    results = client.get('/api/search?q=ali', headers=auth_header).get_json()['results']
+    assert [r['title'] for r in results] == ['Ali Raza', 'Alina Khan']
+    assert results[0]['type'] == 'customer' and results[0]['id'] == str(customer.id)
+
+    # Identifiers match with or without separators, and +92 numbers by their local form
+    for q in ('03001234567', 'ab1234', 'raza 0300'):
+        results = client.get(f'/api/search?q={q}', headers=auth_header).get_json()['results']
+        assert [r['id'] for r in results] == [str(customer.id)]
+
+    assert client.get('/api/search?q=ali&types=booking', headers=auth_header).get_json()['results'] == []
+    assert client.get('/api/search?q=ali&types=nope', headers=auth_header).status_code == 400
+
+    response = client.get('/api/customers?search=khan', headers=auth_header)
+    assert [c['fullName'] for c in response.get_json()] == ['Alina Khan']
+
+    client.delete(f'/api/customers/{customer.id}', headers=auth_header)
+    assert SearchEntry.objects(refId=customer.id).count() == 0
+
+
+def test_rebuild_indexes_existing_documents(app, auth_header):
+    agency = User.objects(email="test@test.com").first().agencyId
+    customer = Customer(agencyId=agency, fullName="Legacy", phone="0300").save()
+    Booking(agencyId=agency, customerId=customer, bookingNumber="BK-2024-0042",
+            totalAmount=100, pnr="XY7Z").save()
+    Agent(agent_name="Bilal", source_name="Hamid", mobile_number="0333",
+          slip_number="S-981", created_by_agency=agency).save()
+
+    assert SearchService.rebuild('booking') == 1
+    assert SearchService.rebuild('agent') == 1
+    assert [r['title'] for r in SearchService.search(agency.id, '0042')] == ['BK-2024-0042']
+    assert [r['subtitle'] for r in SearchService.search(agency.id, 'xy7z')] == ['XY7Z']
+    assert [r['type'] for r in SearchService.search(agency.id, 's981')] == ['agent']
+    # Other agencies never see these entries
+    assert SearchService.search(customer.id, 'bilal') == []
+
+
+def test_list_filters_and_exact_hits_are_not_lost_to_the_candidate_cap(app, auth_header, monkeypatch):
+    monkeypatch.setattr('app.services.search_service.MAX_CANDIDATES', 3)
+    agency = User.objects(email="test@test.com").first().agencyId
+    for i in range(5):
+        SearchService.index(Customer(agencyId=agency, fullName=f"Khan {i}", phone=f"031{i}").save())
+    exact = Customer(agencyId=agency, fullName="Khanzada", phone="0399", passportNumber="K").save()
+    SearchService.index(exact)
+
+    assert len(SearchService.ids(agency.id, 'customer', 'k')) == 6
+    assert SearchService.search(agency.id, 'k', limit=1)[0]['id'] == str(exact.id)
@@ -0,0 +1,40 @@
+import threading
+from datetime import datetime
+from models.agency import Agency
+from models.booking import Booking
+from models.customer import Customer
+from app.services.sequence_service import SequenceService
+
+
+def test_concurrent_numbers_are_unique_and_contiguous(app):
+    agency = Agency(name="Sequence Agency").save()
+    numbers = []
+    lock = threading.Lock()
+
+    def work():
+        for _ in range(25):
+            number = SequenceService.next_number(agency.id, 'BK')
+            with lock:
+                numbers.append(number)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    year = datetime.now().year
+    assert len(set(numbers)) == 200
+    assert sorted(numbers) == [f"BK-{year}-{i:04d}" for i in range(1, 201)]
+
+
+def test_counter_is_seeded_from_existing_numbers(app):
+    agency = Agency(name="Seeded Agency").save()
+    customer = Customer(agencyId=agency, fullName="Seed Customer", phone="0300").save()
+    year = datetime.now().year
+    for number in (f"BK-{year}-0007", f"BK-{year}-0012", "BK-20231024-9999"):
+        Booking(agencyId=agency, customerId=customer, bookingNumber=number,
+                totalAmount=100).save()
+
+    assert SequenceService.next_number(agency.id, 'BK') == f"BK-{year}-0013"
+    assert SequenceService.next_number(agency.id, 'QT') == f"QT-{year}-0001"
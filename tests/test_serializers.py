@@ -0,0 +1,76 @@
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from bson import ObjectId, DBRef, Decimal128, json_util
+from bson.json_util import LEGACY_JSON_OPTIONS
+from models.agency import Agency
+from models.customer import Customer
+from models.booking import Booking
+from app.utils.serializers import mongo_to_dict, _convert_mongo_types
+
+
+def legacy_to_dict(obj):
+    """The original to_json -> json.loads -> _convert_mongo_types round trip"""
+    if isinstance(obj, dict):
+        data = _convert_mongo_types(json.loads(json_util.dumps(obj, json_options=LEGACY_JSON_OPTIONS)))
+        data['id'] = data['_id']
+        return data
+    if hasattr(obj, 'as_pymongo'):
+        data = _convert_mongo_types(json.loads(obj.to_json()))
+        for item in data:
+            item['id'] = item['_id']
+        return data
+    data = _convert_mongo_types(json.loads(obj.to_json()))
+    data['id'] = data['_id']
+    return data
+
+
+@pytest.fixture
+def bookings(app):
+    agency = Agency(name="Serializer Agency").save()
+    customer = Customer(agencyId=agency, fullName="Serializer Customer",
+                        phone="0300", cnic="12345-1234567-1", gender="Male").save()
+    base = datetime(2024, 3, 1, 10, 30, 15, 123456)
+    for i in range(5):
+        Booking(agencyId=agency, customerId=customer, bookingNumber=f"BK-{i}",
+                totalAmount=Decimal('1234.565') + i, paidAmount=Decimal('100.10'),
+                pnr=None if i % 2 else f"PNR{i}", createdAt=base + timedelta(days=i)).save()
+    return agency
+
+
+def test_queryset_matches_legacy(bookings):
+    query = Booking.objects(agencyId=bookings)
+    assert mongo_to_dict(query) == legacy_to_dict(query)
+
+
+def test_document_matches_legacy(bookings):
+    booking = Booking.objects(agencyId=bookings).first()
+    assert mongo_to_dict(booking) == legacy_to_dict(booking)
+
+
+def test_list_keeps_id_alias(bookings):
+    result = mongo_to_dict(list(Booking.objects(agencyId=bookings)))
+    assert len(result) == 5
+    assert all(item['id'] == item['_id'] for item in result)
+
+
+def test_raw_dict_matches_legacy():
+    raw = {
+        '_id': ObjectId(),
+        'agencyId': ObjectId(),
+        'ref': DBRef('agencies', ObjectId()),
+        'amount': Decimal128('19.99'),
+        'when': datetime(2024, 1, 31, 23, 59, 59, 999999),
+        'aware': datetime(2024, 6, 1, 12, 0, tzinfo=timezone(timedelta(hours=5))),
+        'before_epoch': datetime(1965, 5, 4, 3, 2, 1),
+        'travelers': [{'name': 'A', 'passportId': ObjectId(), 'dob': datetime(1990, 1, 1)}],
+        'tags': ['x', 'y'],
+        'flags': {'paid': True, 'count': 3, 'rate': 0.5, 'note': None},
+    }
+    assert mongo_to_dict(raw) == legacy_to_dict(raw)
+
+
+def test_none_and_plain_values():
+    assert mongo_to_dict(None) is None
+    assert mongo_to_dict([]) == []
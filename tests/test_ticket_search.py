@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from models.agency import Agency
+from models.ticket_group import TicketGroup, normalize_search, search_tokens
+
+
+def make_group(agency, airline, sector, days=10, seats=20, status='active'):
+    return TicketGroup(
+        agencyId=agency, airline=airline, sector=sector, travel_type='Umrah',
+        date=datetime.utcnow() + timedelta(days=days), flight_no='SV123',
+        price_per_seat=150000, total_seats=seats, available_seats=seats, status=status
+    ).save()
+
+
+def test_normalize_search():
+    assert normalize_search(' LHE - Jed ') == 'lhe jed'
+    assert normalize_search(None) == ''
+    assert search_tokens('LHE-JED') == ['lhe', 'jed']
+
+
+def test_search_fields_are_maintained_on_save(app):
+    group = make_group(Agency(name="Seller").save(), 'Saudi Airlines', 'LHE-JED')
+    assert group.sector_search == ['lhe', 'jed']
+    assert group.airline_search == ['saudi', 'airlines']
+
+
+def test_public_search_filters_and_facets(client):
+    seller = Agency(name="Seller").save()
+    make_group(seller, 'Saudi Airlines', 'LHE-JED')
+    make_group(seller, 'Saudi Airlines', 'LHE-JED')
+    make_group(seller, 'PIA', 'LHE-JED')
+    make_group(seller, 'Saudi Airlines', 'ISB-JED')
+    make_group(seller, 'Saudi Airlines', 'LHE-JED', days=-5)  # departed
+    make_group(seller, 'Saudi Airlines', 'LHE-JED', status='closed')
+
+    res = client.get('/api/ticket-groups/?sector=lhe jed&limit=2')
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body['total'] == 3
+    assert len(body['ticket_groups']) == 2
+    assert body['next_cursor'] and body['limit'] == 2
+    assert body['ticket_groups'][0]['agency_contact']['name'] == 'Seller'
+    assert {f['value']: f['count'] for f in body['facets']['airline']} == {'Saudi Airlines': 2, 'PIA': 1}
+
+    rest = client.get(f"/api/ticket-groups/?sector=lhe jed&limit=2&cursor={body['next_cursor']}").get_json()
+    assert len(rest['ticket_groups']) == 1
+    assert rest['next_cursor'] is None
+    seen = {g['_id'] for g in body['ticket_groups'] + rest['ticket_groups']}
+    assert len(seen) == 3
+
+    # Any word of the sector matches by prefix: destination-only searches
+    assert client.get('/api/ticket-groups/?sector=jed').get_json()['total'] == 4
+    assert client.get('/api/ticket-groups/?sector=je&airline=air').get_json()['total'] == 3
+    assert client.get('/api/ticket-groups/?sector=ed').get_json()['total'] == 0
+
+    # The page size reported is the one applied
+    assert client.get('/api/ticket-groups/?limit=500').get_json()['limit'] == 100